@@ -6,5 +6,22 @@ This module exports functions used in OpenFASOC generators. The following submod
 	1. `generate_verilog(parameters: dict, src_dir: str, out_dir: str) -> None`: Used to generate synthesizable Verilog files (for OpenROAD flow) from source Mako-based Verilog templates.
 	2. `COMMON_PLATFORMS_PREFIX_MAP` (dict): This is a dictionary of common platforms (currently sky130) and their cell naming prefixes.
 
+- `common.simulation_scheduler`
+	1. `run_jobs(jobs: Iterable[SimulationJob], max_jobs: int = None, cache: SimulationCache = None, slots: Semaphore = None) -> Iterator[JobResult]`: Runs simulator invocations in a bounded worker pool (with per-job timeouts and retries on crashes, optionally sharing a global limit with other calls) and yields the results in completion order.
+	2. `SimulationJob`, `JobResult`: A single simulator invocation and its outcome.
+	3. `default_max_jobs() -> int`: The default worker pool size (number of CPUs).
+
+- `common.simulation_cache`
+	1. `SimulationCache`: A size-bounded (LRU) content-addressed cache of simulation outputs, keyed on the expanded netlist, included model files, control script, command line and simulator version. Used by `run_jobs` to skip identical simulations.
+	2. `expand_netlist_inputs(netlist: str, cwd: str) -> Iterator[(str, str)]`: Yields every file (and its hash) read by a netlist through `.include`/`.lib`.
+
+- `common.workspace`
+	1. `create_workspace(gen_dir: str, root: str, dirs: Iterable[str]) -> str`: Creates a private copy of the directories written by a generator run (flow, blocks, src...) so that several runs can execute concurrently without sharing the flow outputs.
+
+- `common.flow_steps`
+	1. `run_make_targets(targets: Iterable[str], flow_dir: str, make_args: Iterable[str] = (), log_dir: str = None, fail_fast: bool = True, optional: Iterable[str] = (), slots: Semaphore = None) -> StepsResult`: Runs independent flow make targets concurrently, each with its own log file, stopping the others at the first failure, and returns their results and combined wall time.
+	2. `VERIFICATION_TARGETS` (tuple): The DRC and LVS targets (`magic_drc`, `netgen_lvs`) run after `make finish`.
+	3. `StepResult`, `StepsResult`: The outcome of a target and of all the targets of a call.
+
 See individual function documentation for more information on a particular function.
 """
\ No newline at end of file
@@ -0,0 +1,164 @@
+from os import getpgid, killpg, makedirs, path
+from signal import SIGKILL
+from subprocess import STDOUT, Popen
+from threading import Semaphore
+from time import monotonic, sleep
+from typing import Iterable, Optional
+
+# sign-off steps of the OpenROAD flow run after `make finish`, they only read the final GDS/CDL and write their own reports,
+# so `run_make_targets` runs them concurrently and the first failure stops the other one
+VERIFICATION_TARGETS = ("magic_drc", "netgen_lvs")
+
+class StepResult:
+	"""The outcome of a flow make target run by `run_make_targets`.
+
+	Attributes:
+	- `target` (str): The make target.
+	- `returncode` (int): Return code of make. Negative if it was killed by a signal, `None` if the target was never started.
+	- `elapsed` (float): Wall time in seconds of the target.
+	- `log_file` (str): The file the output of make was written to.
+	- `cancelled` (bool): `True` if the target was stopped (or never started) because another target failed.
+	"""
+	def __init__(self, target: str, returncode: Optional[int], elapsed: float, log_file: str, cancelled: bool = False) -> None:
+		self.target = target
+		self.returncode = returncode
+		self.elapsed = elapsed
+		self.log_file = log_file
+		self.cancelled = cancelled
+
+	@property
+	def ok(self) -> bool:
+		return self.returncode == 0 and not self.cancelled
+
+	def __repr__(self) -> str:
+		return "StepResult({!r}, returncode={}, elapsed={:.1f}s, cancelled={})".format(
+			self.target, self.returncode, self.elapsed, self.cancelled
+		)
+
+class StepsResult:
+	"""The outcome of all the targets of a `run_make_targets` call.
+
+	Attributes:
+	- `steps` (dict): The `StepResult` of every target, in the order the targets were given.
+	- `elapsed` (float): Combined wall time in seconds, from the start of the first target to the end of the last one.
+	"""
+	def __init__(self, steps: dict, elapsed: float) -> None:
+		self.steps = steps
+		self.elapsed = elapsed
+
+	@property
+	def ok(self) -> bool:
+		return all(step.ok for step in self.steps.values())
+
+	def failed(self, optional: Iterable[str] = ()) -> list:
+		"""Returns the targets that failed (or were cancelled), except the `optional` ones."""
+		return [target for target, step in self.steps.items() if not step.ok and target not in optional]
+
+	def report(self) -> str:
+		"""Returns a printable summary: the status, wall time and log file of every target and the combined wall time."""
+		lines = []
+		for step in self.steps.values():
+			if step.cancelled:
+				status = "cancelled"
+			elif step.ok:
+				status = "ok"
+			else:
+				status = "failed (return code {})".format(step.returncode)
+			lines.append("{}: {} in {:.1f} s, log: {}".format(step.target, status, step.elapsed, step.log_file))
+		lines.append("{} finished in {:.1f} s".format(", ".join(self.steps), self.elapsed))
+		return "\n".join(lines)
+
+	def __getitem__(self, target: str) -> StepResult:
+		return self.steps[target]
+
+	def __repr__(self) -> str:
+		return "StepsResult({}, elapsed={:.1f}s)".format(list(self.steps.values()), self.elapsed)
+
+def _stop(process: Popen) -> None:
+	try:
+		killpg(getpgid(process.pid), SIGKILL)
+	except ProcessLookupError:
+		pass
+	process.wait()
+
+def run_make_targets(
+	targets: Iterable[str],
+	flow_dir: str,
+	make_args: Iterable[str] = (),
+	log_dir: Optional[str] = None,
+	fail_fast: bool = True,
+	optional: Iterable[str] = (),
+	slots: Optional[Semaphore] = None,
+	poll_interval: float = 0.2
+) -> StepsResult:
+	"""Runs independent make targets of an OpenROAD flow concurrently (e.g. `VERIFICATION_TARGETS` once `make finish` is done) and returns their results.
+
+	Every target is run as `make <target> <make_args>` in its own process group, its output is written to `<log_dir>/<target>.log`. With `fail_fast`, the first target that fails stops the targets that are still running.
+
+	Arguments:
+	- `targets` (Iterable[str]): The make targets. They must not write the same files.
+	- `flow_dir` (str): The flow directory (where the flow Makefile is).
+	- `make_args` (Iterable[str]): Extra make arguments given to every target (e.g. `PLATFORM_ARG=sky130hd`).
+	- `log_dir` (str): The directory of the log files. Defaults to `flow_dir`.
+	- `fail_fast` (bool): Stop the other targets as soon as one fails.
+	- `optional` (Iterable[str]): Targets whose failure does not stop the others (e.g. a DRC run whose errors are only reported).
+	- `slots` (threading.Semaphore): An optional semaphore shared with other runs (see `common.simulation_scheduler.run_jobs`). Every target holds one slot while it runs, targets without a free slot wait for one.
+	- `poll_interval` (float): Time in seconds between two checks of the running targets.
+	"""
+	targets = list(targets)
+	optional = set(optional)
+	log_dir = flow_dir if log_dir is None else log_dir
+	makedirs(log_dir, exist_ok=True)
+
+	start = monotonic()
+	pending = list(targets)
+	running = {}
+	logs = {}
+	results = {}
+	failed = False
+
+	try:
+		while pending or running:
+			# start the waiting targets while slots are free
+			while pending and not failed and (slots is None or slots.acquire(blocking=len(running) == 0)):
+				target = pending.pop(0)
+				log_file = path.join(log_dir, target + ".log")
+				logs[target] = open(log_file, "w")
+				process = Popen(["make", target, *make_args], cwd=flow_dir, stdout=logs[target], stderr=STDOUT, start_new_session=True)
+				running[target] = (process, monotonic(), log_file)
+
+			if failed:
+				for target in pending:
+					results[target] = StepResult(target, None, 0.0, path.join(log_dir, target + ".log"), cancelled=True)
+				pending = []
+
+			for target, (process, started, log_file) in list(running.items()):
+				if process.poll() is None:
+					continue
+				del running[target]
+				logs[target].close()
+				if slots is not None:
+					slots.release()
+				results[target] = StepResult(target, process.returncode, monotonic() - started, log_file)
+				if process.returncode != 0 and fail_fast and target not in optional:
+					failed = True
+
+			if failed:
+				for target, (process, started, log_file) in list(running.items()):
+					_stop(process)
+					del running[target]
+					logs[target].close()
+					if slots is not None:
+						slots.release()
+					results[target] = StepResult(target, process.returncode, monotonic() - started, log_file, cancelled=True)
+			elif running:
+				sleep(poll_interval)
+	finally:
+		# interrupted (e.g. Ctrl-C): never leave a flow step running in the background
+		for target, (process, started, log_file) in running.items():
+			_stop(process)
+			logs[target].close()
+			if slots is not None:
+				slots.release()
+
+	return StepsResult({target: results[target] for target in targets}, monotonic() - start)
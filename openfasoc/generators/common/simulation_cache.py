@@ -0,0 +1,244 @@
+from hashlib import sha256
+from json import dump, load
+from os import environ, link, listdir, makedirs, path, remove, rename, stat, utime
+from re import IGNORECASE, compile
+from shutil import copy2, rmtree, which
+from subprocess import PIPE, STDOUT, run
+from tempfile import mkdtemp
+from threading import Lock
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Default location and size limit of the cache, can be overridden with environment variables
+DEFAULT_CACHE_DIR = environ.get(
+	"OPENFASOC_SIM_CACHE",
+	path.join(path.expanduser("~"), ".cache", "openfasoc", "simulations")
+)
+DEFAULT_MAX_SIZE = int(float(environ.get("OPENFASOC_SIM_CACHE_SIZE_GB", "10")) * 1024 ** 3)
+
+# `.include 'file'`, `.inc file` and `.lib 'file' corner` statements (ngspice and Xyce)
+_INCLUDE_RE = compile(r"^\s*\.(?:include|inc|lib)\s+['\"]?([^'\"\s]+)['\"]?", IGNORECASE)
+
+_MANIFEST = "manifest.json"
+
+# digests of files and simulator versions already computed by this process
+_file_digests = {}
+_simulator_versions = {}
+_digest_lock = Lock()
+
+def _file_digest(file_path: str) -> str:
+	"""Returns the sha256 digest of a file. Digests are memoized by (path, size, mtime), so the (large) model libraries shared by many simulations are only hashed once per process."""
+	file_stat = stat(file_path)
+	memo_key = (path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns)
+
+	with _digest_lock:
+		if memo_key in _file_digests:
+			return _file_digests[memo_key]
+
+	digest = sha256()
+	with open(file_path, "rb") as file:
+		for chunk in iter(lambda: file.read(1 << 20), b""):
+			digest.update(chunk)
+
+	with _digest_lock:
+		_file_digests[memo_key] = digest.hexdigest()
+
+	return digest.hexdigest()
+
+def expand_netlist_inputs(netlist: str, cwd: Optional[str] = None) -> Iterator[Tuple[str, Optional[str]]]:
+	"""Yields `(path, sha256 digest)` of a netlist and, recursively, of every file it includes with `.include`/`.inc`/`.lib`.
+
+	Relative paths are resolved against the directory of the including file, then against `cwd`. Files that can not be found are yielded with a `None` digest. The `.lib` corner is part of the including file, so it is covered by that file's digest.
+
+	Arguments:
+	- `netlist` (str): Path to the top level netlist (testbench).
+	- `cwd` (str): The directory the simulator is run from.
+	"""
+	cwd = cwd or path.dirname(path.abspath(netlist))
+	seen = set()
+	stack = [path.join(cwd, netlist)]
+
+	while stack:
+		file_path = path.abspath(stack.pop())
+		if file_path in seen:
+			continue
+		seen.add(file_path)
+
+		if not path.isfile(file_path):
+			yield file_path, None
+			continue
+
+		yield file_path, _file_digest(file_path)
+
+		included = []
+		with open(file_path, "r", errors="replace") as file:
+			for line in file:
+				match = _INCLUDE_RE.match(line)
+				if match is None:
+					continue
+				include = path.expanduser(path.expandvars(match.group(1)))
+				if not path.isabs(include):
+					candidate = path.join(path.dirname(file_path), include)
+					include = candidate if path.exists(candidate) else path.join(cwd, include)
+				included.append(include)
+		# keep the include order stable
+		stack.extend(reversed(included))
+
+def simulator_version(simulator: str) -> str:
+	"""Returns a string identifying the simulator binary: its resolved path, size, modification time and version output. The result is memoized per process."""
+	if simulator in _simulator_versions:
+		return _simulator_versions[simulator]
+
+	binary = which(path.expanduser(simulator))
+	if binary is None:
+		version = "not-found:" + simulator
+	else:
+		binary_stat = stat(binary)
+		version = "{}:{}:{}".format(binary, binary_stat.st_size, binary_stat.st_mtime_ns)
+		for flag in ("--version", "-v"):
+			try:
+				output = run([binary, flag], stdout=PIPE, stderr=STDOUT, stdin=PIPE, timeout=30).stdout
+			except Exception:
+				continue
+			if output:
+				version += ":" + output.decode(errors="replace").strip()
+				break
+
+	_simulator_versions[simulator] = version
+	return version
+
+def _link_or_copy(src: str, dst: str) -> None:
+	if path.lexists(dst):
+		remove(dst)
+	try:
+		link(src, dst)
+	except OSError:
+		copy2(src, dst)
+
+class SimulationCache:
+	"""A content-addressed cache of simulation outputs.
+
+	Entries are keyed by a hash of the fully expanded simulation inputs: the netlist and all the files it includes (model libraries, `.lib` corner, control script), the `.spiceinit` of the run directory, the simulator command line and the simulator binary version. On a hit the cached outputs (raw files, logs, measurements) are restored into the run directory by hardlink (or copy) instead of simulating. The cache size is bounded with a least-recently-used eviction policy.
+
+	Outputs are shared with the cache through hardlinks, so runs must remove stale outputs before simulating again (`run_jobs` does this) instead of overwriting them in place.
+
+	Arguments:
+	- `cache_dir` (str): Directory of the cache. Defaults to `$OPENFASOC_SIM_CACHE` or `~/.cache/openfasoc/simulations`.
+	- `max_size` (int): Maximum size of the cache in bytes. Defaults to `$OPENFASOC_SIM_CACHE_SIZE_GB` (10 GB).
+	- `enabled` (bool): If `False`, `lookup` always misses and `store` does nothing.
+	"""
+	def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_MAX_SIZE, enabled: bool = True) -> None:
+		self.cache_dir = cache_dir
+		self.max_size = max_size
+		self.enabled = enabled
+		self._lock = Lock()
+
+		if self.enabled:
+			makedirs(self.cache_dir, exist_ok=True)
+
+	def key(self, command: str, netlist: str, cwd: Optional[str] = None, extra_inputs: Iterable[str] = ()) -> str:
+		"""Returns the cache key of a simulation.
+
+		Arguments:
+		- `command` (str): The simulator command line. Its first word is the simulator binary.
+		- `netlist` (str): The top level netlist passed to the simulator.
+		- `cwd` (str): The directory the simulator is run from.
+		- `extra_inputs` (Iterable[str]): Other files read by the simulation (e.g. a control script that is not included by the netlist).
+		"""
+		cwd = cwd or path.dirname(path.abspath(netlist))
+		words = command.split() if isinstance(command, str) else list(command)
+
+		digest = sha256()
+		digest.update(" ".join(words).encode())
+		digest.update(simulator_version(words[0]).encode())
+
+		inputs = [netlist, ".spiceinit"] + list(extra_inputs)
+		for input_file in inputs:
+			for file_path, file_digest in expand_netlist_inputs(input_file, cwd):
+				# paths inside the run directory are hashed relative to it, so identical runs in other directories hit
+				relative = path.relpath(file_path, path.abspath(cwd))
+				digest.update((relative if not relative.startswith("..") else file_path).encode())
+				digest.update(str(file_digest).encode())
+
+		return digest.hexdigest()
+
+	def _entry(self, key: str) -> str:
+		return path.join(self.cache_dir, key[:2], key)
+
+	def restore(self, key: str, out_dir: str) -> bool:
+		"""Restores the outputs of a cached simulation into `out_dir`. Returns `False` on a cache miss."""
+		if not self.enabled:
+			return False
+
+		entry = self._entry(key)
+		try:
+			with open(path.join(entry, _MANIFEST), "r") as manifest_file:
+				manifest = load(manifest_file)
+			for output in manifest["outputs"]:
+				_link_or_copy(path.join(entry, "outputs", output), path.join(out_dir, output))
+		except (OSError, ValueError, KeyError):
+			return False
+
+		# mark the entry as recently used
+		utime(path.join(entry, _MANIFEST))
+		return True
+
+	def store(self, key: str, out_dir: str, outputs: Iterable[str]) -> bool:
+		"""Stores the outputs (paths relative to `out_dir`) of a finished simulation. Returns `False` if an output is missing."""
+		if not self.enabled:
+			return False
+
+		outputs = list(outputs)
+		if not all(path.isfile(path.join(out_dir, output)) for output in outputs):
+			return False
+
+		entry = self._entry(key)
+		makedirs(path.dirname(entry), exist_ok=True)
+		staging = mkdtemp(dir=path.dirname(entry), prefix=".staging-")
+
+		size = 0
+		for output in outputs:
+			staged_output = path.join(staging, "outputs", output)
+			makedirs(path.dirname(staged_output), exist_ok=True)
+			_link_or_copy(path.join(out_dir, output), staged_output)
+			size += stat(staged_output).st_size
+
+		with open(path.join(staging, _MANIFEST), "w") as manifest_file:
+			dump({"outputs": outputs, "size": size}, manifest_file)
+
+		try:
+			rename(staging, entry)
+		except OSError:
+			# another run stored the same entry first
+			rmtree(staging, ignore_errors=True)
+
+		self.evict()
+		return True
+
+	def entries(self) -> list:
+		"""Returns `(last use time, size, entry directory)` of all the cache entries."""
+		entries = []
+		for prefix in listdir(self.cache_dir):
+			prefix_dir = path.join(self.cache_dir, prefix)
+			if not path.isdir(prefix_dir):
+				continue
+			for key in listdir(prefix_dir):
+				manifest = path.join(prefix_dir, key, _MANIFEST)
+				try:
+					with open(manifest, "r") as manifest_file:
+						size = load(manifest_file)["size"]
+					entries.append((stat(manifest).st_mtime, size, path.join(prefix_dir, key)))
+				except (OSError, ValueError, KeyError):
+					continue
+		return entries
+
+	def evict(self) -> None:
+		"""Removes the least recently used entries until the cache fits in `max_size`."""
+		with self._lock:
+			entries = sorted(self.entries())
+			total_size = sum(size for _, size, _ in entries)
+
+			for _, size, entry in entries:
+				if total_size <= self.max_size:
+					break
+				rmtree(entry, ignore_errors=True)
+				total_size -= size
@@ -0,0 +1,152 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import cpu_count, getpgid, killpg, path, remove
+from signal import SIGKILL
+from subprocess import Popen, TimeoutExpired
+from threading import Semaphore
+from time import monotonic
+from typing import Iterable, Iterator, Optional, Union
+
+class SimulationJob:
+	"""A single simulator invocation scheduled by `run_jobs`.
+
+	Arguments:
+	- `name` (str): A unique name used to identify the job in logs and results.
+	- `command` (str | list): The command to run. A string is run through the shell (like the commands generated by the `*_prepare_scripts` functions), a list is executed directly.
+	- `cwd` (str): The working directory of the command.
+	- `timeout` (float): Maximum run time in seconds of a single attempt. `None` disables the timeout.
+	- `retries` (int): Number of times the job is re-run if the simulator crashes (exits with a non-zero return code). Timed out jobs are not retried.
+	- `group` (str): An optional tag used to group related jobs (e.g. all the runs of one simulation directory).
+	- `netlist` (str): The top level netlist of the simulation (relative to `cwd`). Required, with `outputs`, to cache the job results.
+	- `outputs` (list): The files (relative to `cwd`) written by the simulation, e.g. raw files and logs. These are restored from the cache on a hit.
+	"""
+	def __init__(
+		self,
+		name: str,
+		command: Union[str, list],
+		cwd: Optional[str] = None,
+		timeout: Optional[float] = None,
+		retries: int = 0,
+		group: Optional[str] = None,
+		netlist: Optional[str] = None,
+		outputs: Optional[list] = None
+	) -> None:
+		self.name = name
+		self.command = command
+		self.cwd = cwd
+		self.timeout = timeout
+		self.retries = retries
+		self.group = group
+		self.netlist = netlist
+		self.outputs = outputs
+
+	def __repr__(self) -> str:
+		return "SimulationJob({!r})".format(self.name)
+
+class JobResult:
+	"""The outcome of a `SimulationJob`.
+
+	Attributes:
+	- `job` (SimulationJob): The job this result belongs to.
+	- `returncode` (int): Return code of the last attempt. Negative if the process was killed by a signal.
+	- `attempts` (int): Number of times the job was started.
+	- `elapsed` (float): Total wall time in seconds spent on all the attempts.
+	- `timed_out` (bool): `True` if the last attempt was killed because it exceeded the job timeout.
+	- `cached` (bool): `True` if the outputs were restored from the simulation cache instead of simulating.
+	"""
+	def __init__(self, job: SimulationJob, returncode: int, attempts: int, elapsed: float, timed_out: bool, cached: bool = False) -> None:
+		self.job = job
+		self.returncode = returncode
+		self.attempts = attempts
+		self.elapsed = elapsed
+		self.timed_out = timed_out
+		self.cached = cached
+
+	@property
+	def ok(self) -> bool:
+		return self.returncode == 0 and not self.timed_out
+
+	def __repr__(self) -> str:
+		return "JobResult({!r}, returncode={}, attempts={}, elapsed={:.1f}s, timed_out={}, cached={})".format(
+			self.job.name, self.returncode, self.attempts, self.elapsed, self.timed_out, self.cached
+		)
+
+def default_max_jobs() -> int:
+	"""Returns the default size of the worker pool (number of CPUs available to the process)."""
+	return cpu_count() or 1
+
+def _run_once(job: SimulationJob) -> tuple:
+	"""Runs a single attempt of a job and returns `(returncode, timed_out)`.
+
+	The job is started in its own process group so that a timeout kills the whole process tree (e.g. the shell and the simulator started by it).
+	"""
+	process = Popen(job.command, cwd=job.cwd, shell=isinstance(job.command, str), start_new_session=True)
+
+	try:
+		return process.wait(timeout=job.timeout), False
+	except TimeoutExpired:
+		try:
+			killpg(getpgid(process.pid), SIGKILL)
+		except ProcessLookupError:
+			pass
+		process.wait()
+		return process.returncode, True
+
+def _run_job(job: SimulationJob, cache=None, slots: Optional[Semaphore] = None) -> JobResult:
+	"""Runs a job, retrying it up to `job.retries` times if the simulator crashes.
+
+	If a `SimulationCache` is given and the job has a `netlist` and `outputs`, the outputs are restored from the cache when possible and stored in it after a successful run.
+	If `slots` is given, a slot is held while the simulator runs (restoring from the cache does not need one).
+	"""
+	start = monotonic()
+	attempts = 0
+
+	key = None
+	if cache is not None and cache.enabled and job.netlist is not None and job.outputs:
+		cwd = job.cwd or "."
+		key = cache.key(job.command, job.netlist, cwd)
+		if cache.restore(key, cwd):
+			return JobResult(job, 0, 0, monotonic() - start, False, cached=True)
+		# cached outputs are hardlinked, never let the simulator overwrite them in place
+		for output in job.outputs:
+			if path.lexists(path.join(cwd, output)):
+				remove(path.join(cwd, output))
+
+	while True:
+		attempts += 1
+		if slots is None:
+			returncode, timed_out = _run_once(job)
+		else:
+			with slots:
+				returncode, timed_out = _run_once(job)
+
+		if returncode == 0 and key is not None:
+			cache.store(key, job.cwd or ".", job.outputs)
+
+		if returncode == 0 or timed_out or attempts > job.retries:
+			return JobResult(job, returncode, attempts, monotonic() - start, timed_out)
+
+		print("[Warning] Simulation '{}' crashed (return code {}), retrying ({}/{}).".format(job.name, returncode, attempts, job.retries))
+
+def run_jobs(jobs: Iterable[SimulationJob], max_jobs: Optional[int] = None, cache=None, slots: Optional[Semaphore] = None) -> Iterator[JobResult]:
+	"""Runs simulation jobs in a bounded worker pool and yields their results in completion order.
+
+	At most `max_jobs` simulations run at the same time, the remaining jobs are queued. Results are yielded as soon as a job finishes, so the caller can start post-processing finished runs while the others are still simulating.
+
+	Arguments:
+	- `jobs` (Iterable[SimulationJob]): The jobs to run. They are started in the given order.
+	- `max_jobs` (int): Maximum number of concurrent jobs. Defaults to `default_max_jobs()`.
+	- `cache` (SimulationCache): An optional simulation cache (see `common.simulation_cache`) used for the jobs that define a `netlist` and `outputs`.
+	- `slots` (threading.Semaphore): An optional semaphore shared by concurrent `run_jobs` calls (e.g. the runs of a batch of designs) to bound the total number of running simulations. Every job holds one slot while it runs.
+	"""
+	jobs = list(jobs)
+	if max_jobs is None or max_jobs < 1:
+		max_jobs = default_max_jobs()
+
+	if len(jobs) == 0:
+		return
+
+	with ThreadPoolExecutor(max_workers=min(max_jobs, len(jobs))) as pool:
+		futures = [pool.submit(_run_job, job, cache, slots) for job in jobs]
+
+		for future in as_completed(futures):
+			yield future.result()
@@ -0,0 +1,45 @@
+from os import makedirs, path, symlink
+from shutil import copytree, ignore_patterns, rmtree
+from typing import Iterable
+
+# outputs of previous runs that are never copied into a workspace (OpenROAD flow outputs and simulation runs)
+RUN_OUTPUTS = ("objects", "results", "logs", "reports", "run", "__pycache__")
+
+def create_workspace(gen_dir: str, root: str, dirs: Iterable[str], ignore: Iterable[str] = RUN_OUTPUTS) -> str:
+	"""Creates a private workspace for one run of a generator and returns the generator directory of the workspace.
+
+	The flow scripts and platform configurations use paths relative to the generator directory (e.g. `../blocks/` and `../../../common/`), so the workspace mirrors the layout of the OpenFASOC tree:
+	- `<root>/common`: A symlink to the shared common directory (platforms, DRC/LVS setup).
+	- `<root>/generators/<generator>/<dir>`: A private copy of every directory in `dirs`, without the outputs of previous runs.
+
+	The directories that are only read by a run (e.g. `tools`, `models`) do not need to be copied, each generator lists the ones it writes in its `WORKSPACE_DIRS`. The platforms are shared by all the runs through the `common` symlink and are not part of a workspace.
+
+	An existing workspace is replaced, so a new workspace is always clean and generators skip their `make clean`/`make clean_all` step in a workspace: it would also remove files of the shared platforms used by the other runs.
+
+	Arguments:
+	- `gen_dir` (str): The generator directory (e.g. `openfasoc/generators/ldo-gen`).
+	- `root` (str): The root directory of the workspace.
+	- `dirs` (Iterable[str]): The directories of the generator that are written by a run (e.g. `flow`, `blocks`, `src`), relative to `gen_dir`.
+	- `ignore` (Iterable[str]): File and directory names that are not copied.
+	"""
+	gen_dir = path.abspath(gen_dir)
+	root = path.abspath(root)
+	common_dir = path.normpath(path.join(gen_dir, "..", "..", "common"))
+	workspace_gen_dir = path.join(root, "generators", path.basename(gen_dir))
+
+	makedirs(root, exist_ok=True)
+	if not path.lexists(path.join(root, "common")):
+		symlink(common_dir, path.join(root, "common"))
+
+	rmtree(workspace_gen_dir, ignore_errors=True)
+	makedirs(workspace_gen_dir)
+	for directory in dirs:
+		if path.isdir(path.join(gen_dir, directory)):
+			copytree(
+				path.join(gen_dir, directory),
+				path.join(workspace_gen_dir, directory),
+				symlinks=True,
+				ignore=ignore_patterns(*ignore)
+			)
+
+	return workspace_gen_dir
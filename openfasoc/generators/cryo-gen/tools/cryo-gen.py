@@ -10,13 +10,24 @@ import cryo_netlist
 import simulation
 from readparamgen import args, designName
 
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.flow_steps import VERIFICATION_TARGETS, run_make_targets
+from common.simulation_cache import SimulationCache
+from common.workspace import create_workspace
+
+WORKSPACE_DIRS = ["flow", "blocks", "src", "simulation"]
+
 genDir = os.path.join(os.path.dirname(os.path.relpath(__file__)), "../")
+commonDir = genDir + "../../common/"
+platformDir = genDir + "../../common/platforms/" + args.platform + "/"
+if args.workspace:
+    genDir = create_workspace(genDir, args.workspace, WORKSPACE_DIRS) + "/"
+    print("Workspace: " + genDir)
 srcDir = genDir + "src/"
 flowDir = genDir + "flow/"
 designDir = genDir + "designs/src/cryo/"
 simDir = genDir + "simulation/"
-commonDir = genDir + "../../common/"
-platformDir = genDir + "../../common/platforms/" + args.platform + "/"
 
 # ------------------------------------------------------------------------------
 # Clean the workspace
@@ -24,7 +35,7 @@ platformDir = genDir + "../../common/platforms/" + args.platform + "/"
 print("#----------------------------------------------------------------------")
 print("# Cleaning the workspace...")
 print("#----------------------------------------------------------------------")
-if args.clean:
+if args.clean and not args.workspace:
     p = sp.Popen(["make", "clean_all"], cwd=genDir)
     p.wait()
 
@@ -219,27 +230,19 @@ print("#----------------------------------------------------------------------")
 
 time.sleep(2)
 
-p = sp.Popen(
-    ["make", "magic_drc", "PLATFORM_ARG=" + args.platform, "SPICE_FILE=" + spice_file],
-    cwd=flowDir,
-)
-p.wait()
-
-print("#----------------------------------------------------------------------")
-print("# DRC finished")
-print("#----------------------------------------------------------------------")
-
-time.sleep(2)
-
-p = sp.Popen(
-    ["make", "netgen_lvs", "PLATFORM_ARG=" + args.platform, "SPICE_FILE=" + spice_file],
-    cwd=flowDir,
+verification = run_make_targets(
+    VERIFICATION_TARGETS,
+    flowDir,
+    make_args=["PLATFORM_ARG=" + args.platform, "SPICE_FILE=" + spice_file],
+    log_dir=flowDir + "logs/" + args.platform + "/cryo/base/",
 )
-p.wait()
-
+print(verification.report())
+if not verification.ok:
+    print("[Error] DRC or LVS failed. Refer to the logs and reports")
+    exit(1)
 
 print("#----------------------------------------------------------------------")
-print("# LVS finished")
+print("# DRC and LVS finished")
 print("#----------------------------------------------------------------------")
 
 if os.path.isdir(args.outputDir + "/" + args.platform):
@@ -331,20 +334,22 @@ if args.prepex:
     simulation.run_cryo_sim(
         simDir,
         pdks_path + "sky130A/libs.tech/ngspice/sky130.lib.spice",
-        "./../" + flowDir + designName + "_sim.spice",
-        "./../" + platformDir + "cdl/" + pdk_lib_name + ".spice",
+        os.path.abspath(flowDir + designName + "_sim.spice"),
+        os.path.abspath(platformDir + "cdl/" + pdk_lib_name + ".spice"),
         args.platform,
         prepex=True,
+        sim_cache=SimulationCache(enabled=args.sim_cache),
     )
 
 if args.pex:
     simulation.run_cryo_sim(
         simDir,
         pdks_path + "sky130A/libs.tech/ngspice/sky130.lib.spice",
-        "./../" + flowDir + designName + "_pex.spice",
-        "./../" + platformDir + "cdl/" + pdk_lib_name + ".spice",
+        os.path.abspath(flowDir + designName + "_pex.spice"),
+        os.path.abspath(platformDir + "cdl/" + pdk_lib_name + ".spice"),
         args.platform,
         prepex=False,
+        sim_cache=SimulationCache(enabled=args.sim_cache),
     )
 
 print("#----------------------------------------------------------------------")
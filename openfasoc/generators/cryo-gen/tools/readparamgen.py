@@ -35,6 +35,16 @@ parser.add_argument("--nhead", required=False, help="Number of target headers")
 parser.add_argument("--clean", action="store_true", help="Clean the workspace.")
 parser.add_argument("--pex", action="store_true", help="Simulate PEX")
 parser.add_argument("--prepex", action="store_true", help="Simulate pre PEX")
+parser.add_argument(
+    "--no-sim-cache",
+    dest="sim_cache",
+    action="store_false",
+    help="Always simulate instead of restoring unchanged runs from the simulation cache",
+)
+parser.add_argument(
+    "--workspace",
+    help="Run in a private copy of the flow, blocks, src and simulation directories created in this directory, a relative outputDir is created inside it",
+)
 args = parser.parse_args()
 
 
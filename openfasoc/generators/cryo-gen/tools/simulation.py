@@ -1,8 +1,15 @@
+import os
 import re
-import subprocess as sp
+import sys
 
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.simulation_scheduler import SimulationJob, run_jobs
 
-def run_cryo_sim(simDir, lib_path, dut_path, sc_path, platform, prepex) -> None:
+
+def run_cryo_sim(
+    simDir, lib_path, dut_path, sc_path, platform, prepex, sim_cache=None
+) -> None:
     # process 6-stage conv verilog
     with open(simDir + "templates/cryoInst_ngspice.sp", "r") as file:
         filedata = file.read()
@@ -28,7 +35,8 @@ def run_cryo_sim(simDir, lib_path, dut_path, sc_path, platform, prepex) -> None:
         simType = "pex"
         print("Starting Pex simulation")
 
-    p = sp.Popen(
+    job = SimulationJob(
+        "cryoInst_%s" % (simType),
         [
             "ngspice",
             "-b",
@@ -37,5 +45,12 @@ def run_cryo_sim(simDir, lib_path, dut_path, sc_path, platform, prepex) -> None:
             "cryoInst_ngspice.sp",
         ],
         cwd=simDir,
+        netlist="cryoInst_ngspice.sp",
+        outputs=[
+            "cryoInst_%s_sim.log" % (simType),
+            "cryoInst_%s_%s_res.ps" % (platform, simType),
+        ],
     )
-    p.wait()
+    for result in run_jobs([job], cache=sim_cache):
+        if result.cached:
+            print("%s simulation restored from the simulation cache" % (simType))
@@ -12,10 +12,17 @@ import subprocess
 import sys
 import re
 import os  # filesystem manipulation
+import mmap
+import shutil
+import tempfile
+import time
 import datetime
+import hashlib
 import uuid
 import platform
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 
 # Parse and validate arguments
@@ -55,6 +62,42 @@ def parse_args():
     parser.add_argument(
         "--output", "-o", required=False, default="metadata.json", help="Output file"
     )
+    parser.add_argument(
+        "--benchmark",
+        "-b",
+        type=int,
+        metavar="REPEAT",
+        help="Time the extraction with one read per tag and one read per file "
+        "on the logs and reports of the design repeated REPEAT times",
+    )
+    parser.add_argument(
+        "--stamp",
+        "-s",
+        required=False,
+        default=None,
+        help="JSON file keeping the openroad version between runs, it is only "
+        "resolved again when the openroad binary changes",
+    )
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        action="store_true",
+        help="Reuse the output of the last extraction of a design if its logs, "
+        "reports and the openroad version did not change",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Number of designs extracted in parallel. Default: number of CPUs",
+    )
+    parser.add_argument(
+        "--rows",
+        action="store_true",
+        help="One row per design instead of one column per design in the "
+        "summary (metrics.html and metrics.csv)",
+    )
     args = parser.parse_args()
 
     if not os.path.isdir(args.flowPath):
@@ -86,6 +129,7 @@ def extractTagFromFile(
     occurrence=-1,
     defaultNotFound="N/A",
     t=str,
+    scanner=None,
 ):
     if jsonTag in jsonFile:
         print("[WARN] Overwriting Tag", jsonTag)
@@ -93,10 +137,13 @@ def extractTagFromFile(
     # Open file
     try:
         searchFilePath = os.path.join(args.flowPath, file)
-        with open(searchFilePath) as f:
-            content = f.read()
+        if scanner is None:
+            with open(searchFilePath) as f:
+                content = f.read()
 
-        m = re.findall(pattern, content, re.M)
+            m = re.findall(pattern, content, re.M)
+        else:
+            m = scanner.findall(searchFilePath, pattern)
 
         if m:
             if count:
@@ -122,18 +169,227 @@ def extractTagFromFile(
         jsonFile[jsonTag] = "ERR"
 
 
-def extractGnuTime(prefix, file, jsonFile):
-    extractTagFromFile(
+def extractGnuTime(prefix, file, jsonFile, extract=extractTagFromFile):
+    extract(
         prefix + "__runtime__total", jsonFile, "^(\S+)elapsed \S+CPU \S+memKB", file
     )
-    extractTagFromFile(
+    extract(
         prefix + "__cpu__total", jsonFile, "^\S+elapsed (\S+)CPU \S+memKB", file
     )
-    extractTagFromFile(
+    extract(
         prefix + "__mem__peak", jsonFile, "^\S+elapsed \S+CPU (\S+)memKB", file
     )
 
 
+# Single-read extraction
+# =============================================================================
+# The tags of a design come from a few logs and reports, with many patterns
+# per file. A TagScanner collects the tags of a design, then reads every file
+# once and tries each pattern only where its literal prefix (e.g. "Elapsed
+# time:") occurs in the file, which gives the same matches as re.findall
+# without scanning the whole file once per tag.
+
+# files from this size on are memory-mapped instead of read into a string
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+# regular expression syntax, a literal prefix stops at the first one
+REGEX_SPECIAL = ".^$*+?{}[]|()\\"
+
+
+def literalPrefix(pattern):
+    # returns the literal text every match of the pattern starts with ("" if
+    # there is none) and whether the pattern ignores case
+    ignoreCase = pattern.startswith("(?i)")
+    if ignoreCase:
+        pattern = pattern[4:]
+    if pattern.startswith("^"):
+        pattern = pattern[1:]
+    prefix = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            char = pattern[i + 1]
+            end = i + 2
+        elif char in REGEX_SPECIAL:
+            break
+        else:
+            end = i + 1
+        # a quantifier makes the last character optional or repeated
+        if pattern[end : end + 1] in ("*", "+", "?", "{"):
+            break
+        prefix += char
+        i = end
+    # an alternation can match without the prefix
+    escaped = False
+    for char in pattern:
+        if char == "|" and not escaped:
+            return "", ignoreCase
+        escaped = char == "\\" and not escaped
+    # non-ASCII characters may match other characters when the case is ignored
+    if ignoreCase and not prefix.isascii():
+        return "", ignoreCase
+    return prefix, ignoreCase
+
+
+def readContent(path):
+    # returns the content of a file: a string, or a memory map of its bytes
+    # for large ASCII files without carriage returns (the bytes are then the
+    # same as the string read in text mode)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            binary = content.find(b"\r") < 0
+            for start in range(0, len(content), MMAP_THRESHOLD):
+                if not binary:
+                    break
+                binary = content[start : start + MMAP_THRESHOLD].isascii()
+            if binary:
+                return content
+            content.close()
+    with open(path) as f:
+        return f.read()
+
+
+def findallValue(match, binary):
+    # the item re.findall returns for a match
+    groups = match.groups(b"" if binary else "")
+    if binary:
+        groups = tuple(group.decode("ascii") for group in groups)
+    if len(groups) == 0:
+        value = match.group(0)
+        return value.decode("ascii") if binary else value
+    if len(groups) == 1:
+        return groups[0]
+    return groups
+
+
+def findPatterns(content, patterns):
+    # returns {pattern: re.findall(pattern, content, re.M)} for all the patterns
+    binary = not isinstance(content, str)
+    lowered = None
+    positions = {}
+    matches = {}
+    for pattern in patterns:
+        if binary and not pattern.isascii():
+            matches[pattern] = re.findall(pattern, content[:].decode("ascii"), re.M)
+            continue
+        regex = re.compile(pattern.encode("ascii") if binary else pattern, re.M)
+        prefix, ignoreCase = literalPrefix(pattern)
+        if not prefix or (ignoreCase and not binary and not content.isascii()):
+            matches[pattern] = [
+                findallValue(match, binary) for match in regex.finditer(content)
+            ]
+            continue
+
+        # start of every occurrence of the prefix, patterns with the same
+        # prefix share them
+        if (prefix, ignoreCase) not in positions:
+            haystack = content
+            needle = prefix.encode("ascii") if binary else prefix
+            if ignoreCase:
+                if lowered is None:
+                    lowered = content[:].lower()
+                haystack = lowered
+                needle = needle.lower()
+            found = []
+            pos = haystack.find(needle)
+            while pos >= 0:
+                found.append(pos)
+                pos = haystack.find(needle, pos + 1)
+            positions[(prefix, ignoreCase)] = found
+
+        # like re.findall, the next match starts after the end of the last one
+        values = []
+        end = 0
+        for pos in positions[(prefix, ignoreCase)]:
+            if pos < end:
+                continue
+            match = regex.match(content, pos)
+            if match:
+                values.append(findallValue(match, binary))
+                end = match.end()
+        matches[pattern] = values
+    return matches
+
+
+class FileScan:
+    # the patterns searched in one file, the file is read once by the first
+    # findall
+
+    def __init__(self, path):
+        self.path = path
+        self.patterns = []
+        self.matches = None
+        self.error = None
+
+    def register(self, pattern):
+        if pattern not in self.patterns:
+            self.patterns.append(pattern)
+
+    def findall(self, pattern):
+        # same result as re.findall(pattern, <file content>, re.M), raises
+        # IOError if the file can not be read
+        if self.matches is None:
+            self.matches = {}
+            try:
+                content = readContent(self.path)
+            except IOError as error:
+                self.error = error
+            else:
+                try:
+                    self.matches = findPatterns(content, self.patterns)
+                finally:
+                    if not isinstance(content, str):
+                        content.close()
+        if self.error is not None:
+            raise self.error
+        return self.matches[pattern]
+
+
+class TagScanner:
+    # collects the tags of a design, run() extracts all of them with a single
+    # read of every file. With singleRead=False every tag is extracted right
+    # away by reading its file again (kept to compare both in the benchmark)
+
+    def __init__(self, singleRead=True):
+        self.singleRead = singleRead
+        self.files = {}
+        self.tags = []
+
+    def findall(self, path, pattern):
+        return self.files[path].findall(pattern)
+
+    def extractTagFromFile(self, jsonTag, jsonFile, pattern, file, **kwargs):
+        if not self.singleRead:
+            extractTagFromFile(jsonTag, jsonFile, pattern, file, **kwargs)
+            return
+        if jsonTag in jsonFile:
+            print("[WARN] Overwriting Tag", jsonTag)
+        searchFilePath = os.path.join(args.flowPath, file)
+        if searchFilePath not in self.files:
+            self.files[searchFilePath] = FileScan(searchFilePath)
+        self.files[searchFilePath].register(pattern)
+        # keeps the position of the tag in jsonFile until run() sets its value
+        placeholder = object()
+        jsonFile[jsonTag] = placeholder
+        self.tags.append((jsonTag, jsonFile, pattern, file, kwargs, placeholder))
+
+    def extractGnuTime(self, prefix, file, jsonFile):
+        extractGnuTime(prefix, file, jsonFile, extract=self.extractTagFromFile)
+
+    def run(self):
+        # sets the values of the collected tags, a tag written again since it
+        # was collected (e.g. by merge_jsons) keeps the new value
+        for jsonTag, jsonFile, pattern, file, kwargs, placeholder in self.tags:
+            value = {}
+            extractTagFromFile(jsonTag, value, pattern, file, scanner=self, **kwargs)
+            if jsonFile.get(jsonTag) is placeholder:
+                jsonFile[jsonTag] = value[jsonTag]
+        self.files = {}
+        self.tags = []
+
+
 #
 #  Extract clock info from sdc file
 #
@@ -159,25 +415,84 @@ def read_sdc(file_name):
     return clkList
 
 
+# Tool versions
+# ==============================================================================
+# The openroad version is the same for all the designs of a run, so it is
+# resolved once per process (the worker processes get it from the main
+# process). It can also be kept between runs in a JSON stamp file, keyed by the
+# path and modification time of the openroad binary.
+
+flowVersions = {}
+
+
+def file_key(path):
+    # [path, modification time] of a file, None if it does not exist
+    if path is None or not os.path.isfile(path):
+        return None
+    return [os.path.abspath(path), os.path.getmtime(path)]
+
+
+def openroad_version():
+    cmdOutput = subprocess.check_output(["openroad", "-version"])
+    cmdFields = [x.decode("utf-8") for x in cmdOutput.split()]
+    if len(cmdFields) > 1:
+        return [str(cmdFields[0]), str(cmdFields[1])]
+    return [str(cmdFields[0]), "N/A"]
+
+
+def get_flow_versions(stamp=None):
+    # returns the openroad version of the run, 'stamp' is the optional JSON
+    # file it is kept in between runs
+    if flowVersions:
+        return flowVersions
+
+    saved = {}
+    if stamp is not None and os.path.isfile(stamp):
+        try:
+            with open(stamp) as f:
+                saved = json.load(f)
+        except ValueError:
+            print("[WARN] Ignoring the invalid stamp file", stamp)
+
+    key = file_key(shutil.which("openroad"))
+    entry = saved.get("openroad")
+    if key is not None and entry is not None and entry.get("key") == key:
+        flowVersions["openroad"] = entry["value"]
+    else:
+        flowVersions["openroad"] = openroad_version()
+        saved["openroad"] = {"key": key, "value": flowVersions["openroad"]}
+
+    if stamp is not None:
+        # concurrent runs may share the stamp file, it is replaced at once
+        tmpFile = "{}.{}.tmp".format(stamp, os.getpid())
+        with open(tmpFile, "w") as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmpFile, stamp)
+    return flowVersions
+
+
 # Main
 # ==============================================================================
 
 
-def extract_metrics(cwd, platform, design, output):
+def metrics_table(metrics_dict):
+    metrics_df = pd.DataFrame(list(metrics_dict.items()))
+    col_index = metrics_df.iloc[0][1] + "__" + metrics_df.iloc[1][1]
+    metrics_df.columns = ["Metrics", col_index]
+    return metrics_df
+
+
+def extract_metrics(cwd, platform, design, output, singleRead=True):
     logPath = os.path.join(cwd, "logs", platform, design)
     rptPath = os.path.join(cwd, "reports", platform, design)
     resultPath = os.path.join(cwd, "results", platform, design)
+    scanner = TagScanner(singleRead)
 
     metrics_dict = {}
     metrics_dict["run__flow__generate__date"] = now.strftime("%Y-%m-%d %H:%M")
-    cmdOutput = subprocess.check_output(["openroad", "-version"])
-    cmdFields = cmdOutput.split()
-    cmdFields = [x.decode("utf-8") for x in cmdOutput.split()]
-    metrics_dict["run__flow__openroad__version"] = str(cmdFields[0])
-    if len(cmdFields) > 1:
-        metrics_dict["run__flow__openroad__commit"] = str(cmdFields[1])
-    else:
-        metrics_dict["run__flow__openroad__commit"] = "N/A"
+    versions = get_flow_versions(args.stamp)
+    metrics_dict["run__flow__openroad__version"] = versions["openroad"][0]
+    metrics_dict["run__flow__openroad__commit"] = versions["openroad"][1]
     metrics_dict["run__flow__uuid"] = str(uuid.uuid4())
     metrics_dict["run__flow__design"] = design
     metrics_dict["run__flow__platform"] = platform
@@ -185,14 +500,14 @@ def extract_metrics(cwd, platform, design, output):
     # Synthesis
     # ==============================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "synth__area__stdcell__count",
         metrics_dict,
         "Number of cells: +(\S+)",
         rptPath + "/synth_stat.txt",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "synth__area__stdcell__area",
         metrics_dict,
         "Chip area for module.*: +(\S+)",
@@ -209,42 +524,42 @@ def extract_metrics(cwd, platform, design, output):
     # Floorplan
     # ==============================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "floorplan__timing__tns_total",
         metrics_dict,
         "^tns (\S+)",
         logPath + "/2_1_floorplan.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "floorplan__timing__wns__worst",
         metrics_dict,
         "^wns (\S+)",
         logPath + "/2_1_floorplan.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "floorplan__area__stdcell__count",
         metrics_dict,
         "^Design area (\S+) u\^2",
         logPath + "/2_1_floorplan.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "floorplan__area__instance__util",
         metrics_dict,
         "^Design area.* (\S+)% utilization",
         logPath + "/2_1_floorplan.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "floorplan__area__IO__count",
         metrics_dict,
         "Num of I/O +(\d+)",
         logPath + "/3_2_place_iop.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "floorplan__area__macros__count",
         metrics_dict,
         "Extracted # Macros: (\S+)",
@@ -255,126 +570,126 @@ def extract_metrics(cwd, platform, design, output):
     # Place
     # ==============================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "globalplace__area__density__target",
         metrics_dict,
         "TargetDensity: (\S+)",
         logPath + "/3_1_place_gp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "globalplace__area__wirelength__estimate",
         metrics_dict,
         "Total wirelength: (\S+)",
         logPath + "/3_1_place_gp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "globalplace__timing__tns__total",
         metrics_dict,
         "^tns (\S+)",
         logPath + "/3_1_place_gp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "globalplace__timing__wns__worst",
         metrics_dict,
         "^wns (\S+)",
         logPath + "/3_1_place_gp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "placeopt__area__inbuffer__count",
         metrics_dict,
         "Inserted (\d+) input buffers",
         logPath + "/3_3_resizer.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "placeopt__area__outbuffer__count",
         metrics_dict,
         "Inserted (\d+) output buffers",
         logPath + "/3_3_resizer.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "placeopt__area__resize__count",
         metrics_dict,
         "Resized (\d+) instances",
         logPath + "/3_3_resizer.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "placeopt__timing__tns__total",
         metrics_dict,
         "^tns (\S+)",
         logPath + "/3_3_resizer.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "placeopt__timing__wns__worst",
         metrics_dict,
         "^wns (\S+)",
         logPath + "/3_3_resizer.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "placeopt__area__instance__area",
         metrics_dict,
         "^Design area (\S+) u\^2",
         logPath + "/3_3_resizer.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "placeopt__area__instance__util",
         metrics_dict,
         "^Design area.* (\S+)% utilization",
         logPath + "/3_3_resizer.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedplace__timing__tns__total",
         metrics_dict,
         "^tns (\S+)",
         logPath + "/3_4_opendp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedplace__timing__wns__worst",
         metrics_dict,
         "^wns (\S+)",
         logPath + "/3_4_opendp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedplace__inst__displacement__total",
         metrics_dict,
         "total displacement +(\d*\.?\d*)",
         logPath + "/3_4_opendp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedplace__inst__displacement__average",
         metrics_dict,
         "average displacement +(\d*\.?\d*)",
         logPath + "/3_4_opendp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedplace__inst__displacement__max",
         metrics_dict,
         "max displacement +(\d*\.?\d*)",
         logPath + "/3_4_opendp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedplace__wirelength__initial__estimate",
         metrics_dict,
         "original HPWL +(\d*\.?\d*)",
         logPath + "/3_4_opendp.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedplace__wirelength__final__estimate",
         metrics_dict,
         "legalized HPWL +(\d*\.?\d*)",
@@ -384,46 +699,46 @@ def extract_metrics(cwd, platform, design, output):
     # CTS
     # ==============================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "cts__timing__slack__tns", metrics_dict, "^tns (\S+)", logPath + "/4_1_cts.log"
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "cts__timing__slack__wns", metrics_dict, "^wns (\S+)", logPath + "/4_1_cts.log"
     )
 
     # Route
     # ==============================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "globalroute__timing__tns__total",
         metrics_dict,
         "^tns (\S+)",
         logPath + "/5_1_fastroute.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "globalroute__timing__wns__worst",
         metrics_dict,
         "^wns (\S+)",
         logPath + "/5_1_fastroute.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedroute__wirelength",
         metrics_dict,
         "total wire length = +(\S+) um",
         logPath + "/5_2_TritonRoute.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedroute__via__count",
         metrics_dict,
         "total number of vias = +(\S+)",
         logPath + "/5_2_TritonRoute.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedroute__errors__count",
         metrics_dict,
         "(?i)error:",
@@ -432,7 +747,7 @@ def extract_metrics(cwd, platform, design, output):
         defaultNotFound=0,
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "detailedroute__drc__error__count",
         metrics_dict,
         "(?i)violation",
@@ -444,48 +759,50 @@ def extract_metrics(cwd, platform, design, output):
     # Finish
     # ==============================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__power__internal__total",
         metrics_dict,
         "Total +(\S+) +\S+ +\S+ +\S+ +\S+",
         logPath + "/6_report.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__power__switch__total",
         metrics_dict,
         "Total +\S+ +(\S+) +\S+ +\S+ +\S+",
         logPath + "/6_report.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__power__leak__total",
         metrics_dict,
         "Total +\S+ +\S+ +(\S+) +\S+ +\S+",
         logPath + "/6_report.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__power__total",
         metrics_dict,
         "Total +\S+ +\S+ +\S+ +(\S+) +\S+",
         logPath + "/6_report.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__area",
         metrics_dict,
         "^Design area (\S+) u\^2",
         logPath + "/6_report.log",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__util",
         metrics_dict,
         "^Design area.* (\S+)% utilization",
         logPath + "/6_report.log",
     )
 
+    scanner.run()
+
     # Accumulate time
     # ==============================================================================
 
@@ -520,52 +837,243 @@ def extract_metrics(cwd, platform, design, output):
     with open(output, "w") as resultSpecfile:
         json.dump(metrics_dict, resultSpecfile, indent=2)
 
-    metrics_df = pd.DataFrame(list(metrics_dict.items()))
-    col_index = metrics_df.iloc[0][1] + "__" + metrics_df.iloc[1][1]
-    metrics_df.columns = ["Metrics", col_index]
+    metrics_df = metrics_table(metrics_dict)
+
+    return metrics_dict, metrics_df
+
+
+# Incremental extraction
+# ==============================================================================
+# With --incremental, the metrics of a design are only extracted again when its
+# logs, reports or the openroad version changed. A
+# manifest next to the output records the path, size, modification time and
+# hash of every input file, files whose size and modification time did not
+# change are not hashed again.
+
+
+def manifest_file(output):
+    return os.path.splitext(output)[0] + "-manifest.json"
+
+
+def file_state(path, previous=None):
+    # [path, size, modification time, sha256] of a file, the hash is taken
+    # from the previous state if the size and modification time are the same
+    stat = os.stat(path)
+    if previous is not None and previous[1:3] == [stat.st_size, stat.st_mtime]:
+        return [path, stat.st_size, stat.st_mtime, previous[3]]
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return [path, stat.st_size, stat.st_mtime, sha.hexdigest()]
+
+
+def same_content(states, previousStates):
+    # the paths, sizes and hashes are the same (the files may have been touched)
+    return [(x[0], x[1], x[3]) for x in states] == [
+        (x[0], x[1], x[3]) for x in previousStates
+    ]
+
+
+def design_inputs(logPath, rptPath, resultPath, output):
+    # the files extract_metrics may read: all the files of the log and report
+    # directories of the design (a new file can change the metrics) and the SDC
+    skip = [os.path.abspath(output), os.path.abspath(manifest_file(output))]
+    paths = []
+    for dirPath in [logPath, rptPath]:
+        if not os.path.isdir(dirPath):
+            continue
+        for name in sorted(os.listdir(dirPath)):
+            path = os.path.join(dirPath, name)
+            if os.path.isfile(path) and os.path.abspath(path) not in skip:
+                paths.append(path)
+    sdc = os.path.join(resultPath, "2_floorplan.sdc")
+    if os.path.isfile(sdc):
+        paths.append(sdc)
+    return paths
+
+
+def extract_metrics_incremental(cwd, platform, design, output):
+    # same as extract_metrics, the metrics written to output by the last
+    # extraction are reused if nothing changed since then
+    logPath = os.path.join(cwd, "logs", platform, design)
+    rptPath = os.path.join(cwd, "reports", platform, design)
+    resultPath = os.path.join(cwd, "results", platform, design)
+    manifestFile = manifest_file(output)
+    options = {"versions": get_flow_versions(args.stamp)}
+
+    previous = None
+    try:
+        with open(manifestFile) as f:
+            previous = json.load(f)
+    except (IOError, ValueError):
+        pass
+    previousInputs = {}
+    if previous is not None:
+        previousInputs = {state[0]: state for state in previous["inputs"]}
+    inputs = [
+        file_state(path, previousInputs.get(path))
+        for path in design_inputs(logPath, rptPath, resultPath, output)
+    ]
+
+    if (
+        previous is not None
+        and previous["options"] == options
+        and same_content(inputs, previous["inputs"])
+        and os.path.isfile(output)
+        and same_content(
+            [file_state(output, previous["output"])], [previous["output"]]
+        )
+    ):
+        print("[INFO] Inputs of {} unchanged, reusing {}".format(design, output))
+        with open(output) as f:
+            metrics_dict = json.load(f)
+        metrics_df = metrics_table(metrics_dict)
+        manifest = previous
+    else:
+        manifest = {"options": options}
+        metrics_dict, metrics_df = extract_metrics(cwd, platform, design, output)
+
+    # the states of touched files are updated, they are not hashed next time
+    manifest["inputs"] = inputs
+    manifest["output"] = file_state(output)
+    with open(manifestFile, "w") as f:
+        json.dump(manifest, f, indent=2)
 
     return metrics_dict, metrics_df
 
 
-args = parse_args()
-now = datetime.datetime.now()
-
-if args.design == "all_designs":
-    print("List of designs")
-    rootdir = "./logs"
-
-    all_metrics_df = pd.DataFrame()
-    all_metrics = []
-
-    cwd = os.getcwd()
-    for platform_it in os.scandir(rootdir):
-        if platform_it.is_dir():
-            plt = platform_it.name
-            for design_it in os.scandir(platform_it.path):
-                if design_it.is_dir():
-                    des = design_it.name
-                    print(plt, des)
-                    design_metrics, design_metrics_df = extract_metrics(
-                        cwd,
-                        plt,
-                        des,
-                        os.path.join(".", "reports", plt, des, "metrics.json"),
-                    )
-                    all_metrics.append(design_metrics)
-                    if all_metrics_df.shape[0] == 0:
-                        all_metrics_df = design_metrics_df
-                    else:
-                        all_metrics_df = all_metrics_df.merge(
-                            design_metrics_df, on="Metrics", how="inner"
-                        )
-    #
-    # render to html
-    #
-    metrics_html = all_metrics_df.to_html()
-    metrics_html_file = open("metrics.html", "w")
-    metrics_html_file.write(metrics_html)
-    metrics_html_file.close()
-else:
-    metrics_dict, metrics_df = extract_metrics(
-        args.flowPath, args.platform, args.design, args.output
+def benchmark(cwd, platform, design, repeat):
+    # times extract_metrics with one read per tag and with one read per file on
+    # a copy of the logs and reports of a design whose content is repeated
+    # 'repeat' times, and checks that both give the same metadata
+    times = {}
+    metadata = {}
+    with tempfile.TemporaryDirectory() as tmpDir:
+        size = 0
+        for dirName in ["logs", "reports", "results"]:
+            src = os.path.join(cwd, dirName, platform, design)
+            dst = os.path.join(tmpDir, dirName, platform, design)
+            if not os.path.isdir(src):
+                continue
+            shutil.copytree(src, dst)
+            if dirName == "results":
+                continue
+            for name in os.listdir(dst):
+                path = os.path.join(dst, name)
+                if not os.path.isfile(path) or path.endswith(".json"):
+                    continue
+                with open(path) as f:
+                    content = f.read()
+                with open(path, "w") as f:
+                    f.write(content * repeat)
+                size += len(content) * repeat
+
+        for singleRead in [False, True]:
+            output = os.path.join(tmpDir, "metadata_{}.json".format(singleRead))
+            start = time.perf_counter()
+            extract_metrics(tmpDir, platform, design, output, singleRead)
+            times[singleRead] = time.perf_counter() - start
+            with open(output) as f:
+                metrics = json.load(f)
+            # the only metrics that change from one run to the other
+            for key in ["run__flow__uuid", "run__flow__generate__date"]:
+                metrics.pop(key, None)
+            metadata[singleRead] = list(metrics.items())
+
+    print(
+        "[INFO] {:.1f} MB of logs and reports:".format(size / 1e6),
+        "{:.3f} s with one read per tag,".format(times[False]),
+        "{:.3f} s with one read per file ({:.1f}x)".format(
+            times[True], times[False] / times[True]
+        ),
     )
+    if metadata[False] != metadata[True]:
+        print("[ERROR] The metadata of both extractions is different")
+        sys.exit(1)
+
+
+def init_worker(mainArgs, mainNow, mainVersions):
+    # the worker processes extract the metrics with the arguments, the date and
+    # the openroad version of the main process
+    global args, now
+    args = mainArgs
+    now = mainNow
+    flowVersions.update(mainVersions)
+
+
+def extract_design_metrics(cwd, design):
+    # extracts the metrics of one (platform, design) in a worker process, they
+    # are also written to the metrics.json of the design
+    plt, des = design
+    file = os.path.join(".", "reports", plt, des, "metrics.json")
+    if args.incremental:
+        return extract_metrics_incremental(cwd, plt, des, file)
+    return extract_metrics(cwd, plt, des, file)
+
+
+def summary_table(designs, dfs, rows):
+    # one column per design with the metrics found in all the designs, or one
+    # row per design with all the metrics (for sweeps of many designs). The
+    # column of every design is named after the design, the column names of
+    # extract_metrics (date and version) are the same for all of them
+    if not dfs:
+        return pd.DataFrame()
+    columns = [
+        df.set_index("Metrics").iloc[:, 0].rename("__".join(design))
+        for design, df in zip(designs, dfs)
+    ]
+    if rows:
+        table = pd.DataFrame(columns)
+        table.index = pd.MultiIndex.from_tuples(designs, names=["platform", "design"])
+        return table
+    table = pd.concat(columns, axis=1, join="inner")
+    return table.rename_axis("Metrics").reset_index()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    now = datetime.datetime.now()
+
+    if args.benchmark:
+        benchmark(args.flowPath, args.platform, args.design, args.benchmark)
+    elif args.design == "all_designs":
+        print("List of designs")
+        rootdir = "./logs"
+
+        cwd = os.getcwd()
+        found = []
+        for platform_it in os.scandir(rootdir):
+            if platform_it.is_dir():
+                plt = platform_it.name
+                for design_it in os.scandir(platform_it.path):
+                    if design_it.is_dir():
+                        des = design_it.name
+                        print(plt, des)
+                        found.append((plt, des))
+
+        # the designs are independent, the summary is built once all of them
+        # are extracted
+        with ProcessPoolExecutor(
+            max_workers=args.jobs,
+            initializer=init_worker,
+            initargs=(args, now, get_flow_versions(args.stamp)),
+        ) as pool:
+            results = list(pool.map(extract_design_metrics, repeat(cwd), found))
+        all_metrics_df = summary_table(
+            found, [df for metrics, df in results], args.rows
+        )
+        #
+        # render to html
+        #
+        metrics_html = all_metrics_df.to_html()
+        metrics_html_file = open("metrics.html", "w")
+        metrics_html_file.write(metrics_html)
+        metrics_html_file.close()
+        if args.rows:
+            all_metrics_df.to_csv("metrics.csv")
+    else:
+        extract = extract_metrics_incremental if args.incremental else extract_metrics
+        metrics_dict, metrics_df = extract(
+            args.flowPath, args.platform, args.design, args.output
+        )
@@ -19,14 +19,24 @@ import time
 # designName is from the json Specfile, args is commandline args, jsonSpec is parsed json Specfile
 from readparamgen import designName, args, jsonSpec
 
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.flow_steps import VERIFICATION_TARGETS, run_make_targets
+from common.workspace import create_workspace
+
+WORKSPACE_DIRS = ["flow", "blocks", "src", "simulations"]
+
 # paths declaration
 genDir = os.path.join(os.path.dirname(os.path.relpath(__file__)), "../")
+commonDir = genDir + "../../common/"
+platformDir = genDir + "../../common/platforms/" + args.platform + "/"
+if args.workspace:
+    genDir = create_workspace(genDir, args.workspace, WORKSPACE_DIRS) + "/"
+    print("Workspace: " + genDir)
 srcDir = genDir + "src/"
 flowDir = genDir + "flow/"
 designDir = genDir + "designs/src/dcdc/"
 simDir = genDir + "simulations/"
-commonDir = genDir + "../../common/"
-platformDir = genDir + "../../common/platforms/" + args.platform + "/"
 
 # ------------------------------------------------------------------------------
 # Clean the workspace
@@ -34,7 +44,7 @@ platformDir = genDir + "../../common/platforms/" + args.platform + "/"
 print("#----------------------------------------------------------------------")
 print("# Cleaning the workspace...")
 print("#----------------------------------------------------------------------")
-if args.clean:
+if args.clean and not args.workspace:
     p = sp.Popen(["make", "clean_all"], cwd=genDir)
     p.wait()
 
@@ -225,21 +235,18 @@ print("#----------------------------------------------------------------------")
 
 time.sleep(2)
 
-p = sp.Popen(["make", "magic_drc"], cwd=flowDir)
-p.wait()
-
-print("#----------------------------------------------------------------------")
-print("# DRC finished")
-print("#----------------------------------------------------------------------")
-
-time.sleep(2)
-
-p = sp.Popen(["make", "netgen_lvs"], cwd=flowDir)
-p.wait()
-
+verification = run_make_targets(
+    VERIFICATION_TARGETS,
+    flowDir,
+    log_dir=flowDir + "logs/" + args.platform + "/dcdc/base/",
+)
+print(verification.report())
+if not verification.ok:
+    print("[Error] DRC or LVS failed. Refer to the logs and reports")
+    exit(1)
 
 print("#----------------------------------------------------------------------")
-print("# LVS finished")
+print("# DRC and LVS finished")
 print("#----------------------------------------------------------------------")
 
 if os.path.isdir(args.outputDir):
@@ -48,6 +48,10 @@ parser.add_argument(
     help="Specify the outputs to be generated: verilog, macro, full (includes PEX extraction)",
 )
 parser.add_argument("--clean", action="store_true", help="Clean the workspace.")
+parser.add_argument(
+    "--workspace",
+    help="Run in a private copy of the flow, blocks and src directories created in this directory, a relative outputDir is created inside it",
+)
 args = parser.parse_args()
 
 
@@ -25,11 +25,15 @@ Parameter sweeping:
 """
 
 import argparse
+import hashlib
 import json
 import os
 from os.path import abspath
 import re
+import shlex
+import shutil
 import sys
+import time
 from datetime import datetime
 from multiprocessing import cpu_count
 from subprocess import run
@@ -58,6 +62,45 @@ ORFS_URL = "https://github.com/The-OpenROAD-Project/OpenROAD-flow-scripts"
 FASTROUTE_TCL = "fastroute.tcl"
 CONSTRAINTS_SDC = "constraint.sdc"
 METRIC = "minimum"
+# Flow stages in execution order, with the result file that marks each one as
+# complete and the file name prefixes it writes to the results, logs and
+# reports folders.
+STAGES = ["synth", "floorplan", "place", "cts", "route", "finish"]
+STAGE_RESULTS = {
+    "synth": "1_synth.v",
+    "floorplan": "2_floorplan.odb",
+    "place": "3_place.odb",
+    "cts": "4_cts.odb",
+    "route": "5_route.odb",
+}
+STAGE_FILES = {
+    "synth": ("1_", "synth_"),
+    "floorplan": ("2_",),
+    "place": ("3_",),
+    "cts": ("4_",),
+    "route": ("5_", "route.guide", "output_guide.mod", "updated_clks.sdc"),
+    "finish": ("6_",),
+}
+# Earliest stage affected by each tunable parameter, matched by prefix in
+# order. Unknown parameters are assumed to affect synthesis.
+STAGE_PARAMETERS = [
+    ("_SDC_", "synth"),
+    ("_SYNTH_", "synth"),
+    ("ABC_", "synth"),
+    ("SYNTH_", "synth"),
+    ("CORE_", "floorplan"),
+    ("DIE_AREA", "floorplan"),
+    ("_PINS_DISTANCE", "floorplan"),
+    ("PLACE_DENSITY", "place"),
+    ("CELL_PAD_IN_SITES_", "place"),
+    ("GPL_", "place"),
+    ("CTS_", "cts"),
+    ("_FR_", "route"),
+    ("GRT_", "route"),
+    ("DRT_", "route"),
+]
+STAGE_CACHE = "stage-cache"
+RESULT_CACHE = "results-cache"
 
 
 class AutoTunerBase(tune.Trainable):
@@ -75,6 +118,7 @@ class AutoTunerBase(tune.Trainable):
         repo_dir = os.getcwd() + "/../" * 6
         self.repo_dir = abspath(repo_dir)
         self.parameters = parse_config(config, path=os.getcwd())
+        self.config = config
         self.step_ = 0
         self.variant = f"variant-{self.__class__.__name__}-{self.trial_id}-or"
 
@@ -82,7 +126,9 @@ class AutoTunerBase(tune.Trainable):
         """
         Run step experiment and compute its score.
         """
-        metrics_file = openroad(self.repo_dir, self.parameters, self.variant)
+        metrics_file = openroad(
+            self.repo_dir, self.parameters, self.variant, config=self.config
+        )
         self.step_ += 1
         score = self.evaluate(self.read_metrics(metrics_file))
         # Feed the score back to Tune.
@@ -430,6 +476,7 @@ def run_command(cmd, timeout=None, stderr_file=None, stdout_file=None, fail_fast
     """
     Wrapper for subprocess.run
     Allows to run shell command, control print and exceptions.
+    Returns the exit status of the command.
     """
     process = run(
         cmd, timeout=timeout, capture_output=True, text=True, check=False, shell=True
@@ -448,17 +495,170 @@ def run_command(cmd, timeout=None, stderr_file=None, stdout_file=None, fail_fast
     if fail_fast and process.returncode != 0:
         raise RuntimeError
 
+    return process.returncode
+
+
+def result_key(base_dir, parameters):
+    """
+    Canonical hash of the design config.mk, the make variables of a trial and
+    the contents of the SDC and FastRoute files they render.
+    """
+    variables = []
+    for variable in shlex.split(parameters):
+        name, _, value = variable.partition("=")
+        if name in ["SDC_FILE", "FASTROUTE_TCL"]:
+            # Files live in the trial folder, only their contents matter.
+            with open(value) as file:
+                value = file.read()
+        else:
+            # Samples that only differ in float formatting are the same run.
+            try:
+                value = f"{float(value):.12g}"
+            except ValueError:
+                pass
+        variables.append([name, value])
+    design_config = f"{base_dir}/flow/designs/{args.platform}/{args.design}"
+    with open(f"{design_config}/config.mk") as file:
+        design_config = file.read()
+    content = {
+        "platform": args.platform,
+        "design": args.design,
+        "config": design_config,
+        "variables": sorted(variables),
+    }
+    content = json.dumps(content, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def parameter_stage(name):
+    """
+    Index of the earliest flow stage affected by a tunable parameter.
+    """
+    for prefix, stage in STAGE_PARAMETERS:
+        if name.startswith(prefix):
+            return STAGES.index(stage)
+    return 0
+
+
+def stage_keys(config):
+    """
+    Content-addressed key of each reusable stage, computed from the subset of
+    parameters that affect the stage or any stage upstream of it.
+    """
+    keys = []
+    for index, stage in enumerate(STAGES[:-1]):
+        subset = {
+            key: value
+            for key, value in config.items()
+            if parameter_stage(key) <= index
+        }
+        content = {
+            "platform": args.platform,
+            "design": args.design,
+            "stage": stage,
+            "parameters": subset,
+        }
+        if any(key.startswith("_SDC_") for key in subset):
+            content["sdc"] = SDC_ORIGINAL
+        if any(key.startswith("_FR_") for key in subset):
+            content["fast_route"] = FR_ORIGINAL
+        content = json.dumps(content, sort_keys=True, default=str)
+        keys.append(hashlib.sha256(content.encode()).hexdigest())
+    return keys
+
+
+def stage_files(stage, folders):
+    """
+    List the files a stage writes as (folder name, relative path) pairs.
+    """
+    files = []
+    for name in ["results", "logs", "reports"]:
+        if not os.path.isdir(folders[name]):
+            continue
+        for file_name in sorted(os.listdir(folders[name])):
+            path = os.path.join(folders[name], file_name)
+            if file_name.startswith(STAGE_FILES[stage]) and os.path.isfile(path):
+                files.append((name, file_name))
+    # Synthesis also depends on the libraries prepared in the objects folder.
+    if stage == STAGES[0]:
+        for root, _, file_names in os.walk(os.path.join(folders["objects"], "lib")):
+            for file_name in sorted(file_names):
+                path = os.path.join(root, file_name)
+                files.append(("objects", os.path.relpath(path, folders["objects"])))
+    return files
+
+
+def entry_folders(path):
+    """
+    Folders of a flow variant, or of a stage cache entry.
+    """
+    return {
+        name: os.path.join(path, name)
+        for name in ["results", "logs", "reports", "objects"]
+    }
+
+
+def restore_stages(cache_dir, keys, folders):
+    """
+    Clone the longest cached prefix of stages into the trial folders.
+    Returns the number of stages restored.
+    """
+    restored = []
+    for index in range(len(keys)):
+        entry = os.path.join(cache_dir, f"{STAGES[index]}-{keys[index]}")
+        if not os.path.isdir(entry):
+            break
+        for name, file_name in stage_files(STAGES[index], entry_folders(entry)):
+            source = os.path.join(entry, name, file_name)
+            target = os.path.join(folders[name], file_name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
+            restored.append((index, os.path.getmtime(source), target))
+    # Stages may come from different trials, so rewrite the timestamps in stage
+    # and original order to keep make from rebuilding the restored targets.
+    step = 0.01
+    stamp = time.time() - step * len(restored)
+    for _, _, target in sorted(restored):
+        stamp += step
+        os.utime(target, (stamp, stamp))
+    return len({index for index, _, _ in restored})
+
+
+def save_stages(cache_dir, keys, folders):
+    """
+    Store the completed stages of a trial that are not cached yet.
+    """
+    for index, stage in enumerate(STAGES[:-1]):
+        entry = os.path.join(cache_dir, f"{stage}-{keys[index]}")
+        result = os.path.join(folders["results"], STAGE_RESULTS[stage])
+        if os.path.isdir(entry) or not os.path.isfile(result):
+            continue
+        temp = f"{entry}.{uuid()}"
+        for name, file_name in stage_files(stage, folders):
+            target = os.path.join(temp, name, file_name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(folders[name], file_name), target)
+        try:
+            os.rename(temp, entry)
+        except OSError:
+            # Another trial stored the same stage first.
+            shutil.rmtree(temp, ignore_errors=True)
+
 
 @ray.remote
 def openroad_distributed(repo_dir, config, path):
     """Simple wrapper to run openroad distributed with Ray."""
-    config = parse_config(config)
-    openroad(repo_dir, config, str(uuid()), path=path)
+    parameters = parse_config(config)
+    openroad(repo_dir, parameters, str(uuid()), path=path, config=config)
 
 
-def openroad(base_dir, parameters, flow_variant, path=""):
+def openroad(base_dir, parameters, flow_variant, path="", config=None):
     """
     Run OpenROAD-flow-scripts with a given set of parameters.
+    When the tunable `config` is given, stages whose parameters match a
+    previous trial are cloned from the stage cache instead of being re-run.
+    Trials that render the same files as a previous run, in this or any
+    earlier experiment, return the cached metrics without running the flow.
     """
     # Make sure path ends in a slash, i.e., is a folder
     flow_variant = f"{args.experiment}/{flow_variant}"
@@ -475,30 +675,66 @@ def openroad(base_dir, parameters, flow_variant, path=""):
     export_command += f":{INSTALL_PATH}/LSOracle/bin:$PATH"
     export_command += " && "
 
+    design_dir = f"{args.platform}/{args.design}"
+    metrics_file = os.path.join(report_path, "metrics.json")
+    result_file = None
+    if not args.no_result_reuse:
+        result_file = f"{base_dir}/flow/logs/{design_dir}/{RESULT_CACHE}/"
+        result_file += f"{result_key(base_dir, parameters)}.json"
+        if os.path.isfile(result_file):
+            print(f"[INFO TUN-0017] Reusing cached metrics for {flow_variant}.")
+            shutil.copyfile(result_file, metrics_file)
+            return metrics_file
+
+    keys = None
+    if config is not None and not args.no_stage_reuse:
+        cache_dir = f"{base_dir}/flow/logs/{design_dir}/{args.experiment}"
+        cache_dir += f"/{STAGE_CACHE}"
+        folders = {
+            name: f"{base_dir}/flow/{name}/{design_dir}/{flow_variant}"
+            for name in ["results", "logs", "reports", "objects"]
+        }
+        keys = stage_keys(config)
+        restored = restore_stages(cache_dir, keys, folders)
+        if restored > 0:
+            print(
+                f"[INFO TUN-0016] Reusing cached {', '.join(STAGES[:restored])}"
+                f" results for {flow_variant}."
+            )
+
     make_command = export_command
     make_command += f"make -C {base_dir}/flow DESIGN_CONFIG=designs/"
     make_command += f"{args.platform}/{args.design}/config.mk"
     make_command += f" FLOW_VARIANT={flow_variant} {parameters}"
     make_command += f" NPROC={args.openroad_threads} SHELL=bash"
-    run_command(
+    status = run_command(
         make_command,
         timeout=args.timeout,
         stderr_file=f"{log_path}error-make-finish.log",
         stdout_file=f"{log_path}make-finish-stdout.log",
     )
+    if keys is not None:
+        save_stages(cache_dir, keys, folders)
 
-    metrics_file = os.path.join(report_path, "metrics.json")
     metrics_command = export_command
     metrics_command += f"{base_dir}/flow/util/genMetrics.py -x"
     metrics_command += f" -v {flow_variant}"
     metrics_command += f" -d {args.design}"
     metrics_command += f" -p {args.platform}"
     metrics_command += f" -o {metrics_file}"
+    # the trials share the openroad version and git commits of the metrics
+    metrics_command += f" -s {base_dir}/flow/logs/metrics-versions.json"
     run_command(
         metrics_command,
         stderr_file=f"{log_path}error-metrics.log",
         stdout_file=f"{log_path}metrics-stdout.log",
     )
+    # Only successful runs are stored, failures may be transient.
+    if result_file is not None and status == 0 and os.path.isfile(metrics_file):
+        os.makedirs(os.path.dirname(result_file), exist_ok=True)
+        temp = f"{result_file}.{uuid()}"
+        shutil.copyfile(metrics_file, temp)
+        os.replace(temp, result_file)
 
     return metrics_file
 
@@ -606,6 +842,20 @@ def parse_arguments():
     tune_parser.add_argument(
         "--resume", action="store_true", help="Resume previous run."
     )
+    parser.add_argument(
+        "--no_stage_reuse",
+        action="store_true",
+        help="Run every flow stage of each trial instead of cloning the"
+        " results of stages upstream of the tuned parameters from previous"
+        " trials.",
+    )
+    parser.add_argument(
+        "--no_result_reuse",
+        action="store_true",
+        help="Run the flow for every trial instead of returning the metrics"
+        " of a previous run with the same rendered configuration, e.g., after"
+        " changing the design sources.",
+    )
 
     # Setup
     parser.add_argument(
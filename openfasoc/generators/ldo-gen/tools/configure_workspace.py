@@ -27,9 +27,15 @@ def check_JSON(JSON_to_check):
     return jsonModel
 
 
-def get_directories():
-    """Returns a hash table containing all neccessary dirs used in ldo-gen"""
-    genDir = os.path.join(os.path.dirname(os.path.relpath(__file__)), "../")
+def get_directories(genDir=None):
+    """Returns a hash table containing all neccessary dirs used in ldo-gen
+    genDir defaults to the ldo-gen directory, a workspace generator directory gives the dirs of the workspace
+    the tools and models are only read by a run, they always come from the ldo-gen directory"""
+    toolsDir = os.path.dirname(os.path.abspath(__file__)) + "/"
+    if genDir is None:
+        genDir = os.path.join(os.path.dirname(os.path.relpath(__file__)), "../")
+    else:
+        genDir = os.path.join(genDir, "")
     directories = dict()
     directories["genDir"] = genDir + "/"
     directories["flowDir"] = os.path.abspath(genDir + "flow/") + "/"
@@ -37,9 +43,9 @@ def get_directories():
     directories["verilogDir"] = os.path.abspath(genDir + "src/") + "/"
     directories["blocksDir"] = os.path.abspath(genDir + "blocks/sky130hvl/") + "/"
     directories["commonDir"] = os.path.abspath(genDir + "../../common/") + "/"
-    directories["supportedInputs"] = os.path.abspath(
-        genDir + "tools/supported_inputs.json"
-    )
+    directories["toolsDir"] = toolsDir
+    directories["modelsDir"] = os.path.abspath(toolsDir + "../models/") + "/"
+    directories["supportedInputs"] = toolsDir + "supported_inputs.json"
     directories["objDir"] = (
         os.path.abspath(genDir + "flow/objects/sky130hvl/ldo/base/") + "/"
     )
@@ -269,7 +275,7 @@ def get_setup_pdk(jsonConfig, commonDir):
 
 def copy_outputs(directories, relativeOutputDir, platform, designName):
     """Copies all final files to the work directory."""
-    outputDir = directories["genDir"] + relativeOutputDir
+    outputDir = os.path.join(directories["genDir"], relativeOutputDir)
     shutil.copyfile(
         directories["flowDir"] + "results/" + platform + "/ldo/base/6_final.gds",
         outputDir + "/" + designName + ".gds",
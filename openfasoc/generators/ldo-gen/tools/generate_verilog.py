@@ -123,3 +123,18 @@ def update_area_and_place_density(flowDir, arrSize):
     )
     with open(flowDir + "design/sky130hvl/ldo/config.mk", "w") as config:
         config.write(config_template)
+
+
+def generate_design(directories, outputDir, designName, arrSize):
+    """Writes the flow inputs (blocks, config.mk) and the behavioral verilog of an LDO with arrSize pt unit cells."""
+    # Update the ldo_domain_insts.txt as per power transistor array size
+    update_ldo_domain_insts(directories["blocksDir"], arrSize)
+    # Update the ldo_place.txt as per power transistor array size
+    update_ldo_place_insts(directories["blocksDir"], arrSize)
+    # Update connections to VREG
+    update_custom_nets(directories["blocksDir"], arrSize)
+    # Update place density according to power transistor array size
+    update_area_and_place_density(directories["flowDir"], arrSize)
+    # Generate the Behavioral Verilog
+    generate_LDO_verilog(directories, outputDir, designName, arrSize)
+    generate_controller_verilog(directories, outputDir, arrSize)
@@ -9,8 +9,18 @@ import subprocess as sp
 
 from configure_workspace import *
 from generate_verilog import *
+from ldo_planner import SizingModel
 from simulations import *
 
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.flow_steps import VERIFICATION_TARGETS, run_make_targets
+from common.simulation_cache import SimulationCache
+from common.simulation_scheduler import default_max_jobs, run_jobs
+from common.workspace import create_workspace
+
+WORKSPACE_DIRS = ["flow", "blocks", "src", "simulations"]
+
 print("#---------------------------------------------------------------------")
 print("# Parsing command line arguments...")
 print("#---------------------------------------------------------------------")
@@ -44,6 +54,35 @@ parser.add_argument(
 parser.add_argument("--clean", action="store_true", help="Clean the workspace.")
 parser.add_argument("--simtype",choices=["postPEX","prePEX"], help="Simulations type prePEX or postPEX")
 parser.add_argument("--pex", help="enable postPEX along with prePEX")
+parser.add_argument(
+    "--jobs",
+    type=int,
+    default=None,
+    help="Maximum number of concurrent simulations. Default: number of CPUs.",
+)
+parser.add_argument(
+    "--sim_timeout",
+    type=float,
+    default=None,
+    help="Timeout in seconds of a single simulation run. Default: no timeout.",
+)
+parser.add_argument(
+    "--no-sim-cache",
+    dest="sim_cache",
+    action="store_false",
+    help="Always run the simulations instead of restoring identical runs from the simulation cache.",
+)
+parser.add_argument(
+    "--sim_retries",
+    type=int,
+    default=1,
+    help="Number of times a crashed simulation is re-run. Default: 1.",
+)
+parser.add_argument(
+    "--workspace",
+    help="Run in a private copy of the flow, blocks, src and simulations directories created in this directory, "
+    "so that several runs can share the host. A relative outputDir is created inside the workspace.",
+)
 args = parser.parse_args()
 
 
@@ -52,10 +91,17 @@ print("# Configuring Workspace")
 print("#---------------------------------------------------------------------")
 # directories is a hash table containing all neccessary dirs
 # genDir, flowDir, simDir, verilogDir, blocksDir, commonDir, supportedInputs
-directories = get_directories()
 clean_work_dir = args.mode != "sim" and args.mode != "dump" and args.mode != "post"
-if clean_work_dir:
-    sp.Popen(["make", "clean"], cwd=directories["genDir"]).wait()
+if args.workspace:
+    directories = get_directories(
+        create_workspace(get_directories()["genDir"], args.workspace, WORKSPACE_DIRS)
+    )
+    args.outputDir = os.path.join(directories["genDir"], args.outputDir)
+    print('Workspace - "' + directories["genDir"] + '"')
+else:
+    directories = get_directories()
+    if clean_work_dir:
+        sp.Popen(["make", "clean"], cwd=directories["genDir"]).wait()
 # misc command line error checks
 JSON_spec = check_args(args, clean_work_dir)
 # user_specs is a hash table containing user defined specs
@@ -70,7 +116,7 @@ jsonConfig = get_config(args.mode, directories["genDir"])
 # copies LVS/DRC files to common dir from pdk and performs error checking on pdk path provided
 pdk_path = get_setup_pdk(jsonConfig, directories["commonDir"])
 # set model file to the one in the repo
-model_file = directories["genDir"] + "models/model.json"
+model_file = directories["modelsDir"] + "model.json"
 jsonModel = check_JSON(model_file)
 # print config info
 print("Config:")
@@ -87,33 +133,24 @@ if args.mode != "sim":
     print("# Generating Verilog")
     print("#----------------------------------------------------------------------")
 # find number of required PT unit cells to meet spec (based on model file)
+sizingModel = SizingModel.from_json(jsonModel)
 if args.arr_size_in is None:
-    arrSize = polynomial_output_at_point_from_coefficients(
-        jsonModel["Iload,max"][str(user_specs["vin"])], 1.3 * user_specs["imax"]
-    )
+    arrSize = sizingModel.arr_size(user_specs["vin"], user_specs["imax"])
+    if math.isnan(arrSize):
+        print("Error: vin = " + str(user_specs["vin"]) + " is not in the model file.")
+        sys.exit(1)
 else:
-    arrSize = int(args.arr_size_in)
+    arrSize = args.arr_size_in
 # convert from float to int and round up (to meet spec, at least arrSize PMOS are required)
-arrSize = int(math.ceil(arrSize))
+arrSize = int(math.ceil(float(arrSize)))
 print("# LDO - Power Transistor array Size = " + str(arrSize))
 
-# Update the ldo_domain_insts.txt as per power transistor array size
-update_ldo_domain_insts(directories["blocksDir"], arrSize)
-#Update the ldo_place.txt as per power transistor array size
-update_ldo_place_insts(directories["blocksDir"], arrSize)
-# Update connections to VREG
-update_custom_nets(directories["blocksDir"], arrSize)
-
 # Get the estimate of the area based on power transistor array size
-designArea = polynomial_output_at_point_from_coefficients(jsonModel["area"], arrSize)
+designArea = float(sizingModel.area(arrSize))
 print("# LDO - Design Area = " + str(designArea) + " um^2")
 
-# Update place density according to power transistor array size
-update_area_and_place_density(directories["flowDir"], arrSize)
-
-# Generate the Behavioral Verilog
-generate_LDO_verilog(directories, args.outputDir, user_specs["designName"], arrSize)
-generate_controller_verilog(directories, args.outputDir, arrSize)
+# Write the flow inputs and generate the Behavioral Verilog
+generate_design(directories, args.outputDir, user_specs["designName"], arrSize)
 if clean_work_dir:
     print("# LDO - Behavioural Verilog Generated")
     print("#----------------------------------------------------------------------")
@@ -135,21 +172,19 @@ if args.mode != "verilog" and clean_work_dir:
         exit(1)
 
     print("#----------------------------------------------------------------------")
-    print("# Run DRC")
-    print("#----------------------------------------------------------------------")
-    # TODO: look at drc after this PR
-    p = sp.Popen(["make", "magic_drc"], cwd=directories["flowDir"])
-    p.wait()
-    # if p.returncode:
-    # 	print("[Error] DRC failed. Refer to the report")
-    # 	exit(1)
-
-    print("#----------------------------------------------------------------------")
-    print("# Run LVS")
+    print("# Run DRC and LVS")
     print("#----------------------------------------------------------------------")
-    p = sp.Popen(["make", "netgen_lvs"], cwd=directories["flowDir"])
-    p.wait()
-    if p.returncode:
+    # TODO: look at drc after this PR, DRC failures are only reported for now
+    verification = run_make_targets(
+        VERIFICATION_TARGETS,
+        directories["flowDir"],
+        log_dir=directories["flowDir"] + "logs/" + args.platform + "/ldo/base/",
+        optional=["magic_drc"],
+    )
+    print(verification.report())
+    if not verification["magic_drc"].ok:
+        print("[Warning] DRC failed. Refer to the log file")
+    if not verification["netgen_lvs"].ok:
         print("[Error] LVS failed. Refer to the report")
         exit(1)
 
@@ -160,98 +195,19 @@ if args.mode != "verilog" and clean_work_dir:
     # function defined in configure_workspace.py
     copy_outputs(directories, args.outputDir, args.platform, user_specs["designName"])
 
-    # simulations are ran for the following configurations:
-    cap_list = ["1p", "5p"]  # additional capacitance at node VREG
-    freq_list = [0.1 * 10**6, 1 * 10**6, 10 * 10**6]  # clock frequency
-
-    # prepare sim directories and copy files
-    # sim_dir_structure is a dictionary containing the tree file path structure of both prepex/pex directories
-    [prePEX_sim_dir, postPEX_sim_dir] = create_sim_dirs(
-        arrSize, directories["simDir"], args.mode
-    )
-    # create sim netlists (return as strings)
-    spice_dir = directories["flowDir"] + "/objects/sky130hvl/ldo/base/netgen_lvs/spice/"
-    rawPEXPath = spice_dir + user_specs["designName"] + "_pex.spice"
-    rawSynthPath = spice_dir + user_specs["designName"] + ".spice"
-    [processedPEXnetlist, head] = process_PEX_netlist(
-        rawPEXPath, jsonConfig["simTool"],user_specs["designName"]
+    # prepare sim directories, netlists and scripts
+    # sim_runs maps each simulation type to its sim directory and the list of simulator commands to run in it
+    sim_runs = prepare_simulations(
+        directories,
+        user_specs,
+        arrSize,
+        jsonConfig["simTool"],
+        pdk_path,
+        args.mode,
+        args.simtype,
+        args.pex,
     )
-    processedSynthNetlist = process_prePEX_netlist(rawSynthPath)
-    powerArrayNetlist = process_power_array_netlist(rawSynthPath)
-    # create list of netlists (wheretocopy, filename, stringdata) then write to their respective locations
-    netlists = list()
-    netlists.append(tuple((postPEX_sim_dir, "ldo_sim.spice", processedPEXnetlist)))
-    netlists.append(tuple((prePEX_sim_dir, "ldo_sim.spice", processedSynthNetlist)))
-    netlists.append(tuple((prePEX_sim_dir, "power_array.spice", powerArrayNetlist)))
-    netlists.append(tuple((postPEX_sim_dir, "power_array.spice", powerArrayNetlist)))
-    for netlist in netlists:
-        with open(netlist[0] + "/" + netlist[1], "w") as simfile:
-            simfile.write(netlist[2])
 
-    # prepare simulation scripts, passing prePEX_sim_dir and pex=false to function *_prepare_scripts() runs preprex sims
-    # there should be one output file name specified for each cap value. outputs sent to sim_dir_structure directories
-    if args.simtype == "postPEX" or args.pex == "True":
-       if jsonConfig["simTool"] == "ngspice":
-           [sim, output_file_names] = ngspice_prepare_scripts(
-            head,
-            cap_list,
-            directories["simDir"] + "/templates/",
-            postPEX_sim_dir,
-            user_specs,
-            arrSize,
-            pdk_path,
-            freq_list,
-            "tt",
-            pex=True
-        )
-       elif jsonConfig["simTool"] == "Xyce":
-             [sim, output_file_names] = xyce_prepare_scripts(
-              head,
-              cap_list,
-              directories["simDir"] + "/templates/",
-              postPEX_sim_dir,
-              user_specs,
-              arrSize,
-              pdk_path,
-              freq_list,
-              "tt",
-              pex=True
-        )
-       else:
-            print("simtool not supported")
-            exit(1)
-    
-    if args.simtype == "prePEX":
-       if jsonConfig["simTool"] == "ngspice":
-           [sim, output_file_names] = ngspice_prepare_scripts(
-            head,
-            cap_list,
-            directories["simDir"] + "/templates/",
-            prePEX_sim_dir,
-            user_specs,
-            arrSize,
-            pdk_path,
-            freq_list,
-            "tt",
-            pex=False
-        )
-       elif jsonConfig["simTool"] == "Xyce":
-             [sim, output_file_names] = xyce_prepare_scripts(
-              head,
-              cap_list,
-              directories["simDir"] + "/templates/",
-              prePEX_sim_dir,
-              user_specs,
-              arrSize,
-              pdk_path,
-              freq_list,
-              "tt",
-              pex=False
-        )
-       else:
-            print("simtool not supported")
-            exit(1)
-    
     print("#----------------------------------------------------------------------")
     print("# Spice netlists created successfully")
     print("#----------------------------------------------------------------------")    
@@ -263,40 +219,32 @@ if args.mode == "full" or args.mode == "sim" or args.mode == "post":
     print("#----------------------------------------------------------------------")
     print("# Running Simulations")
     print("#----------------------------------------------------------------------")
-    # run sims
-    processes = []
-    #assert len(output_file_names) == len(cap_list)*len(freq_list)
+    # run sims in a bounded worker pool, processing of a simulation type starts as soon as all of its runs are finished
     if args.mode != "post":
-       if args.simtype == "postPEX" or args.pex == "True":
-          run_dir = directories["genDir"] + "tools/"
-          vref = user_specs["vin"]
-          iload = user_specs["imax"]
-          odir = os.path.abspath(args.outputDir)
-          for s in range (len(sim)):
-              p = sp.Popen(sim[s],cwd=postPEX_sim_dir,shell=True)
-              processes.append(p)
-            
-          for p in processes:
-              p.wait()
-                 
-          p = sp.Popen(["python3","processing.py","--file_path",postPEX_sim_dir,"--vref",str(vref),"--iload",str(iload),"--odir",odir, "--figs", "True", "--simType", "postPEX"],cwd=run_dir)
-          p.wait()
-          
-       if args.simtype == "prePEX":
-          run_dir = directories["genDir"] + "tools/"
-          vref = user_specs["vin"]
-          iload = user_specs["imax"]
-          odir = os.path.abspath(args.outputDir)
-          for s in range (len(sim)):
-              p = sp.Popen(sim[s],cwd=prePEX_sim_dir,shell=True)
-              processes.append(p)
-            
-          for p in processes:
-              p.wait()
-              
-          p = sp.Popen(["python3","processing.py","--file_path",prePEX_sim_dir,"--vref",str(vref),"--iload",str(iload),"--odir",odir, "--figs", "True", "--simType", "prePEX"],cwd=run_dir)
-          p.wait()
-       """
+        run_dir = directories["toolsDir"]
+        vref = user_specs["vin"]
+        iload = user_specs["imax"]
+        odir = os.path.abspath(args.outputDir)
+        jobs = simulation_jobs(sim_runs, args.sim_timeout, args.sim_retries)
+        pending_runs = dict()
+        for job in jobs:
+            pending_runs[job.group] = pending_runs.get(job.group, 0) + 1
+        print("# Running " + str(len(jobs)) + " simulations, at most " + str(args.jobs or default_max_jobs()) + " at a time")
+        processing = []
+        sim_cache = SimulationCache(enabled=args.sim_cache)
+        for result in run_jobs(jobs, args.jobs, sim_cache):
+            if result.cached:
+                print("# Restored " + result.job.name + " from the simulation cache")
+            if not result.ok:
+                print("[Warning] Simulation failed: " + str(result))
+            simType = result.job.group
+            pending_runs[simType] -= 1
+            if pending_runs[simType] == 0:
+                p = sp.Popen(processing_command(sim_runs[simType][0], vref, iload, odir, simType), cwd=run_dir)
+                processing.append(p)
+        for p in processing:
+            p.wait()
+        """
           for s in range (len(sim)):
               p = sp.Popen(sim[s],cwd=prePEX_sim_dir,shell=True)
               processes.append(p)
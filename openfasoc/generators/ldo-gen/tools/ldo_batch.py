@@ -0,0 +1,332 @@
+# Batch LDO generation: one setup shared by a list of specs, whose flows run concurrently in private workspaces
+import argparse
+import os
+import re
+import subprocess as sp
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from configure_workspace import (
+    check_JSON,
+    copy_outputs,
+    get_config,
+    get_directories,
+    get_setup_pdk,
+    process_supported_inputs,
+)
+from generate_verilog import generate_design
+from ldo_planner import SizingModel
+from simulations import prepare_simulations, processing_command, simulation_jobs
+
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.flow_steps import VERIFICATION_TARGETS, run_make_targets
+from common.simulation_cache import SimulationCache
+from common.simulation_scheduler import default_max_jobs, run_jobs
+from common.workspace import create_workspace
+
+# directories of ldo-gen written by a run, every spec gets a private copy of them
+WORKSPACE_DIRS = ["flow", "blocks", "src", "simulations"]
+
+SUMMARY_COLUMNS = ["designName", "vin", "imax", "arrSize", "area", "status", "DRC", "LVS"]
+
+
+def read_specs(specfile, spec_ranges):
+    """Reads a JSON list of LDO specs (same format as spec.json) and returns a list of user_specs hash tables.
+    Specs that can not be generated get an "error" entry instead of exiting."""
+    jsonSpecs = check_JSON(specfile)
+    if not isinstance(jsonSpecs, list):
+        print("Error: the batch spec file must contain a list of specs.")
+        sys.exit(1)
+    specs = list()
+    for i, jsonSpec in enumerate(jsonSpecs):
+        user_specs = {"designName": "spec" + str(i), "vin": np.nan, "imax": np.nan}
+        try:
+            user_specs["designName"] = str(jsonSpec["module_name"])
+            user_specs["vin"] = float(jsonSpec["specifications"]["vin"])
+            user_specs["imax"] = float(jsonSpec["specifications"]["imax"])
+        except (KeyError, TypeError, ValueError):
+            user_specs["error"] = "bad spec, module_name, vin and imax are required"
+        if "error" not in user_specs:
+            if not re.match(r"^\w+$", user_specs["designName"]):
+                user_specs["error"] = "bad module_name"
+            elif any(spec["designName"] == user_specs["designName"] for spec in specs):
+                user_specs["error"] = "duplicate module_name"
+            elif not (
+                spec_ranges["vin_min"] <= user_specs["vin"] <= spec_ranges["vin_max"]
+            ):
+                user_specs["error"] = "vin out of the supported range"
+            elif not (
+                spec_ranges["maxLoad_min"]
+                <= user_specs["imax"]
+                <= spec_ranges["maxLoad_max"]
+            ):
+                user_specs["error"] = "imax out of the supported range"
+        specs.append(user_specs)
+    return specs
+
+
+def run_step(command, cwd, log_file, slots):
+    """Runs a flow step holding one slot of the global job limit, its output is written to log_file.
+    Returns the return code."""
+    with slots, open(log_file, "w") as log:
+        return sp.call(command, cwd=cwd, stdout=log, stderr=sp.STDOUT)
+
+
+def drc_errors(drc_report):
+    """Number of DRC errors of a magic DRC report, None if the report is missing"""
+    if not os.path.isfile(drc_report):
+        return None
+    with open(drc_report, "r") as report:
+        match = re.search(r"count:\s*(\d+)", report.read())
+    return int(match.group(1)) if match else None
+
+
+def lvs_status(lvs_report):
+    """LVS result of a netgen report: clean, failed or None if the report is missing"""
+    if not os.path.isfile(lvs_report):
+        return None
+    with open(lvs_report, "r") as report:
+        return "failed" if "failed" in report.read() else "clean"
+
+
+def sim_metrics(outputDir, simType):
+    """Worst ripple and settling time of a simulation type from the parameters.csv written by processing.py"""
+    parameters = os.path.join(outputDir, simType, "csv_data", "parameters.csv")
+    if not os.path.isfile(parameters):
+        return dict()
+    df = pd.read_csv(parameters)
+    return {
+        simType + " VREG_Ripple max": df["VREG_Ripple"].max(),
+        simType + " Settling Time max": df["Settling Time"].max(),
+    }
+
+
+def run_batch_spec(user_specs, setup, args, slots):
+    """Runs the flow of a spec in its private workspace and returns its summary row
+    an error of one spec is reported in its summary row instead of stopping the batch"""
+    row = {
+        "designName": user_specs["designName"],
+        "vin": user_specs["vin"],
+        "imax": user_specs["imax"],
+        "arrSize": user_specs.get("arrSize"),
+        "area": user_specs.get("area"),
+        "status": "ok",
+    }
+    try:
+        run_spec(user_specs, row, setup, args, slots)
+    except Exception as error:
+        print("[Error] " + user_specs["designName"] + ": " + repr(error))
+        row["status"] = "error: " + str(error)
+    return row
+
+
+def run_spec(user_specs, row, setup, args, slots):
+    """Runs the flow of a spec in its private workspace, the results are written to its summary row"""
+    designName = user_specs["designName"]
+    if "error" in user_specs:
+        row["status"] = user_specs["error"]
+        return
+
+    specDir = os.path.abspath(os.path.join(args.outputDir, designName))
+    outputDir = os.path.join(specDir, "work")
+    os.makedirs(outputDir, exist_ok=True)
+    genDir = create_workspace(
+        setup["directories"]["genDir"], os.path.join(specDir, "workspace"), WORKSPACE_DIRS
+    )
+    directories = get_directories(genDir)
+    arrSize = user_specs["arrSize"]
+    print("# " + designName + ": generating an LDO with " + str(arrSize) + " PT unit cells")
+    generate_design(directories, outputDir, designName, arrSize)
+    if args.mode == "verilog":
+        return
+
+    # synthesis and APR, then DRC and LVS concurrently
+    returncode = run_step(
+        ["make", "finish"],
+        directories["flowDir"],
+        os.path.join(outputDir, "finish.log"),
+        slots,
+    )
+    print("# " + designName + ": APR finished with return code " + str(returncode))
+    if returncode:
+        row["status"] = "APR failed"
+    else:
+        # DRC errors are reported in the summary, the flow goes on like in ldo-gen.py
+        verification = run_make_targets(
+            VERIFICATION_TARGETS,
+            directories["flowDir"],
+            log_dir=outputDir,
+            optional=["magic_drc"],
+            slots=slots,
+        )
+        print("# " + designName + ": " + verification.report().replace("\n", "\n# " + designName + ": "))
+        if not verification["netgen_lvs"].ok:
+            row["status"] = "LVS failed"
+    reports = directories["flowDir"] + "reports/" + args.platform + "/ldo/base/"
+    row["DRC"] = drc_errors(reports + "6_final_drc.rpt")
+    row["LVS"] = lvs_status(reports + "6_final_lvs.rpt")
+    if row["status"] != "ok":
+        return
+    copy_outputs(directories, outputDir, args.platform, designName)
+
+    sim_runs = prepare_simulations(
+        directories,
+        user_specs,
+        arrSize,
+        setup["jsonConfig"]["simTool"],
+        setup["pdk_path"],
+        args.mode,
+        args.simtype,
+        args.pex,
+    )
+    if args.mode != "full":
+        return
+
+    # processing of a simulation type starts as soon as all of its runs are finished
+    jobs = simulation_jobs(sim_runs, args.sim_timeout, args.sim_retries)
+    pending_runs = dict()
+    for job in jobs:
+        pending_runs[job.group] = pending_runs.get(job.group, 0) + 1
+    failed = 0
+    for result in run_jobs(jobs, args.jobs, setup["sim_cache"], slots):
+        if not result.ok:
+            failed += 1
+            print("[Warning] " + designName + ": Simulation failed: " + str(result))
+        simType = result.job.group
+        pending_runs[simType] -= 1
+        if pending_runs[simType] == 0:
+            run_step(
+                processing_command(
+                    sim_runs[simType][0],
+                    user_specs["vin"],
+                    user_specs["imax"],
+                    outputDir,
+                    simType,
+                ),
+                directories["toolsDir"],
+                os.path.join(outputDir, simType + "_processing.log"),
+                slots,
+            )
+            row.update(sim_metrics(outputDir, simType))
+    if failed:
+        row["status"] = str(failed) + " simulations failed"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a batch of digital LDOs from a JSON list of specs"
+    )
+    parser.add_argument(
+        "--specs",
+        required=True,
+        help='JSON list of specs [{"module_name": ..., "specifications": {"vin": ..., "imax": ...}}, ...]',
+    )
+    parser.add_argument(
+        "--outputDir",
+        default="batch",
+        help="Output directory, every spec gets <outputDir>/<module_name>/work and a private workspace",
+    )
+    parser.add_argument(
+        "--platform", default="sky130hvl", help="PDK/process kit for cadre flow"
+    )
+    parser.add_argument(
+        "--mode",
+        default="macro",
+        choices=["verilog", "macro", "full"],
+        help="LDO Gen operation mode of every spec. Default mode: 'macro'.",
+    )
+    parser.add_argument(
+        "--simtype",
+        choices=["postPEX", "prePEX"],
+        default="prePEX",
+        help="Simulations type prePEX or postPEX",
+    )
+    parser.add_argument("--pex", help="enable postPEX along with prePEX")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum number of flow steps and simulations running at the same time for the whole batch. Default: number of CPUs.",
+    )
+    parser.add_argument(
+        "--sim_timeout",
+        type=float,
+        default=None,
+        help="Timeout in seconds of a single simulation run. Default: no timeout.",
+    )
+    parser.add_argument(
+        "--no-sim-cache",
+        dest="sim_cache",
+        action="store_false",
+        help="Always run the simulations instead of restoring identical runs from the simulation cache.",
+    )
+    parser.add_argument(
+        "--sim_retries",
+        type=int,
+        default=1,
+        help="Number of times a crashed simulation is re-run. Default: 1.",
+    )
+    args = parser.parse_args()
+    if args.platform != "sky130hvl":
+        print("Error: Only supports sky130 tech as of now")
+        sys.exit(1)
+    if args.jobs is None or args.jobs < 1:
+        args.jobs = default_max_jobs()
+
+    # one-time setup shared by all the specs
+    directories = get_directories()
+    spec_ranges = process_supported_inputs(args, directories)
+    specs = read_specs(args.specs, spec_ranges)
+    setup = {
+        "directories": directories,
+        "jsonConfig": get_config(args.mode, directories["genDir"]),
+        "sim_cache": SimulationCache(enabled=args.sim_cache),
+    }
+    # the verilog mode does not run any tool of the PDK
+    if args.mode != "verilog":
+        setup["pdk_path"] = get_setup_pdk(setup["jsonConfig"], directories["commonDir"])
+
+    # size all the specs at once
+    sizingModel = SizingModel.from_json(directories["modelsDir"] + "model.json")
+    plan = sizingModel.plan(
+        [spec["vin"] for spec in specs], [spec["imax"] for spec in specs]
+    )
+    for i, user_specs in enumerate(specs):
+        if "error" in user_specs:
+            continue
+        if np.isnan(plan["arrSize"][i]):
+            user_specs["error"] = "vin not in the model file"
+            continue
+        user_specs["arrSize"] = int(plan["arrSize"][i])
+        user_specs["area"] = float(plan["area"][i])
+
+    print("# Generating " + str(len(specs)) + " LDOs, at most " + str(args.jobs) + " jobs at a time")
+    start = time.perf_counter()
+    os.makedirs(args.outputDir, exist_ok=True)
+    slots = threading.BoundedSemaphore(args.jobs)
+    with ThreadPoolExecutor(max_workers=min(args.jobs, len(specs) or 1)) as pool:
+        rows = list(
+            pool.map(lambda spec: run_batch_spec(spec, setup, args, slots), specs)
+        )
+
+    summary = pd.DataFrame(rows)
+    summary = summary.reindex(
+        columns=SUMMARY_COLUMNS
+        + [column for column in summary.columns if column not in SUMMARY_COLUMNS]
+    )
+    for column in ["arrSize", "DRC"]:
+        summary[column] = summary[column].astype("Int64")
+    summary_file = os.path.join(args.outputDir, "summary.csv")
+    summary.to_csv(summary_file, index=False)
+    print(summary.to_string(index=False))
+    print(
+        "# Batch finished in {0:.1f} s, summary written to {1}".format(
+            time.perf_counter() - start, summary_file
+        )
+    )
@@ -0,0 +1,158 @@
+# Vectorized LDO sizing from the model file, to explore many specs without running the flow
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+from configure_workspace import check_JSON, get_directories, process_supported_inputs
+
+# the power transistor array is sized for 1.3 times the requested maximum load current
+IMAX_MARGIN = 1.3
+
+
+class SizingModel:
+    """the Iload,max and area polynomials of an LDO model file loaded once into NumPy arrays
+    vins is the sorted array of the modeled input voltages, iload_coefficients the Iload,max polynomial of every vin
+    (shape (len(vins), degree + 1)) and area_coefficients the area polynomial of the array size,
+    all coefficients are ordered highest degree first (numpy.polyval order)"""
+
+    def __init__(self, vins, iload_coefficients, area_coefficients):
+        self.vins = vins
+        self.iload_coefficients = iload_coefficients
+        self.area_coefficients = area_coefficients
+
+    @classmethod
+    def from_json(cls, model):
+        """model is the content of model.json (dictionary) or its path"""
+        if isinstance(model, str):
+            model = check_JSON(model)
+        vins = sorted(model["Iload,max"], key=float)
+        return cls(
+            np.array([float(vin) for vin in vins]),
+            np.array([model["Iload,max"][vin] for vin in vins], dtype=float),
+            np.array(model["area"], dtype=float),
+        )
+
+    def vin_index(self, vin):
+        """index of every vin in vins, -1 where vin is not modeled (vins between the modeled ones are not interpolated)"""
+        vin = np.asarray(vin, dtype=float)
+        index = np.clip(np.searchsorted(self.vins, vin), 0, len(self.vins) - 1)
+        return np.where(np.isclose(self.vins[index], vin), index, -1)
+
+    def arr_size(self, vin, imax):
+        """number of power transistor unit cells for every (vin, imax) pair, NaN where vin is not modeled"""
+        vin, imax = np.broadcast_arrays(
+            np.asarray(vin, dtype=float), np.asarray(imax, dtype=float)
+        )
+        index = self.vin_index(vin)
+        # polyval evaluates the polynomials of all the points at once when the coefficients are stacked on the last axis
+        size = np.polyval(self.iload_coefficients[index].T, IMAX_MARGIN * imax)
+        # at least arrSize PMOS are required to meet the spec
+        return np.where(index >= 0, np.ceil(size), np.nan)
+
+    def area(self, arr_size):
+        """estimated design area (um^2) for every power transistor array size"""
+        return np.polyval(self.area_coefficients, np.asarray(arr_size, dtype=float))
+
+    def plan(self, vin, imax):
+        """sizes every (vin, imax) spec point, returns a dictionary of arrays {vin, imax, arrSize, area}"""
+        vin, imax = np.broadcast_arrays(
+            np.asarray(vin, dtype=float), np.asarray(imax, dtype=float)
+        )
+        arr_size = self.arr_size(vin, imax)
+        return {
+            "vin": vin.ravel(),
+            "imax": imax.ravel(),
+            "arrSize": arr_size.ravel(),
+            "area": self.area(arr_size).ravel(),
+        }
+
+
+def spec_grid(vins, imaxs):
+    """all the combinations of vins and imaxs as two flat arrays"""
+    vin, imax = np.meshgrid(vins, imaxs, indexing="ij")
+    return vin.ravel(), imax.ravel()
+
+
+def write_plan(plan, output):
+    """writes the plan table to a csv file, points that cannot be sized are marked unsupported"""
+    with open(output, "w", newline="") as wf:
+        writer = csv.writer(wf)
+        writer.writerow(["vin", "imax", "arrSize", "area"])
+        for vin, imax, arr_size, area in zip(
+            plan["vin"], plan["imax"], plan["arrSize"], plan["area"]
+        ):
+            if np.isnan(arr_size):
+                writer.writerow(["%g" % vin, "%g" % imax, "unsupported", "unsupported"])
+            else:
+                writer.writerow(["%g" % vin, "%g" % imax, int(arr_size), repr(float(area))])
+
+
+if __name__ == "__main__":
+    directories = get_directories()
+    parser = argparse.ArgumentParser(
+        description="Size the LDO power transistor array and estimate its area for a grid of specs without running the flow"
+    )
+    parser.add_argument(
+        "--model",
+        default=directories["modelsDir"] + "model.json",
+        help="model file (json)",
+    )
+    parser.add_argument(
+        "--platform", default="sky130hvl", help="platform of the supported spec ranges"
+    )
+    parser.add_argument(
+        "--vin",
+        nargs=3,
+        type=float,
+        metavar=("MIN", "MAX", "STEP"),
+        help="vin range. Default: supported vin range with a 0.1V step",
+    )
+    parser.add_argument(
+        "--imax",
+        nargs=3,
+        type=float,
+        metavar=("MIN", "MAX", "STEP"),
+        help="imax range. Default: supported imax range with a 0.1mA step",
+    )
+    parser.add_argument(
+        "--output", default="ldo_plan.csv", help="output table (csv)"
+    )
+    args = parser.parse_args()
+
+    spec_ranges = process_supported_inputs(args, directories)
+    vin_range = args.vin or [spec_ranges["vin_min"], spec_ranges["vin_max"], 0.1]
+    imax_range = args.imax or [
+        spec_ranges["maxLoad_min"],
+        spec_ranges["maxLoad_max"],
+        0.1e-3,
+    ]
+    if min(vin_range[2], imax_range[2]) <= 0:
+        print("Error: the vin and imax steps must be positive.")
+        sys.exit(1)
+    # the maximum is included in the range, rounding drops the floating point error of arange
+    vins = np.round(np.arange(vin_range[0], vin_range[1] + vin_range[2] / 2, vin_range[2]), 9)
+    imaxs = np.round(np.arange(imax_range[0], imax_range[1] + imax_range[2] / 2, imax_range[2]), 9)
+    if (
+        vins.min() < spec_ranges["vin_min"]
+        or vins.max() > spec_ranges["vin_max"]
+        or imaxs.min() < spec_ranges["maxLoad_min"]
+        or imaxs.max() > spec_ranges["maxLoad_max"]
+    ):
+        print("Warning: the spec grid is outside of the supported inputs of " + args.platform)
+
+    start = time.perf_counter()
+    model = SizingModel.from_json(args.model)
+    plan = model.plan(*spec_grid(vins, imaxs))
+    elapsed = time.perf_counter() - start
+
+    write_plan(plan, args.output)
+    unsupported = int(np.isnan(plan["arrSize"]).sum())
+    print(
+        "{0} spec points sized in {1:.3f} ms, {2} unsupported (vin not modeled)".format(
+            len(plan["vin"]), 1e3 * elapsed, unsupported
+        )
+    )
+    print("Plan written to " + args.output)
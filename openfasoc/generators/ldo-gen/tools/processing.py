@@ -15,6 +15,7 @@ import pandas as pd
 from configure_workspace import *
 from generate_verilog import *
 from simulations import *
+from waveforms import DC_VECTORS, LOAD_CHANGE_VECTORS, TRAN_VECTORS, WaveformStore, decimate, export_signals
 
 parser = argparse.ArgumentParser(description="processing simulations")
 parser.add_argument("--file_path","-f", help="sim path")
@@ -23,6 +24,11 @@ parser.add_argument("--iload","-i", help="iloadspec")
 parser.add_argument("--odir","-od", help="output dir")
 parser.add_argument("--figs","-fg", help="figures")
 parser.add_argument("--simType","-sim", help="simulations Type")
+parser.add_argument("--export", default="auto", choices=["auto", "npz", "parquet", "none"], help="per-run waveform export format, auto: parquet if pyarrow is installed else npz")
+parser.add_argument("--csv", action="store_true", help="also export the per-run waveforms as text csv files")
+parser.add_argument("--decimate", type=int, default=1, help="export every Nth waveform point")
+parser.add_argument("--time_window", type=float, nargs=2, metavar=("START", "STOP"), help="only export waveform points within this time window [s]")
+parser.add_argument("--no_cache", action="store_true", help="do not cache the parsed waveforms in <file_path>/waveforms as .npz files")
 
 args = parser.parse_args()
 
@@ -39,7 +45,7 @@ for files in os.scandir(sim_dir):
        output_file_names.append(files.name) 
 
 
-def fig_VREG_results(raw_files, vrefspec):
+def fig_VREG_results(raw_files, vrefspec, store):
     """Create VREG output plots for all caps at particular freq simulations"""
     figureVREG, axesVREG = plt.subplots(len(raw_files),figsize=(30, 15))
     figureVDIF, axesVDIF = plt.subplots(len(raw_files),figsize=(30, 15))
@@ -54,10 +60,9 @@ def fig_VREG_results(raw_files, vrefspec):
     for i, raw_file in enumerate(raw_files):
         cap_id = str(raw_file).split("/")[-1].split("_")[2] + " "
         freq_id = str(raw_file).split("/")[-1].split("_")[1] + " "
-        data = ltspice.Ltspice(raw_file)
-        data.parse()
-        time = data.get_time()
-        [VREG, VREF] = [data.get_data("v(vreg)"), data.get_data("v(vref)")]
+        data = store[raw_file]
+        time = data["time"]
+        [VREG, VREF] = [data["v(vreg)"], data["v(vref)"]]
         axesVREG[i].set_title("VREG vs Time " + cap_id + freq_id, fontsize=15)
         axesVREG[i].ticklabel_format(style="sci", axis="x", scilimits=(-6, -6))
         axesVREG[i].plot(time, VREG)
@@ -73,41 +78,39 @@ def fig_VREG_results(raw_files, vrefspec):
     return [figureVREG, figureVDIF, figureRIPL]
 
 
-def fig_comparator_results(raw_files):
+def fig_comparator_results(raw_files, store):
     """Create cmp_out output plots for all caps at particular freq simulations"""
     figure, axes = plt.subplots(len(raw_files),figsize=(30, 15))
     len(axes)  # checks that axes can be indexed
     figure.text(0.5, 0.04, "Time [us]", ha="center",fontsize ='large')
     figure.text(0.04, 0.5, "Cmp_out [V]", va="center", rotation="vertical",fontsize =15)
     for i, raw_file in enumerate(raw_files):
-        data = ltspice.Ltspice(raw_file)
-        data.parse()
+        data = store[raw_file]
         cap_id = str(raw_file).split("/")[-1].split("_")[2] + " "
         freq_id = str(raw_file).split("/")[-1].split("_")[1] + " "
-        time = data.get_time()
-        cmp_out = data.get_data("v(cmp_out)")
+        time = data["time"]
+        cmp_out = data["v(cmp_out)"]
         axes[i].set_title("Comp_out vs Time " + cap_id + freq_id,fontsize=15)
         axes[i].ticklabel_format(style="sci", axis="x", scilimits=(-6, -6))
         axes[i].plot(time, cmp_out)
     return figure
 
 
-def fig_controller_results(raw_files):
+def fig_controller_results(raw_files, store):
     """Create controller output plots for all caps at particular freq simulations"""
     figure, axes = plt.subplots(len(raw_files),figsize=(30, 15))
     len(axes)  # checks that axes can be indexed
     figure.text(0.5, 0.04, "Time [us]", ha="center",fontsize ='large')
     figure.text(0.04, 0.5, "Active Switches", va="center", rotation="vertical",fontsize =15)
     for i, raw_file in enumerate(raw_files):
-        data = ltspice.Ltspice(raw_file)
-        data.parse()
+        data = store[raw_file]
         cap_id = str(raw_file).split("/")[-1].split("_")[2] + " "
         freq_id = str(raw_file).split("/")[-1].split("_")[1] + " "
-        time = data.get_time()[100:]
-        active_switches = np.copy(data.get_data("v(ctrl_out[0])"))
+        time = data["time"][100:]
+        active_switches = np.copy(data["v(ctrl_out[0])"])
         for regI in range(1, 9):
             active_switches += (
-                data.get_data("v(ctrl_out[" + str(regI) + "])") * 2**regI
+                data["v(ctrl_out[" + str(regI) + "])"] * 2**regI
             )
         active_switches = (np.rint(active_switches / 3.3)).astype(int)[100:]
         num_smooth_pts = np.linspace(time.min(), time.max(), 250)
@@ -118,7 +121,7 @@ def fig_controller_results(raw_files):
     return figure
 
 
-def fig_dc_results(raw_file):
+def fig_dc_results(raw_file, store):
     figure, axes = plt.subplots(1, sharex=True, sharey=True)
     figure.text(0.5, 0.04, "iload [A]", ha="center")
     figure.text(
@@ -128,11 +131,10 @@ def fig_dc_results(raw_file):
         va="center",
         rotation="vertical",
     )
-    data = ltspice.Ltspice(raw_file)
-    data.parse()
-    current_load = data.get_data("i(r1)")
-    VREF = data.get_data("v(vref)")
-    VREG = data.get_data("v(vreg)")
+    data = store.get(raw_file, DC_VECTORS)
+    current_load = data["i(r1)"]
+    VREF = data["v(vref)"]
+    VREG = data["v(vreg)"]
     intersect = np.argwhere(np.diff(np.sign(VREG - VREF))).flatten()
     intersect = intersect[0] if isinstance(intersect, (np.ndarray, list)) else intersect
     axes.set_title(
@@ -147,7 +149,7 @@ def fig_dc_results(raw_file):
     axes.legend(loc="lower left")
     return figure
 
-def fig_load_change_results(raw_file,load):
+def fig_load_change_results(raw_file,load,store):
     figure, axes = plt.subplots(1, sharex=True, sharey=True)
     figure.text(0.5, 0.04, "Time [us]", ha="center")
     figure.text(
@@ -157,15 +159,16 @@ def fig_load_change_results(raw_file,load):
         va="center",
         rotation="vertical",
     )
-    data = ltspice.Ltspice(raw_file)
-    data.parse()
-    VREG = data.get_data("v(vreg)")
-    Time = data.get_time()
+    data = store.get(raw_file, LOAD_CHANGE_VECTORS)
+    VREG = data["v(vreg)"]
+    Time = data["time"]
     axes.set_title("Load change sim from 1mA to "+ str(load)+ "mA")
     axes.ticklabel_format(style="sci", axis="x", scilimits=(-6, -6))
     axes.plot(Time, VREG)
     return figure
-def raw_to_csv(raw_files, vrefspec,odir):
+def raw_to_csv(raw_files, vrefspec,odir,store,export_format="auto",export_csv=False,every=1,time_window=None):
+    """Computes ripple/settling time of every run into parameters.csv and exports the run waveforms
+    to <odir>/<simtype>/waveform_data (npz or parquet) and, if export_csv, to <odir>/<simtype>/csv_data."""
     time_settle = []
     vripple = []
     freq = []
@@ -173,13 +176,15 @@ def raw_to_csv(raw_files, vrefspec,odir):
     load = []
     csv1 = odir + "/"+simtype+ "/csv_data"
     os.system("mkdir -p "+csv1)
+    waveform_dir = odir + "/" + simtype + "/waveform_data"
+    if export_format != "none":
+        os.makedirs(waveform_dir, exist_ok=True)
     for i,raw_file in enumerate(raw_files):
-        data = ltspice.Ltspice(raw_file)
-        data.parse()
-        VREG = data.get_data("v(vreg)")
-        VREF = data.get_data("v(vref)")
-        cmp_out = data.get_data("v(cmp_out)")
-        time = data.get_time()
+        data = store[raw_file]
+        VREG = data["v(vreg)"]
+        VREF = data["v(vref)"]
+        cmp_out = data["v(cmp_out)"]
+        time = data["time"]
         test_conditions = str(raw_file).split("/")[-1].strip("cap_output.raw") + "p"
         iload = test_conditions[0:5]
         load.append(iload)
@@ -193,23 +198,32 @@ def raw_to_csv(raw_files, vrefspec,odir):
         vripple.append(VREG_max-VREG_min)
         time_sample_dev = time[100 + np.where(VREG[100:] >= vrefspec)[0][0] :]
         time_settle.append((time_sample_dev[0]))
-        df = pd.DataFrame({"Time" : time , "VREG" : VREG,"VREF" :VREF, "cmp_out" : cmp_out})
-        df.to_csv(csv1 + "/" + test_conditions +"_.csv",index=False)
+        signals = decimate({"time": time, "VREG": VREG, "VREF": VREF, "cmp_out": cmp_out}, every, time_window)
+        if export_format != "none":
+            export_signals(signals, waveform_dir + "/" + test_conditions, export_format)
+        if export_csv:
+            signals["Time"] = signals.pop("time")
+            df = pd.DataFrame(signals, columns=["Time", "VREG", "VREF", "cmp_out"])
+            df.to_csv(csv1 + "/" + test_conditions +"_.csv",index=False)
     df2 = pd.DataFrame({"Iload":load,"Frequency":freq,"Cap_Value":cap, "VREG_Ripple" : vripple,"Settling Time" : time_settle})
     df2.to_csv(csv1 + "/" + "parameters.csv" , index=False)
 
+# every raw file is parsed once, the figure and metric functions share the parsed vectors
+store = WaveformStore(
+    TRAN_VECTORS, cache_dir=None if args.no_cache else os.path.join(sim_dir, "waveforms")
+)
 raw_files = [(sim_dir + ofile) for ofile in output_file_names]
-raw_to_csv(raw_files,float(vrefspec),odir)
+raw_to_csv(raw_files,float(vrefspec),odir,store,args.export,args.csv,args.decimate,args.time_window)
 
 if args.figs == "True":
     figures = list()
     figure_names = list()
     figure_names.extend(["VREG_output", "VDIF", "VREG_ripple"])
-    figures.extend(fig_VREG_results(raw_files, float(vrefspec)))
+    figures.extend(fig_VREG_results(raw_files, float(vrefspec), store))
     figure_names.append("cmp_out")
-    figures.append(fig_comparator_results(raw_files))
+    figures.append(fig_comparator_results(raw_files, store))
     figure_names.append("active_switches")
-    figures.append(fig_controller_results(raw_files))
+    figures.append(fig_controller_results(raw_files, store))
     # save results to png files
     current_freq_results = odir + "/" +simtype+ "/output_plots"
     try:
@@ -221,7 +235,7 @@ if args.figs == "True":
     assert len(figures) == len(figure_names)
     for i, figure in enumerate(figures):
         figure.savefig(current_freq_results + "/" + figure_names[i] + ".png")
-        fig_dc_results(sim_dir + "/isweep.raw").savefig(odir + "/" +simtype+"/dc.png")
+        fig_dc_results(sim_dir + "/isweep.raw", store).savefig(odir + "/" +simtype+"/dc.png")
         max_load = float(iloadspec)
         load = max_load*1000
-        fig_load_change_results(sim_dir + "/" + str(load) + "mA_output_load_change.raw",load).savefig(odir +"/" +simtype+ "/load_change.png")
\ No newline at end of file
+        fig_load_change_results(sim_dir + "/" + str(load) + "mA_output_load_change.raw",load,store).savefig(odir +"/" +simtype+ "/load_change.png")
\ No newline at end of file
@@ -11,6 +11,11 @@ from PIL import Image
 from scipy.interpolate import make_interp_spline
 import ltspice
 import pandas as pd
+from spice_netlist import PowerArrayRewriter, PrePEXRewriter, transform_netlist_file
+
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.simulation_scheduler import SimulationJob
 
 # ------------------------------------------------------------------------------
 # Create Sim Directories
@@ -67,48 +72,15 @@ def matchNetlistCell(cell_instantiation, IfFound, remove_mode=True):
 
 
 def process_prePEX_netlist(rawSynthNetlistPath):
-    """Comments out identified cells in matchNetlistCell and adds VREF/VREG to toplevel subckt def.
+    """Comments out identified cells in PrePEXRewriter and adds VREF to toplevel subckt def.
     Return string containing the netlist."""
-    with open(rawSynthNetlistPath, "r") as spice_in:
-        netlist = spice_in.read()
-    # comment out identified cells
-    cells_array = netlist.split("\n")
-    for cell in cells_array:
-        if cell != "":
-            cellPinout = cell.split(" ")
-            cell_commented = cell
-        if matchNetlistCell(cellPinout, ["vref_gen_nmos_with_trim"]):
-            cell_commented = "*" + cell
-        netlist = netlist.replace(cell, cell_commented)
-    # prepare toplevel subckt def (assumes VDD VSS last two in pin out)
-    netlist = netlist.replace("VDD VSS", "VDD VSS VREF", 1)
-    return netlist
+    return transform_netlist_file(rawSynthNetlistPath, PrePEXRewriter())
 
 
 def process_power_array_netlist(rawSynthNetlistPath):
     """Comments out everything except the power array and adjusts inputs to direct control power array.
     Return string containing the netlist."""
-    with open(rawSynthNetlistPath, "r") as spice_in:
-        power_spice_netlist = spice_in.read()
-    removeIfNotFound = ["Xpt_array_unit", "INCLUDE", "ENDS"]
-    cells_array = power_spice_netlist.split("\n")
-    for cell in cells_array:
-        if cell != "":
-            cellPinout = cell.split(" ")
-            cell_commented = cell
-        if "SUBCKT" in cell:
-            power_spice_netlist = power_spice_netlist.replace(
-                cell, ".SUBCKT ldoInst VREG VDD VSS\n"
-            )
-            continue
-        elif matchNetlistCell(cellPinout, removeIfNotFound, False):
-            cell_commented = "*" + cell
-        elif "ctrl1.ctrl_word" in cell:
-            for pin in cellPinout:
-                if "ctrl1.ctrl_word" in pin:
-                    cell_commented = cell_commented.replace(pin, "VSS")
-        power_spice_netlist = power_spice_netlist.replace(cell, cell_commented)
-    return power_spice_netlist
+    return transform_netlist_file(rawSynthNetlistPath, PowerArrayRewriter())
 
 
 def process_PEX_netlist(rawExtractedNetlistPath, simtool, designName):
@@ -437,6 +409,128 @@ def xyce_prepare_scripts(
     return [sim_list, raw_data]
 
 
+def sim_command_files(command, sim_dir):
+    """Returns (netlist, outputs) of a simulation command from *_prepare_scripts.
+    outputs are the log file of the command and the raw files written by the netlist."""
+    words = command.split()
+    netlist = words[-1]
+    outputs = [words[words.index("-o") + 1]]
+    with open(os.path.join(sim_dir, netlist), "r") as sim_script:
+        for line in sim_script:
+            # ngspice: write <raw> ..., Xyce: .print ... file=<raw> ...
+            match = re.match(r"\s*write\s+(\S+)", line) or re.search(
+                r"\bfile=(\S+)", line, re.I
+            )
+            if match and not line.lstrip().startswith("*"):
+                outputs.append(match.group(1))
+    return [netlist, outputs]
+
+
+def prepare_simulations(
+    directories, user_specs, arrSize, simTool, pdk_path, mode, simtype, pex
+):
+    """Creates the sim directories, writes the pre/post PEX netlists and specializes the simulation scripts.
+    Returns a dictionary mapping each simulation type (prePEX/postPEX) to (sim directory, list of simulator commands)."""
+    # simulations are ran for the following configurations:
+    cap_list = ["1p", "5p"]  # additional capacitance at node VREG
+    freq_list = [0.1 * 10**6, 1 * 10**6, 10 * 10**6]  # clock frequency
+
+    # prepare sim directories and copy files
+    [prePEX_sim_dir, postPEX_sim_dir] = create_sim_dirs(
+        arrSize, directories["simDir"], mode
+    )
+    # create sim netlists (return as strings)
+    spice_dir = directories["flowDir"] + "/objects/sky130hvl/ldo/base/netgen_lvs/spice/"
+    rawPEXPath = spice_dir + user_specs["designName"] + "_pex.spice"
+    rawSynthPath = spice_dir + user_specs["designName"] + ".spice"
+    [processedPEXnetlist, head] = process_PEX_netlist(
+        rawPEXPath, simTool, user_specs["designName"]
+    )
+    processedSynthNetlist = process_prePEX_netlist(rawSynthPath)
+    powerArrayNetlist = process_power_array_netlist(rawSynthPath)
+    # create list of netlists (wheretocopy, filename, stringdata) then write to their respective locations
+    netlists = list()
+    netlists.append(tuple((postPEX_sim_dir, "ldo_sim.spice", processedPEXnetlist)))
+    netlists.append(tuple((prePEX_sim_dir, "ldo_sim.spice", processedSynthNetlist)))
+    netlists.append(tuple((prePEX_sim_dir, "power_array.spice", powerArrayNetlist)))
+    netlists.append(tuple((postPEX_sim_dir, "power_array.spice", powerArrayNetlist)))
+    for netlist in netlists:
+        with open(netlist[0] + "/" + netlist[1], "w") as simfile:
+            simfile.write(netlist[2])
+
+    # prepare simulation scripts, the output files are written to the sim directory of each simulation type
+    sim_types = list()
+    if simtype == "postPEX" or pex == "True":
+        sim_types.append(("postPEX", postPEX_sim_dir, True))
+    if simtype == "prePEX":
+        sim_types.append(("prePEX", prePEX_sim_dir, False))
+    sim_runs = dict()
+    for simType, sim_dir, is_pex in sim_types:
+        if simTool == "ngspice":
+            prepare_scripts = ngspice_prepare_scripts
+        elif simTool == "Xyce":
+            prepare_scripts = xyce_prepare_scripts
+        else:
+            print("simtool not supported")
+            exit(1)
+        [sim, output_file_names] = prepare_scripts(
+            head,
+            cap_list,
+            directories["simDir"] + "/templates/",
+            sim_dir,
+            user_specs,
+            arrSize,
+            pdk_path,
+            freq_list,
+            "tt",
+            pex=is_pex,
+        )
+        sim_runs[simType] = (sim_dir, sim)
+    return sim_runs
+
+
+def simulation_jobs(sim_runs, timeout=None, retries=0):
+    """Returns the SimulationJob of every simulator command of sim_runs (see prepare_simulations),
+    the jobs of a simulation type share its name as group."""
+    jobs = list()
+    for simType, (sim_dir, sim) in sim_runs.items():
+        for s, command in enumerate(sim):
+            [netlist, outputs] = sim_command_files(command, sim_dir)
+            jobs.append(
+                SimulationJob(
+                    simType + "_" + str(s),
+                    command,
+                    cwd=sim_dir,
+                    timeout=timeout,
+                    retries=retries,
+                    group=simType,
+                    netlist=netlist,
+                    outputs=outputs,
+                )
+            )
+    return jobs
+
+
+def processing_command(sim_dir, vref, iload, odir, simType):
+    """Command of processing.py (run from the tools directory) computing the metrics and figures of a simulation type."""
+    return [
+        "python3",
+        "processing.py",
+        "--file_path",
+        sim_dir,
+        "--vref",
+        str(vref),
+        "--iload",
+        str(iload),
+        "--odir",
+        odir,
+        "--figs",
+        "True",
+        "--simType",
+        simType,
+    ]
+
+
 # ------------------------------------------------------------------------------
 # max current binary search (deprecated, instead use dc linear sweep)
 # ------------------------------------------------------------------------------
@@ -0,0 +1,235 @@
+# Single-pass, line-streaming SPICE netlist transformer used to prepare LDO sim netlists
+import argparse
+import time
+
+
+# ------------------------------------------------------------------------------
+# Classify netlist lines into statements
+# ------------------------------------------------------------------------------
+def classify_line(line):
+    """Returns the kind of a single netlist line:
+    blank, comment, continuation, subckt, ends, control (other dot commands) or instance."""
+    stripped = line.lstrip()
+    if stripped == "":
+        return "blank"
+    if stripped[0] == "*":
+        return "comment"
+    if stripped[0] == "+":
+        return "continuation"
+    if stripped[0] == ".":
+        directive = stripped.split(None, 1)[0].lower()
+        if directive == ".subckt":
+            return "subckt"
+        if directive == ".ends":
+            return "ends"
+        return "control"
+    return "instance"
+
+
+def iter_statements(lines):
+    """Groups netlist lines into (kind, lines) statements in one pass.
+    A statement is a line followed by all of its "+" continuation lines.
+    Comment and blank lines between a statement and its continuations stay inside the statement."""
+    kind = None
+    statement = []
+    # comment/blank lines seen after the open statement, not known yet to be inside it
+    pending = []
+    for line in lines:
+        line_kind = classify_line(line)
+        if line_kind == "continuation":
+            if kind is None:
+                # dangling continuation, pass it through untouched
+                kind = "continuation"
+            statement.extend(pending)
+            pending = []
+            statement.append(line)
+        elif line_kind == "blank" or line_kind == "comment":
+            if kind is None:
+                yield line_kind, [line]
+            else:
+                pending.append(line)
+        else:
+            if kind is not None:
+                yield kind, statement
+                for other in pending:
+                    yield classify_line(other), [other]
+            kind = line_kind
+            statement = [line]
+            pending = []
+    if kind is not None:
+        yield kind, statement
+        for other in pending:
+            yield classify_line(other), [other]
+
+
+def statement_tokens(statement):
+    """Returns the whitespace separated tokens (pins, names, params) of a statement."""
+    tokens = []
+    for line in statement:
+        if classify_line(line) != "comment":
+            tokens.extend(line.lstrip("+").split())
+    return tokens
+
+
+def comment_statement(statement):
+    """Comments out every line of a statement."""
+    return [line if classify_line(line) == "comment" else "*" + line for line in statement]
+
+
+def transform_netlist(lines, rewrite):
+    """Streams the netlist lines through rewrite(kind, statement) -> list of lines.
+    Each line is classified exactly once, the output is produced in a single pass."""
+    for kind, statement in iter_statements(lines):
+        for line in rewrite(kind, statement):
+            yield line
+
+
+def transform_netlist_file(netlistPath, rewrite):
+    """Applies rewrite to the netlist at netlistPath and returns the result as a string."""
+    with open(netlistPath, "r") as spice_in:
+        lines = (line.rstrip("\n") for line in spice_in)
+        return "\n".join(transform_netlist(lines, rewrite)) + "\n"
+
+
+# ------------------------------------------------------------------------------
+# Rewriters used by process_prePEX_netlist and process_power_array_netlist
+# ------------------------------------------------------------------------------
+def any_token_contains(tokens, names):
+    """Returns true if one of names is a substring of one of tokens."""
+    for name in names:
+        for token in tokens:
+            if name in token:
+                return True
+    return False
+
+
+class PrePEXRewriter:
+    """Comments out the vref generator instances and adds VREF to the toplevel subckt def."""
+
+    removeIfFound = ["vref_gen_nmos_with_trim"]
+
+    def __init__(self):
+        self.added_vref = False
+
+    def __call__(self, kind, statement):
+        if kind == "instance" and any_token_contains(
+            statement_tokens(statement), self.removeIfFound
+        ):
+            return comment_statement(statement)
+        if not self.added_vref and kind != "comment":
+            # prepare toplevel subckt def (assumes VDD VSS last two in pin out)
+            for i, line in enumerate(statement):
+                if "VDD VSS" in line:
+                    statement = list(statement)
+                    statement[i] = line.replace("VDD VSS", "VDD VSS VREF", 1)
+                    self.added_vref = True
+                    break
+        return statement
+
+
+class PowerArrayRewriter:
+    """Comments out everything except the power array and ties the control word to VSS."""
+
+    keepIfFound = ["Xpt_array_unit"]
+
+    def __call__(self, kind, statement):
+        if kind == "subckt":
+            return [".SUBCKT ldoInst VREG VDD VSS"] + comment_statement(statement[1:])
+        if kind == "ends" or kind == "blank" or kind == "comment":
+            return statement
+        if kind == "control" and statement[0].lstrip().lower().startswith(".include"):
+            return statement
+        if not any_token_contains(statement_tokens(statement), self.keepIfFound):
+            return comment_statement(statement)
+        return [
+            " ".join(
+                "VSS" if "ctrl1.ctrl_word" in pin else pin for pin in line.split(" ")
+            )
+            if "ctrl1.ctrl_word" in line
+            else line
+            for line in statement
+        ]
+
+
+# ------------------------------------------------------------------------------
+# Benchmark on synthetic netlists
+# ------------------------------------------------------------------------------
+def synthetic_netlist(num_lines):
+    """Returns a synthetic LDO-like netlist with num_lines lines as a list of strings."""
+    lines = [
+        ".SUBCKT ldoInst VREF_IN clk cmp_out ctrl_out[0] ctrl_out[1] mode_sel[0]",
+        "+ mode_sel[1] reset std_ctrl_in trim1 trim2 VREG VDD VSS",
+    ]
+    i = 0
+    while len(lines) < num_lines - 1:
+        if i % 50 == 0:
+            lines.append(
+                "Xvref_gen_nmos_with_trim_{0} trim1 trim2 net{0}".format(i)
+            )
+            lines.append("+ VDD VSS vref_gen_nmos_with_trim")
+        elif i % 3 == 0:
+            lines.append(
+                "Xpt_array_unit[{0}] ctrl1.ctrl_word[{0}] VREG VDD VSS PT_UNIT_CELL".format(
+                    i
+                )
+            )
+        else:
+            lines.append(
+                "X_{0}_ net{0} net{1} VDD VSS sky130_fd_sc_hvl__inv_1".format(i, i + 1)
+            )
+        i += 1
+    lines.append(".ENDS")
+    return lines[:num_lines]
+
+
+def _replace_per_line(netlist):
+    """The previous implementation of process_prePEX_netlist (one str.replace per line), for comparison."""
+    for cell in netlist.split("\n"):
+        if cell != "" and any_token_contains(
+            cell.split(" "), PrePEXRewriter.removeIfFound
+        ):
+            netlist = netlist.replace(cell, "*" + cell)
+    return netlist.replace("VDD VSS", "VDD VSS VREF", 1)
+
+
+def benchmark(sizes, legacy_max_lines):
+    """Times the streaming transformer (and the previous per-line replace up to legacy_max_lines)."""
+    print("{:>10} {:>14} {:>14} {:>16}".format("lines", "stream [s]", "us/line", "replace [s]"))
+    for size in sizes:
+        lines = synthetic_netlist(size)
+        start = time.perf_counter()
+        "\n".join(transform_netlist(lines, PrePEXRewriter()))
+        "\n".join(transform_netlist(lines, PowerArrayRewriter()))
+        stream_time = time.perf_counter() - start
+        replace_time = "-"
+        if size <= legacy_max_lines:
+            netlist = "\n".join(lines)
+            start = time.perf_counter()
+            _replace_per_line(netlist)
+            replace_time = "{:.3f}".format(time.perf_counter() - start)
+        print(
+            "{:>10} {:>14.3f} {:>14.3f} {:>16}".format(
+                size, stream_time, 1e6 * stream_time / size, replace_time
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the streaming netlist transformer on synthetic netlists"
+    )
+    parser.add_argument(
+        "--lines",
+        type=int,
+        nargs="+",
+        default=[12500, 25000, 50000, 100000],
+        help="Netlist sizes (number of lines) to benchmark",
+    )
+    parser.add_argument(
+        "--legacy_max_lines",
+        type=int,
+        default=25000,
+        help="Largest netlist on which the previous per-line replace is also timed",
+    )
+    args = parser.parse_args()
+    benchmark(args.lines, args.legacy_max_lines)
@@ -0,0 +1,141 @@
+# Parse-once waveform store for LDO simulation results
+import os
+
+import ltspice
+import numpy as np
+import pandas as pd
+
+# Parquet export is only available when pyarrow is installed
+try:
+    import pyarrow
+
+    PARQUET_SUPPORTED = True
+except ImportError:
+    PARQUET_SUPPORTED = False
+
+# vectors used by the LDO post processing figures and metrics
+TRAN_VECTORS = ["v(vreg)", "v(vref)", "v(cmp_out)"] + [
+    "v(ctrl_out[" + str(i) + "])" for i in range(9)
+]
+DC_VECTORS = ["i(r1)", "v(vref)", "v(vreg)"]
+LOAD_CHANGE_VECTORS = ["v(vreg)"]
+
+# .npz keys holding the state of the raw file the cache was created from
+_SOURCE_MTIME = "__source_mtime"
+_SOURCE_SIZE = "__source_size"
+
+
+class WaveformStore:
+    """Parses each raw file exactly once and keeps only the requested vectors as NumPy arrays.
+    The time (or sweep) axis is always stored under "time".
+    If cache_dir is set, the vectors are also saved to <cache_dir>/<raw name>.npz and reused
+    as long as the raw file is unchanged (same size and modification time)."""
+
+    def __init__(self, vectors=TRAN_VECTORS, cache_dir=None):
+        self.vectors = list(vectors)
+        self.cache_dir = cache_dir
+        self._waveforms = dict()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, raw_file, vectors=None):
+        """Returns a dictionary {vector name: np.ndarray} for raw_file."""
+        vectors = self.vectors if vectors is None else list(vectors)
+        key = os.path.abspath(raw_file)
+        waveforms = self._waveforms.get(key)
+        if waveforms is None or not all(v in waveforms for v in vectors + ["time"]):
+            if waveforms is not None:
+                # keep the vectors already loaded for this raw file
+                vectors = vectors + [v for v in waveforms if v not in vectors and v != "time"]
+            waveforms = self._load(raw_file, vectors)
+            self._waveforms[key] = waveforms
+        return waveforms
+
+    def __getitem__(self, raw_file):
+        return self.get(raw_file)
+
+    def _cache_path(self, raw_file):
+        return os.path.join(self.cache_dir, os.path.basename(raw_file) + ".npz")
+
+    def _load(self, raw_file, vectors):
+        """Loads the vectors from the .npz cache when valid, otherwise parses the raw file."""
+        stat = os.stat(raw_file)
+        if self.cache_dir is not None and os.path.isfile(self._cache_path(raw_file)):
+            with np.load(self._cache_path(raw_file)) as cached:
+                if (
+                    cached[_SOURCE_MTIME] == stat.st_mtime
+                    and cached[_SOURCE_SIZE] == stat.st_size
+                    and all(v in cached.files for v in vectors + ["time"])
+                ):
+                    return {
+                        name: cached[name]
+                        for name in cached.files
+                        if not name.startswith("__")
+                    }
+        waveforms = parse_raw(raw_file, vectors)
+        if self.cache_dir is not None:
+            np.savez(
+                self._cache_path(raw_file),
+                **waveforms,
+                **{_SOURCE_MTIME: stat.st_mtime, _SOURCE_SIZE: stat.st_size}
+            )
+        return waveforms
+
+
+def parse_raw(raw_file, vectors):
+    """Parses a raw file once and returns the time axis and the requested vectors as a dictionary."""
+    data = ltspice.Ltspice(raw_file)
+    data.parse()
+    waveforms = dict()
+    waveforms["time"] = np.array(data.get_x())
+    for name in vectors:
+        vector = data.get_data(name)
+        if vector is None:
+            raise KeyError(name + " is not a vector of " + str(raw_file))
+        waveforms[name] = np.array(vector)
+    return waveforms
+
+
+# ------------------------------------------------------------------------------
+# Columnar export of waveforms
+# ------------------------------------------------------------------------------
+def decimate(signals, every=1, time_window=None):
+    """Keeps every Nth point of all signals, optionally only inside time_window=(start, stop).
+    signals is a dictionary of equal length arrays with the time axis under "time"."""
+    keep = np.ones(len(signals["time"]), dtype=bool)
+    if time_window is not None:
+        keep &= (signals["time"] >= time_window[0]) & (signals["time"] <= time_window[1])
+    indices = np.flatnonzero(keep)[:: max(1, int(every))]
+    return {name: np.asarray(signal)[indices] for name, signal in signals.items()}
+
+
+def export_signals(signals, path, fmt="auto"):
+    """Writes signals (dictionary of equal length arrays) to path + ".parquet" or ".npz".
+    fmt is "parquet", "npz" or "auto" (Parquet when pyarrow is importable). Returns the file path."""
+    if fmt == "auto":
+        fmt = "parquet" if PARQUET_SUPPORTED else "npz"
+    if fmt == "parquet":
+        if not PARQUET_SUPPORTED:
+            raise ImportError("Parquet export requires pyarrow")
+        pd.DataFrame(signals).to_parquet(path + ".parquet", index=False)
+        return path + ".parquet"
+    elif fmt == "npz":
+        np.savez(path + ".npz", **signals)
+        return path + ".npz"
+    raise ValueError("Unsupported export format: " + str(fmt))
+
+
+def load_signals(path, names=None):
+    """Reads the signals in names (all signals if None) from a .npz or .parquet export.
+    Only the requested signals are read from the file."""
+    if path.endswith(".parquet"):
+        data = pd.read_parquet(path, columns=names)
+        return {name: data[name].to_numpy() for name in data.columns}
+    with np.load(path) as data:
+        names = data.files if names is None else names
+        return {name: data[name] for name in names}
+
+
+def load_signal(path, name):
+    """Reads a single signal from a .npz or .parquet export."""
+    return load_signals(path, [name])[name]
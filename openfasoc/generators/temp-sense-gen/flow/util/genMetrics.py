@@ -5,14 +5,21 @@
 # information in specific files using regular expressions
 # -----------------------------------------------------------------------------
 
+import mmap
 import os
+import shutil
+import tempfile
 from sys import exit
 from datetime import datetime, timedelta
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from uuid import uuid4 as uuid
 from subprocess import check_output, call, STDOUT
+from time import perf_counter
 
 import argparse
+import hashlib
 import json
 import pandas as pd
 import re
@@ -64,6 +71,42 @@ def parse_args():
         "--output", "-o", required=False, default="metadata.json", help="Output file"
     )
     parser.add_argument("--hier", "-x", action="store_true", help="Hierarchical JSON")
+    parser.add_argument(
+        "--benchmark",
+        "-b",
+        type=int,
+        metavar="REPEAT",
+        help="Time the extraction with one read per tag and one read per file "
+        "on the logs and reports of the design repeated REPEAT times",
+    )
+    parser.add_argument(
+        "--stamp",
+        "-s",
+        required=False,
+        default=None,
+        help="JSON file keeping the openroad version and the git commits "
+        "between runs, they are only resolved again when they change",
+    )
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        action="store_true",
+        help="Reuse the output of the last extraction of a design if its logs, "
+        "reports and the tool versions did not change",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Number of designs extracted in parallel. Default: number of CPUs",
+    )
+    parser.add_argument(
+        "--rows",
+        action="store_true",
+        help="One row per design instead of one column per design in the "
+        "summary (metrics.html and metrics.csv)",
+    )
     args = parser.parse_args()
 
     if not os.path.isdir(args.flowPath):
@@ -96,6 +139,7 @@ def extractTagFromFile(
     defaultNotFound="N/A",
     t=str,
     required=True,
+    scanner=None,
 ):
     if jsonTag in jsonFile:
         print("[WARN] Overwriting Tag", jsonTag)
@@ -103,10 +147,13 @@ def extractTagFromFile(
     # Open file
     try:
         searchFilePath = os.path.join(args.flowPath, file)
-        with open(searchFilePath) as f:
-            content = f.read()
+        if scanner is None:
+            with open(searchFilePath) as f:
+                content = f.read()
 
-        parsedMetrics = re.findall(pattern, content, re.M)
+            parsedMetrics = re.findall(pattern, content, re.M)
+        else:
+            parsedMetrics = scanner.findall(searchFilePath, pattern)
 
         patternNotFound = len(parsedMetrics) < abs(occurrence)
         if patternNotFound and not required:
@@ -137,25 +184,236 @@ def extractTagFromFile(
         jsonFile[jsonTag] = "ERR"
 
 
-def extractGnuTime(prefix, jsonFile, file):
+def extractGnuTime(prefix, jsonFile, file, extract=extractTagFromFile):
 
-    extractTagFromFile(
+    extract(
         prefix + "__runtime__total",
         jsonFile,
         "^Elapsed time: (\S+)\[h:\]min:sec.*",
         file,
     )
-    extractTagFromFile(
+    extract(
         prefix + "__cpu__total",
         jsonFile,
         "^Elapsed time:.*CPU time: user (\S+) .*",
         file,
     )
-    extractTagFromFile(
+    extract(
         prefix + "__mem__peak", jsonFile, "^Elapsed time:.*Peak memory: (\S+)KB.", file
     )
 
 
+# Single-read extraction
+# =============================================================================
+# The tags of a design come from a few logs and reports, with many patterns
+# per file. A TagScanner collects the tags of a design, then reads every file
+# once and tries each pattern only where its literal prefix (e.g. "Elapsed
+# time:") occurs in the file, which gives the same matches as re.findall
+# without scanning the whole file once per tag.
+
+# files from this size on are memory-mapped instead of read into a string
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+# regular expression syntax, a literal prefix stops at the first one
+REGEX_SPECIAL = ".^$*+?{}[]|()\\"
+
+
+def literalPrefix(pattern):
+    # returns the literal text every match of the pattern starts with ("" if
+    # there is none) and whether the pattern ignores case
+    ignoreCase = pattern.startswith("(?i)")
+    if ignoreCase:
+        pattern = pattern[4:]
+    if pattern.startswith("^"):
+        pattern = pattern[1:]
+    prefix = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            char = pattern[i + 1]
+            end = i + 2
+        elif char in REGEX_SPECIAL:
+            break
+        else:
+            end = i + 1
+        # a quantifier makes the last character optional or repeated
+        if pattern[end : end + 1] in ("*", "+", "?", "{"):
+            break
+        prefix += char
+        i = end
+    # an alternation can match without the prefix
+    escaped = False
+    for char in pattern:
+        if char == "|" and not escaped:
+            return "", ignoreCase
+        escaped = char == "\\" and not escaped
+    # non-ASCII characters may match other characters when the case is ignored
+    if ignoreCase and not prefix.isascii():
+        return "", ignoreCase
+    return prefix, ignoreCase
+
+
+def readContent(path):
+    # returns the content of a file: a string, or a memory map of its bytes
+    # for large ASCII files without carriage returns (the bytes are then the
+    # same as the string read in text mode)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            binary = content.find(b"\r") < 0
+            for start in range(0, len(content), MMAP_THRESHOLD):
+                if not binary:
+                    break
+                binary = content[start : start + MMAP_THRESHOLD].isascii()
+            if binary:
+                return content
+            content.close()
+    with open(path) as f:
+        return f.read()
+
+
+def findallValue(match, binary):
+    # the item re.findall returns for a match
+    groups = match.groups(b"" if binary else "")
+    if binary:
+        groups = tuple(group.decode("ascii") for group in groups)
+    if len(groups) == 0:
+        value = match.group(0)
+        return value.decode("ascii") if binary else value
+    if len(groups) == 1:
+        return groups[0]
+    return groups
+
+
+def findPatterns(content, patterns):
+    # returns {pattern: re.findall(pattern, content, re.M)} for all the patterns
+    binary = not isinstance(content, str)
+    lowered = None
+    positions = {}
+    matches = {}
+    for pattern in patterns:
+        if binary and not pattern.isascii():
+            matches[pattern] = re.findall(pattern, content[:].decode("ascii"), re.M)
+            continue
+        regex = re.compile(pattern.encode("ascii") if binary else pattern, re.M)
+        prefix, ignoreCase = literalPrefix(pattern)
+        if not prefix or (ignoreCase and not binary and not content.isascii()):
+            matches[pattern] = [
+                findallValue(match, binary) for match in regex.finditer(content)
+            ]
+            continue
+
+        # start of every occurrence of the prefix, patterns with the same
+        # prefix share them
+        if (prefix, ignoreCase) not in positions:
+            haystack = content
+            needle = prefix.encode("ascii") if binary else prefix
+            if ignoreCase:
+                if lowered is None:
+                    lowered = content[:].lower()
+                haystack = lowered
+                needle = needle.lower()
+            found = []
+            pos = haystack.find(needle)
+            while pos >= 0:
+                found.append(pos)
+                pos = haystack.find(needle, pos + 1)
+            positions[(prefix, ignoreCase)] = found
+
+        # like re.findall, the next match starts after the end of the last one
+        values = []
+        end = 0
+        for pos in positions[(prefix, ignoreCase)]:
+            if pos < end:
+                continue
+            match = regex.match(content, pos)
+            if match:
+                values.append(findallValue(match, binary))
+                end = match.end()
+        matches[pattern] = values
+    return matches
+
+
+class FileScan:
+    # the patterns searched in one file, the file is read once by the first
+    # findall
+
+    def __init__(self, path):
+        self.path = path
+        self.patterns = []
+        self.matches = None
+        self.error = None
+
+    def register(self, pattern):
+        if pattern not in self.patterns:
+            self.patterns.append(pattern)
+
+    def findall(self, pattern):
+        # same result as re.findall(pattern, <file content>, re.M), raises
+        # IOError if the file can not be read
+        if self.matches is None:
+            self.matches = {}
+            try:
+                content = readContent(self.path)
+            except IOError as error:
+                self.error = error
+            else:
+                try:
+                    self.matches = findPatterns(content, self.patterns)
+                finally:
+                    if not isinstance(content, str):
+                        content.close()
+        if self.error is not None:
+            raise self.error
+        return self.matches[pattern]
+
+
+class TagScanner:
+    # collects the tags of a design, run() extracts all of them with a single
+    # read of every file. With singleRead=False every tag is extracted right
+    # away by reading its file again (kept to compare both in the benchmark)
+
+    def __init__(self, singleRead=True):
+        self.singleRead = singleRead
+        self.files = {}
+        self.tags = []
+
+    def findall(self, path, pattern):
+        return self.files[path].findall(pattern)
+
+    def extractTagFromFile(self, jsonTag, jsonFile, pattern, file, **kwargs):
+        if not self.singleRead:
+            extractTagFromFile(jsonTag, jsonFile, pattern, file, **kwargs)
+            return
+        if jsonTag in jsonFile:
+            print("[WARN] Overwriting Tag", jsonTag)
+        searchFilePath = os.path.join(args.flowPath, file)
+        if searchFilePath not in self.files:
+            self.files[searchFilePath] = FileScan(searchFilePath)
+        self.files[searchFilePath].register(pattern)
+        # keeps the position of the tag in jsonFile until run() sets its value
+        placeholder = object()
+        jsonFile[jsonTag] = placeholder
+        self.tags.append((jsonTag, jsonFile, pattern, file, kwargs, placeholder))
+
+    def extractGnuTime(self, prefix, jsonFile, file):
+        extractGnuTime(prefix, jsonFile, file, extract=self.extractTagFromFile)
+
+    def run(self):
+        # sets the values of the collected tags, a tag written again since it
+        # was collected (e.g. by merge_jsons) keeps the new value
+        for jsonTag, jsonFile, pattern, file, kwargs, placeholder in self.tags:
+            value = {}
+            extractTagFromFile(
+                jsonTag, value, pattern, file, scanner=self, **kwargs
+            )
+            if jsonFile.get(jsonTag) is placeholder:
+                jsonFile[jsonTag] = value[jsonTag]
+        self.files = {}
+        self.tags = []
+
+
 #
 # Extract Clock Latency, Skew numbers
 # Need to extract these from native json
@@ -240,6 +498,112 @@ def is_git_repo(folder=None):
         return call(cmd, stderr=STDOUT, stdout=open(os.devnull, "w")) == 0
 
 
+# Tool versions and commits
+# =============================================================================
+# They are the same for all the designs of a run, so they are resolved once
+# per process (the worker processes get them from the main process). They can
+# also be kept between runs in a JSON stamp file, where every value is keyed by
+# the path and modification time of the openroad binary or of the reflog of the
+# git repository it comes from.
+
+flowVersions = {}
+
+
+def file_key(path):
+    # [path, modification time] of a file, None if it does not exist
+    if path is None or not os.path.isfile(path):
+        return None
+    return [os.path.abspath(path), os.path.getmtime(path)]
+
+
+def git_key(folder):
+    # file_key of the HEAD reflog of the git repository containing folder, it
+    # changes with every commit, checkout and pull. None outside of a repository
+    folder = os.path.abspath(folder)
+    while True:
+        gitDir = os.path.join(folder, ".git")
+        if os.path.isfile(gitDir):
+            # worktree or submodule: .git points to the git directory
+            with open(gitDir) as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                gitDir = os.path.join(folder, content[len("gitdir:") :].strip())
+        if os.path.isdir(gitDir):
+            return file_key(os.path.join(gitDir, "logs", "HEAD"))
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return None
+        folder = parent
+
+
+def openroad_version():
+    cmdOutput = check_output(["openroad", "-version"])
+    cmdFields = [x.decode("utf-8") for x in cmdOutput.split()]
+    if len(cmdFields) > 1:
+        return [str(cmdFields[0]), str(cmdFields[1])]
+    return [str(cmdFields[0]), "N/A"]
+
+
+def scripts_commit():
+    if is_git_repo():
+        cmdOutput = check_output(["git", "rev-parse", "HEAD"])
+        return cmdOutput.decode("utf-8").strip()
+    cmdOutput = "not a git repo"
+    print("[WARN]", cmdOutput)
+    return cmdOutput
+
+
+def platform_commit(platformDir):
+    if platformDir is None:
+        print("[INFO]", "PLATFORM_DIR env variable not set")
+        return "N/A"
+    if is_git_repo(folder=platformDir):
+        cmdOutput = check_output(["git", "rev-parse", "HEAD"], cwd=platformDir)
+        return cmdOutput.decode("utf-8").strip()
+    print("[WARN]", "not a git repo")
+    return "N/A"
+
+
+def get_flow_versions(stamp=None):
+    # returns the openroad version and the scripts and platform commits of the
+    # run, 'stamp' is the optional JSON file they are kept in between runs
+    if flowVersions:
+        return flowVersions
+
+    saved = {}
+    if stamp is not None and os.path.isfile(stamp):
+        try:
+            with open(stamp) as f:
+                saved = json.load(f)
+        except ValueError:
+            print("[WARN] Ignoring the invalid stamp file", stamp)
+
+    platformDir = os.environ.get("PLATFORM_DIR")
+    sources = {
+        "openroad": (file_key(shutil.which("openroad")), openroad_version),
+        "scripts": (git_key(os.getcwd()), scripts_commit),
+        "platform": (
+            None if platformDir is None else git_key(platformDir),
+            lambda: platform_commit(platformDir),
+        ),
+    }
+    for name, (key, resolve) in sources.items():
+        entry = saved.get(name)
+        if key is not None and entry is not None and entry.get("key") == key:
+            flowVersions[name] = entry["value"]
+        else:
+            flowVersions[name] = resolve()
+            saved[name] = {"key": key, "value": flowVersions[name]}
+
+    if stamp is not None:
+        # concurrent runs may share the stamp file, it is replaced at once
+        tmpFile = "{}.{}.tmp".format(stamp, os.getpid())
+        with open(tmpFile, "w") as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmpFile, stamp)
+    return flowVersions
+
+
 def merge_jsons(root_path, output):
     paths = glob(os.path.join(root_path, "*.json"))
     print(root_path, paths)
@@ -250,44 +614,41 @@ def merge_jsons(root_path, output):
         file.close()
 
 
-def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
+def metrics_table(metrics_dict):
+    metrics_df = pd.DataFrame(list(metrics_dict.items()))
+    col_index = metrics_df.iloc[0][1] + "__" + metrics_df.iloc[1][1]
+    metrics_df.columns = ["Metrics", col_index]
+    return metrics_df
+
+
+def extract_metrics(
+    cwd,
+    platform,
+    design,
+    flow_variant,
+    output,
+    hier_json,
+    singleRead=True,
+    manifest=None,
+):
     baseRegEx = "^{}\n^-*\n^{}"
+    scanner = TagScanner(singleRead)
 
     logPath = os.path.join(cwd, "logs", platform, design, flow_variant)
     rptPath = os.path.join(cwd, "reports", platform, design, flow_variant)
     resultPath = os.path.join(cwd, "results", platform, design, flow_variant)
 
     metrics_dict = defaultdict(dict)
+    versions = get_flow_versions(args.stamp)
     metrics_dict["run__flow__generate_date"] = now.strftime("%Y-%m-%d %H:%M")
     metrics_dict["run__flow__metrics_version"] = "Metrics_2.1.2"
-    cmdOutput = check_output(["openroad", "-version"])
-    cmdFields = [x.decode("utf-8") for x in cmdOutput.split()]
-    metrics_dict["run__flow__openroad_version"] = str(cmdFields[0])
-    if len(cmdFields) > 1:
-        metrics_dict["run__flow__openroad_commit"] = str(cmdFields[1])
-    else:
-        metrics_dict["run__flow__openroad_commit"] = "N/A"
-    if is_git_repo():
-        cmdOutput = check_output(["git", "rev-parse", "HEAD"])
-        cmdOutput = cmdOutput.decode("utf-8").strip()
-    else:
-        cmdOutput = "not a git repo"
-        print("[WARN]", cmdOutput)
-    metrics_dict["run__flow__scripts_commit"] = cmdOutput
+    metrics_dict["run__flow__openroad_version"] = versions["openroad"][0]
+    metrics_dict["run__flow__openroad_commit"] = versions["openroad"][1]
+    metrics_dict["run__flow__scripts_commit"] = versions["scripts"]
     metrics_dict["run__flow__uuid"] = str(uuid())
     metrics_dict["run__flow__design"] = design
     metrics_dict["run__flow__platform"] = platform
-    platformDir = os.environ.get("PLATFORM_DIR")
-    if platformDir is None:
-        print("[INFO]", "PLATFORM_DIR env variable not set")
-        cmdOutput = "N/A"
-    elif is_git_repo(folder=platformDir):
-        cmdOutput = check_output(["git", "rev-parse", "HEAD"], cwd=platformDir)
-        cmdOutput = cmdOutput.decode("utf-8").strip()
-    else:
-        print("[WARN]", "not a git repo")
-        cmdOutput = "N/A"
-    metrics_dict["run__flow__platform_commit"] = cmdOutput
+    metrics_dict["run__flow__platform_commit"] = versions["platform"]
     metrics_dict["run__flow__variant"] = flow_variant
 
     merge_jsons(logPath, metrics_dict)
@@ -295,21 +656,21 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
     # Synthesis
     # =========================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "synth__design__instance__count__stdcell",
         metrics_dict,
         "Number of cells: +(\S+)",
         rptPath + "/synth_stat.txt",
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "synth__design__instance__area__stdcell",
         metrics_dict,
         "Chip area for module.*: +(\S+)",
         rptPath + "/synth_stat.txt",
     )
 
-    extractGnuTime("synth", metrics_dict, logPath + "/1_1_yosys.log")
+    scanner.extractGnuTime("synth", metrics_dict, logPath + "/1_1_yosys.log")
 
     # Clocks
     # =========================================================================
@@ -321,13 +682,13 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
     # Floorplan
     # =========================================================================
 
-    extractGnuTime("floorplan", metrics_dict, logPath + "/2_4_mplace.log")
+    scanner.extractGnuTime("floorplan", metrics_dict, logPath + "/2_4_mplace.log")
 
     # Place
     # =========================================================================
 
-    extractGnuTime("placeopt", metrics_dict, logPath + "/3_4_resizer.log")
-    extractTagFromFile(
+    scanner.extractGnuTime("placeopt", metrics_dict, logPath + "/3_4_resizer.log")
+    scanner.extractTagFromFile(
         "detailedplace__design__violations",
         metrics_dict,
         "^\[INFO FLW-0012\] Placement violations (\S+).",
@@ -335,12 +696,12 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
         defaultNotFound=0,
     )
 
-    extractGnuTime("detailedplace", metrics_dict, logPath + "/3_5_opendp.log")
+    scanner.extractGnuTime("detailedplace", metrics_dict, logPath + "/3_5_opendp.log")
 
     # CTS
     # =======================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "cts__design__instance__count__setup_buffer",
         metrics_dict,
         "Inserted (\d+) buffers",
@@ -348,7 +709,7 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
         defaultNotFound=0,
     )
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "cts__design__instance__count__hold_buffer",
         metrics_dict,
         "Inserted (\d+) hold buffers",
@@ -358,7 +719,7 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
     # Global Route
     # =========================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "globalroute__timing__clock__slack",
         metrics_dict,
         "^\[INFO FLW-....\] Clock .* slack (\S+)",
@@ -368,26 +729,28 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
     # Finish
     # =========================================================================
 
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__timing__drv__setup_violation_count",
         metrics_dict,
         baseRegEx.format("finish setup_violation_count", "setup violation count (\S+)"),
         logPath + "/6_report.log",
     )
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__timing__drv__hold_violation_count",
         metrics_dict,
         baseRegEx.format("finish hold_violation_count", "hold violation count (\S+)"),
         logPath + "/6_report.log",
     )
-    extractTagFromFile(
+    scanner.extractTagFromFile(
         "finish__timing__wns_percent_delay",
         metrics_dict,
         baseRegEx.format("finish slack div critical path delay", "(\S+)"),
         logPath + "/6_report.log",
     )
 
-    extractGnuTime("finish", metrics_dict, logPath + "/6_report.log")
+    scanner.extractGnuTime("finish", metrics_dict, logPath + "/6_report.log")
+
+    scanner.run()
 
     # Accumulate time
     # =========================================================================
@@ -425,9 +788,10 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
     else:
         metrics_dict["total_time"] = str(total)
 
-    metrics_df = pd.DataFrame(list(metrics_dict.items()))
-    col_index = metrics_df.iloc[0][1] + "__" + metrics_df.iloc[1][1]
-    metrics_df.columns = ["Metrics", col_index]
+    metrics_df = metrics_table(metrics_dict)
+    if manifest is not None:
+        # the summary of the design is built again from them when it is reused
+        manifest["metrics"] = list(metrics_dict.items())
 
     if hier_json:
         # Convert the Metrics dictionary to hierarchical format by stripping
@@ -445,47 +809,259 @@ def extract_metrics(cwd, platform, design, flow_variant, output, hier_json):
     return metrics_dict, metrics_df
 
 
-args = parse_args()
-now = datetime.now()
+# Incremental extraction
+# =============================================================================
+# With --incremental, the metrics of a design are only extracted again when its
+# logs, reports or JSON files, the tool versions or the options changed. A
+# manifest next to the output records the path, size, modification time and
+# hash of every input file, files whose size and modification time did not
+# change are not hashed again.
+
+
+def manifest_file(output):
+    return os.path.splitext(output)[0] + "-manifest.json"
+
+
+def file_state(path, previous=None):
+    # [path, size, modification time, sha256] of a file, the hash is taken
+    # from the previous state if the size and modification time are the same
+    stat = os.stat(path)
+    if previous is not None and previous[1:3] == [stat.st_size, stat.st_mtime]:
+        return [path, stat.st_size, stat.st_mtime, previous[3]]
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return [path, stat.st_size, stat.st_mtime, sha.hexdigest()]
+
+
+def same_content(states, previousStates):
+    # the paths, sizes and hashes are the same (the files may have been touched)
+    return [(x[0], x[1], x[3]) for x in states] == [
+        (x[0], x[1], x[3]) for x in previousStates
+    ]
+
+
+def design_inputs(logPath, rptPath, resultPath, output):
+    # the files extract_metrics may read: all the files of the log and report
+    # directories of the design (a new file can change the metrics) and the SDC
+    skip = [os.path.abspath(output), os.path.abspath(manifest_file(output))]
+    paths = []
+    for dirPath in [logPath, rptPath]:
+        if not os.path.isdir(dirPath):
+            continue
+        for name in sorted(os.listdir(dirPath)):
+            path = os.path.join(dirPath, name)
+            if os.path.isfile(path) and os.path.abspath(path) not in skip:
+                paths.append(path)
+    sdc = os.path.join(resultPath, "2_floorplan.sdc")
+    if os.path.isfile(sdc):
+        paths.append(sdc)
+    return paths
+
+
+def extract_metrics_incremental(cwd, platform, design, flow_variant, output, hier_json):
+    # same as extract_metrics, the metrics written to output by the last
+    # extraction are reused if nothing changed since then
+    logPath = os.path.join(cwd, "logs", platform, design, flow_variant)
+    rptPath = os.path.join(cwd, "reports", platform, design, flow_variant)
+    resultPath = os.path.join(cwd, "results", platform, design, flow_variant)
+    manifestFile = manifest_file(output)
+    options = {"hier": hier_json, "versions": get_flow_versions(args.stamp)}
 
-if args.design == "all_designs":
-    print("List of designs")
-    rootdir = "./logs"
+    previous = None
+    try:
+        with open(manifestFile) as f:
+            previous = json.load(f)
+    except (IOError, ValueError):
+        pass
+    previousInputs = {}
+    if previous is not None:
+        previousInputs = {state[0]: state for state in previous["inputs"]}
+    inputs = [
+        file_state(path, previousInputs.get(path))
+        for path in design_inputs(logPath, rptPath, resultPath, output)
+    ]
+
+    if (
+        previous is not None
+        and previous["options"] == options
+        and same_content(inputs, previous["inputs"])
+        and os.path.isfile(output)
+        and same_content(
+            [file_state(output, previous["output"])], [previous["output"]]
+        )
+    ):
+        print("[INFO] Inputs of {} unchanged, reusing {}".format(design, output))
+        with open(output) as f:
+            metrics_dict = json.load(f)
+        metrics_df = metrics_table(dict(previous["metrics"]))
+        manifest = previous
+    else:
+        manifest = {"options": options}
+        metrics_dict, metrics_df = extract_metrics(
+            cwd, platform, design, flow_variant, output, hier_json, manifest=manifest
+        )
 
-    all_df = pd.DataFrame()
-    all_d = []
-    flow_variants = args.flowVariant.split()
+    # the states of touched files are updated, they are not hashed next time
+    manifest["inputs"] = inputs
+    manifest["output"] = file_state(output)
+    with open(manifestFile, "w") as f:
+        json.dump(manifest, f, indent=2)
 
-    cwd = os.getcwd()
-    for platform_it in os.scandir(rootdir):
-        if not platform_it.is_dir():
-            continue
-        plt = platform_it.name
-        for design_it in os.scandir(platform_it.path):
-            if not design_it.is_dir():
+    return metrics_dict, metrics_df
+
+
+def benchmark(cwd, platform, design, flow_variant, repeat):
+    # times extract_metrics with one read per tag and with one read per file on
+    # a copy of the logs and reports of a design whose content is repeated
+    # 'repeat' times, and checks that both give the same metadata
+    times = {}
+    metadata = {}
+    with tempfile.TemporaryDirectory() as tmpDir:
+        size = 0
+        for dirName in ["logs", "reports", "results"]:
+            src = os.path.join(cwd, dirName, platform, design, flow_variant)
+            dst = os.path.join(tmpDir, dirName, platform, design, flow_variant)
+            if not os.path.isdir(src):
+                continue
+            shutil.copytree(src, dst)
+            if dirName == "results":
                 continue
-            for variant in flow_variants:
-                des = design_it.name
-                print(plt, des, variant)
-                file = "/".join(["reports", plt, des, variant, "metrics.json"])
-                metrics, df = extract_metrics(cwd, plt, des, variant, file, args.hier)
-                all_d.append(metrics)
-                if all_df.shape[0] == 0:
-                    all_df = df
-                else:
-                    all_df = all_df.merge(df, on="Metrics", how="inner")
-
-    with open("metrics.json", "w") as outFile:
-        json.dump(all_d, outFile, indent=2)
-
-    with open("metrics.html", "w") as f:
-        f.write(all_df.to_html())
-else:
-    metrics_dict, metrics_df = extract_metrics(
-        args.flowPath,
-        args.platform,
-        args.design,
-        args.flowVariant,
-        args.output,
-        args.hier,
+            for path in glob(os.path.join(dst, "*")):
+                if not os.path.isfile(path) or path.endswith(".json"):
+                    continue
+                with open(path) as f:
+                    content = f.read()
+                with open(path, "w") as f:
+                    f.write(content * repeat)
+                size += len(content) * repeat
+
+        for singleRead in [False, True]:
+            output = os.path.join(tmpDir, "metadata_{}.json".format(singleRead))
+            start = perf_counter()
+            extract_metrics(
+                tmpDir, platform, design, flow_variant, output, False, singleRead
+            )
+            times[singleRead] = perf_counter() - start
+            with open(output) as f:
+                metrics = json.load(f)
+            # the only metrics that change from one run to the other
+            for key in ["run__flow__uuid", "run__flow__generate_date"]:
+                metrics.pop(key, None)
+            metadata[singleRead] = list(metrics.items())
+
+    print(
+        "[INFO] {:.1f} MB of logs and reports:".format(size / 1e6),
+        "{:.3f} s with one read per tag,".format(times[False]),
+        "{:.3f} s with one read per file ({:.1f}x)".format(
+            times[True], times[False] / times[True]
+        ),
     )
+    if metadata[False] != metadata[True]:
+        print("[ERROR] The metadata of both extractions is different")
+        exit(1)
+
+def init_worker(mainArgs, mainNow, mainVersions):
+    # the worker processes extract the metrics with the arguments, the date and
+    # the tool versions of the main process
+    global args, now
+    args = mainArgs
+    now = mainNow
+    flowVersions.update(mainVersions)
+
+
+def extract_design_metrics(cwd, design, hier_json):
+    # extracts the metrics of one (platform, design, variant) in a worker
+    # process, they are also written to the metrics.json of the design
+    plt, des, variant = design
+    file = "/".join(["reports", plt, des, variant, "metrics.json"])
+    if args.incremental:
+        return extract_metrics_incremental(cwd, plt, des, variant, file, hier_json)
+    return extract_metrics(cwd, plt, des, variant, file, hier_json)
+
+
+def summary_table(designs, dfs, rows):
+    # one column per design with the metrics found in all the designs, or one
+    # row per design with all the metrics (for sweeps of many variants). The
+    # column of every design is named after the design, the column names of
+    # extract_metrics (date and version) are the same for all of them
+    if not dfs:
+        return pd.DataFrame()
+    columns = [
+        df.set_index("Metrics").iloc[:, 0].rename("__".join(design))
+        for design, df in zip(designs, dfs)
+    ]
+    if rows:
+        table = pd.DataFrame(columns)
+        table.index = pd.MultiIndex.from_tuples(
+            designs, names=["platform", "design", "variant"]
+        )
+        return table
+    table = pd.concat(columns, axis=1, join="inner")
+    return table.rename_axis("Metrics").reset_index()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    now = datetime.now()
+
+    if args.benchmark:
+        benchmark(
+            args.flowPath, args.platform, args.design, args.flowVariant, args.benchmark
+        )
+    elif args.design == "all_designs":
+        print("List of designs")
+        rootdir = "./logs"
+
+        flow_variants = args.flowVariant.split()
+
+        cwd = os.getcwd()
+        found = []
+        for platform_it in os.scandir(rootdir):
+            if not platform_it.is_dir():
+                continue
+            plt = platform_it.name
+            for design_it in os.scandir(platform_it.path):
+                if not design_it.is_dir():
+                    continue
+                for variant in flow_variants:
+                    des = design_it.name
+                    print(plt, des, variant)
+                    found.append((plt, des, variant))
+
+        # the designs are independent, the summary is built once all of them
+        # are extracted
+        with ProcessPoolExecutor(
+            max_workers=args.jobs,
+            initializer=init_worker,
+            initargs=(args, now, get_flow_versions(args.stamp)),
+        ) as pool:
+            results = list(
+                pool.map(
+                    extract_design_metrics,
+                    repeat(cwd),
+                    found,
+                    repeat(args.hier),
+                )
+            )
+        all_d = [metrics for metrics, df in results]
+        all_df = summary_table(found, [df for metrics, df in results], args.rows)
+
+        with open("metrics.json", "w") as outFile:
+            json.dump(all_d, outFile, indent=2)
+
+        with open("metrics.html", "w") as f:
+            f.write(all_df.to_html())
+        if args.rows:
+            all_df.to_csv("metrics.csv")
+    else:
+        extract = extract_metrics_incremental if args.incremental else extract_metrics
+        metrics_dict, metrics_df = extract(
+            args.flowPath,
+            args.platform,
+            args.design,
+            args.flowVariant,
+            args.output,
+            args.hier,
+        )
@@ -0,0 +1,213 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# columns holding the simulated values, every other column of a model file identifies the design (inv, header, ...)
+VALUE_COLUMNS = ["Temp", "Frequency", "Power", "Error"]
+
+
+class DesignModel:
+    """a temperature sensor model loaded once into NumPy arrays indexed by (design, temp)
+    designs is a DataFrame with one row per design (inv, header and the other identifying columns of the model file)
+    temps is the sorted array of the simulated temperatures
+    frequency, power and error are arrays of shape (len(designs), len(temps)), NaN where a point was not simulated"""
+
+    def __init__(self, designs, temps, frequency, power, error):
+        self.designs = designs.reset_index(drop=True)
+        self.temps = temps
+        self.frequency = frequency
+        self.power = power
+        self.error = error
+
+    @classmethod
+    def from_dataframe(cls, df):
+        design_columns = [c for c in df.columns if c not in VALUE_COLUMNS]
+        designs = df[design_columns].drop_duplicates().reset_index(drop=True)
+        design_index = (
+            df[design_columns]
+            .merge(designs.reset_index(), on=design_columns, how="left")["index"]
+            .to_numpy()
+        )
+        temps, temp_index = np.unique(df["Temp"].to_numpy(dtype=float), return_inverse=True)
+
+        values = dict()
+        for column in ["Frequency", "Power", "Error"]:
+            values[column] = np.full((len(designs), len(temps)), np.nan)
+            values[column][design_index, temp_index] = df[column].to_numpy(dtype=float)
+        return cls(designs, temps, values["Frequency"], values["Power"], values["Error"])
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls.from_dataframe(pd.read_csv(path, delimiter=","))
+
+    def nearest_temp(self, value):
+        """closest simulated temperature to value"""
+        return self.temps[np.argmin(np.abs(self.temps - float(value)))]
+
+    def temp_range(self, temp_min, temp_max):
+        """mask of the simulated temperatures inside [temp_min, temp_max] after snapping both to the closest simulated temperatures"""
+        return (self.temps >= self.nearest_temp(temp_min)) & (
+            self.temps <= self.nearest_temp(temp_max)
+        )
+
+    def point(self, design, temp_index):
+        """a single model point as a dictionary (same fields as a model file row)"""
+        point = self.designs.iloc[design].to_dict()
+        point.update(
+            {
+                "Temp": self.temps[temp_index],
+                "Frequency": self.frequency[design, temp_index],
+                "Power": self.power[design, temp_index],
+                "Error": self.error[design, temp_index],
+            }
+        )
+        return point
+
+    def design_index(self, point):
+        """row of designs of a point returned by point(), matched on all the design columns"""
+        match = np.ones(len(self.designs), dtype=bool)
+        for column in self.designs.columns:
+            match &= (self.designs[column] == point[column]).to_numpy()
+        return int(np.flatnonzero(match)[0])
+
+    def worst_case(self, temp_min, temp_max):
+        """worst case (maximum) power and absolute error of every design over the temperature range
+        returns (max power, temp index of max power, max |error|, temp index of max |error|)"""
+        valid = self.temp_range(temp_min, temp_max) & ~np.isnan(self.power)
+        power = np.where(valid, self.power, -np.inf)
+        error = np.where(valid, np.abs(self.error), -np.inf)
+        power_index = np.argmax(power, axis=1)
+        error_index = np.argmax(error, axis=1)
+        rows = np.arange(len(self.designs))
+        # designs without any point in range are never selected
+        simulated = valid.any(axis=1)
+        max_power = np.where(simulated, power[rows, power_index], np.inf)
+        max_error = np.where(simulated, error[rows, error_index], np.inf)
+        return max_power, power_index, max_error, error_index
+
+
+def pareto_front(max_power, max_error):
+    """indices of the designs that are not dominated in (worst case power, worst case error), sorted by power"""
+    order = np.lexsort((max_error, max_power))
+    front = []
+    best_error = np.inf
+    for design in order:
+        if np.isfinite(max_power[design]) and max_error[design] < best_error:
+            front.append(design)
+            best_error = max_error[design]
+    return np.array(front, dtype=int)
+
+
+def search(model, temp_min, temp_max, optimization, delta=10, delta_2nd_pass=2):
+    """searches the design that optimizes power or error over [temp_min, temp_max]
+
+    power optimization: the design with the lowest worst case power is the golden design. At the temperature of its
+    worst case power, the designs whose power is within delta % of the golden power are compared and the one with the
+    lowest absolute error is selected if its error is lower than the golden error by more than delta_2nd_pass %.
+    error optimization: the design with the lowest worst case absolute error is the golden design. At the temperature
+    of its worst case error, the designs whose absolute error is within delta % of the golden one are compared and the
+    one with the lowest power is selected.
+
+    returns (selected point, golden point, Pareto front DataFrame of the worst case power and error of the designs)"""
+    max_power, power_index, max_error, error_index = model.worst_case(temp_min, temp_max)
+
+    if optimization == "power":
+        golden = int(np.argmin(max_power))
+        temp_index = power_index[golden]
+        golden_value = model.power[golden, temp_index]
+        values = model.power[:, temp_index]
+        objective = np.abs(model.error[:, temp_index])
+        golden_objective = abs(model.error[golden, temp_index])
+        threshold = golden_objective - delta_2nd_pass / 100 * golden_objective
+    elif optimization == "error":
+        golden = int(np.argmin(max_error))
+        temp_index = error_index[golden]
+        golden_value = abs(model.error[golden, temp_index])
+        values = np.abs(model.error[:, temp_index])
+        objective = model.power[:, temp_index]
+        golden_objective = model.power[golden, temp_index]
+        threshold = golden_objective
+    else:
+        raise ValueError("unsupported optimization strategy: " + str(optimization))
+
+    # candidates within delta % of the golden value at the golden temperature
+    candidates = np.abs(values - golden_value) <= delta / 100 * abs(golden_value)
+    candidate_objective = np.where(candidates, objective, np.inf)
+    best = int(np.argmin(candidate_objective))
+    selected = best if candidate_objective[best] <= threshold else golden
+
+    front = pareto_front(max_power, max_error)
+    pareto = model.designs.iloc[front].copy()
+    pareto["Power"] = max_power[front]
+    pareto["Error"] = max_error[front]
+    return (
+        model.point(selected, temp_index),
+        model.point(golden, temp_index),
+        pareto.reset_index(drop=True),
+    )
+
+
+# ------------------------------------------------------------------------------
+# Benchmark on denser synthetic models
+# ------------------------------------------------------------------------------
+def synthetic_model(df, density):
+    """returns a synthetic model with density times more designs than df: the designs of df are repeated with new
+    inv values and the power and error are randomly perturbed"""
+    rng = np.random.default_rng(0)
+    copies = []
+    max_inv = df["inv"].max()
+    for copy in range(density):
+        synthetic = df.copy()
+        synthetic["inv"] = synthetic["inv"] + copy * (max_inv + 1)
+        synthetic["Power"] = synthetic["Power"] * rng.uniform(0.8, 1.2, len(df))
+        synthetic["Error"] = synthetic["Error"] * rng.uniform(0.8, 1.2, len(df))
+        copies.append(synthetic)
+    return pd.concat(copies, ignore_index=True)
+
+
+def _chunked_worst_power(df, temp_min, temp_max, rows):
+    """the previous search (worst case power of 7-row iloc chunks), for comparison"""
+    worst = []
+    for s in range(0, len(df), rows):
+        chunk = df.iloc[s : s + rows]
+        chunk = chunk[(chunk["Temp"] >= temp_min) & (chunk["Temp"] <= temp_max)]
+        worst.append((chunk["Power"].max(), chunk["Power"].idxmax()))
+    return df.iloc[min(worst)[1]]
+
+
+def benchmark(model_file, density, repeat):
+    df = pd.read_csv(model_file, delimiter=",")
+    dense = synthetic_model(df, density)
+    rows = df["Temp"].nunique()
+    print("model: {} points, synthetic model: {} points".format(len(df), len(dense)))
+
+    start = time.perf_counter()
+    model = DesignModel.from_dataframe(dense)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for optimization in ["power", "error"]:
+            search(model, 0, 80, optimization)
+    search_time = (time.perf_counter() - start) / (2 * repeat)
+
+    start = time.perf_counter()
+    _chunked_worst_power(dense, 0, 80, rows)
+    chunked_time = time.perf_counter() - start
+
+    print("load: {:.3f} ms".format(1e3 * load_time))
+    print("vectorized search: {:.3f} ms".format(1e3 * search_time))
+    print("chunked worst case power only: {:.3f} ms".format(1e3 * chunked_time))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the vectorized design search on a denser synthetic model"
+    )
+    parser.add_argument("--model", required=True, help="model file used to build the synthetic model")
+    parser.add_argument("--density", type=int, default=10, help="number of designs of the synthetic model relative to the model")
+    parser.add_argument("--repeat", type=int, default=20, help="number of timed searches")
+    args = parser.parse_args()
+    benchmark(args.model, args.density, args.repeat)
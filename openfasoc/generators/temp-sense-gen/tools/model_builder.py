@@ -0,0 +1,84 @@
+import numpy as np
+
+import sim_results
+from simulation import generate_runs
+
+# default modeling grid
+DEFAULT_HEADERS = list(range(3, 11, 2))
+DEFAULT_INVS = list(range(4, 12, 2))
+DEFAULT_TEMPS = list(range(-20, 120, 20))
+
+
+def missing_points(store, kind, headerList, invList, tempList):
+    """points of the grid that are not in the model store yet, {(header, inv): [temps]}"""
+    existing = store.design_temps(kind)
+    missing = dict()
+    for header in headerList:
+        for inv in invList:
+            simulated = existing.get((inv, header), set())
+            temps = [temp for temp in tempList if float(temp) not in simulated]
+            if temps:
+                missing[(header, inv)] = temps
+    return missing
+
+
+def build_model(
+    store,
+    kind,
+    model_file,
+    genDir,
+    designName,
+    headerList,
+    invList,
+    tempList,
+    jsonConfig,
+    platform,
+    pdk,
+    sim_cache=None,
+    jobs=None,
+):
+    """simulates the points of the (header, inv, temp) grid missing from the model store and writes the model file
+    every simulated point is stored as soon as it finishes so an interrupted run resumes where it stopped,
+    and a grid extended with more designs or temperatures only simulates the new points"""
+    missing = missing_points(store, kind, headerList, invList, tempList)
+    total = len(headerList) * len(invList) * len(tempList)
+    count = sum(len(temps) for temps in missing.values())
+    print(
+        "model grid: {0} points, {1} already simulated, {2} to simulate".format(
+            total, total - count, count
+        )
+    )
+
+    def checkpoint(header, inv, temp, result_file):
+        temp, period, power = sim_results.parse_sim_output(result_file, temp)
+        # failed measurements are not stored and are simulated again on the next run
+        if np.isnan(period):
+            return
+        store.add_point(kind, inv, header, temp, 1 / period, power)
+
+    if missing:
+        generate_runs(
+            genDir,
+            designName,
+            headerList,
+            invList,
+            missing,
+            jsonConfig,
+            platform,
+            "full",
+            pdk,
+            modeling=True,
+            sim_cache=sim_cache,
+            jobs=jobs,
+            point_done=checkpoint,
+        )
+        store.clear_searches(kind)
+
+    # the error of a design depends on all its temperatures, it is recomputed for the new points
+    # and for the points of an interrupted run that were stored without their error
+    store.update_errors(
+        kind,
+        set((inv, header) for header, inv in missing)
+        | set(store.designs_without_error(kind)),
+    )
+    store.export_csv(kind, model_file)
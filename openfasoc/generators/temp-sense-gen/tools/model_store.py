@@ -0,0 +1,353 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+import sim_results
+
+# default location of the store, next to the model files
+DEFAULT_STORE = os.path.join(os.path.dirname(__file__), "..", "models", "model_store.db")
+
+# model file columns and their store columns, HeaderType and StdCellType are only used by some models (silicon)
+MODEL_COLUMNS = {
+    "Temp": "temp",
+    "Frequency": "frequency",
+    "Power": "power",
+    "Error": "error",
+    "inv": "inv",
+    "header": "header",
+    "HeaderType": "header_type",
+    "StdCellType": "stdcell_type",
+}
+OPTIONAL_COLUMNS = ["HeaderType", "StdCellType"]
+
+# search_result.csv columns
+SEARCH_COLUMNS = ["Temp", "Power", "Error", "Inv", "Header", "search_param"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_points (
+    kind TEXT NOT NULL,
+    inv INTEGER NOT NULL,
+    header INTEGER NOT NULL,
+    header_type TEXT NOT NULL DEFAULT '',
+    stdcell_type TEXT NOT NULL DEFAULT '',
+    temp REAL NOT NULL,
+    frequency REAL,
+    power REAL,
+    error REAL,
+    PRIMARY KEY (kind, inv, header, header_type, stdcell_type, temp)
+);
+CREATE INDEX IF NOT EXISTS model_points_kind_temp ON model_points (kind, temp);
+CREATE TABLE IF NOT EXISTS model_sources (
+    kind TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_results (
+    tempmin REAL NOT NULL,
+    tempmax REAL NOT NULL,
+    optimization TEXT NOT NULL,
+    model TEXT NOT NULL,
+    delta REAL NOT NULL,
+    temp REAL,
+    power REAL,
+    error REAL,
+    inv INTEGER,
+    header INTEGER,
+    created REAL NOT NULL,
+    PRIMARY KEY (tempmin, tempmax, optimization, model, delta)
+);
+CREATE INDEX IF NOT EXISTS search_results_model ON search_results (model);
+"""
+
+search_param_re = re.compile(
+    r"Tempmin:(?P<tempmin>[^,]+),Tempmax:(?P<tempmax>[^,]+),Optimization:(?P<optimization>[^,]+),"
+    r"Model:(?P<model>.+),Delta_1st_pass:(?P<delta>[^,]+)$"
+)
+
+
+def model_kind(model_file):
+    """name of a model in the store: the model file name without extension (modelfile, modelfile_PEX, sky130hd...)"""
+    return os.path.splitext(os.path.basename(model_file))[0]
+
+
+def search_param(tempmin, tempmax, optimization, model, delta):
+    """search key as written in the search_param column of search_result.csv"""
+    return "Tempmin:{},Tempmax:{},Optimization:{},Model:{},Delta_1st_pass:{}".format(
+        tempmin, tempmax, optimization, model, delta
+    )
+
+
+class ModelStore:
+    """SQLite store of the temperature sensor model points and of the design search results
+    the model CSV files remain the exchange format: they are imported when they change and can be exported back"""
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------------------------------------------------------------------------
+    # Model points
+    # --------------------------------------------------------------------------
+    def add_points(self, kind, df):
+        """inserts or replaces the model points of df (model file columns) under kind"""
+        df = df.copy()
+        for column in OPTIONAL_COLUMNS:
+            if column not in df.columns:
+                df[column] = ""
+        rows = [
+            (kind, int(inv), int(header), str(header_type), str(stdcell_type), float(temp))
+            + tuple(None if pd.isna(value) else float(value) for value in values)
+            for inv, header, header_type, stdcell_type, temp, *values in df[
+                ["inv", "header", "HeaderType", "StdCellType", "Temp", "Frequency", "Power", "Error"]
+            ].itertuples(index=False)
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO model_points "
+                "(kind, inv, header, header_type, stdcell_type, temp, frequency, power, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def add_point(self, kind, inv, header, temp, frequency, power, error=None):
+        """inserts or replaces one simulated point, in its own transaction so that finished points survive an interruption"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO model_points "
+                "(kind, inv, header, temp, frequency, power, error) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    int(inv),
+                    int(header),
+                    float(temp),
+                    float(frequency),
+                    None if pd.isna(power) else float(power),
+                    None if error is None else float(error),
+                ),
+            )
+
+    def design_temps(self, kind):
+        """simulated temperatures of every design of a model, {(inv, header): set of temps}"""
+        temps = dict()
+        for inv, header, temp in self.connection.execute(
+            "SELECT inv, header, temp FROM model_points WHERE kind = ? AND header_type = '' AND stdcell_type = ''",
+            (kind,),
+        ):
+            temps.setdefault((inv, header), set()).add(temp)
+        return temps
+
+    def designs_without_error(self, kind):
+        """designs [(inv, header)] with points stored without their error (e.g. by an interrupted model build)"""
+        return self.connection.execute(
+            "SELECT DISTINCT inv, header FROM model_points "
+            "WHERE kind = ? AND header_type = '' AND stdcell_type = '' AND error IS NULL",
+            (kind,),
+        ).fetchall()
+
+    def update_errors(self, kind, designs):
+        """recomputes the error of every point of the designs [(inv, header)] from the frequencies of all their temperatures
+        the error depends on the calibration temperatures, so it changes when temperatures are added to a design"""
+        with self.connection:
+            for inv, header in designs:
+                points = self.connection.execute(
+                    "SELECT temp, frequency FROM model_points "
+                    "WHERE kind = ? AND inv = ? AND header = ? AND header_type = '' AND stdcell_type = '' ORDER BY temp",
+                    (kind, int(inv), int(header)),
+                ).fetchall()
+                temps = [temp for temp, _ in points]
+                periods = [1 / frequency for _, frequency in points]
+                errors = sim_results.error_table(temps, periods)[1]
+                self.connection.executemany(
+                    "UPDATE model_points SET error = ? "
+                    "WHERE kind = ? AND inv = ? AND header = ? AND header_type = '' AND stdcell_type = '' AND temp = ?",
+                    [
+                        (None if pd.isna(error) else float(error), kind, int(inv), int(header), temp)
+                        for temp, error in zip(temps, errors)
+                    ],
+                )
+
+    def import_csv(self, model_file, kind=None):
+        """replaces the points of a model by the contents of a model file
+        search results of the model are dropped since they may no longer be optimal"""
+        kind = kind or model_kind(model_file)
+        df = pd.read_csv(model_file, delimiter=",")
+        with self.connection:
+            self.connection.execute("DELETE FROM model_points WHERE kind = ?", (kind,))
+            self.clear_searches(kind)
+            count = self.add_points(kind, df)
+            self._record_source(kind, model_file)
+        return count
+
+    def _record_source(self, kind, model_file):
+        stat = os.stat(model_file)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO model_sources (kind, path, size, mtime) VALUES (?, ?, ?, ?)",
+                (kind, os.path.abspath(model_file), stat.st_size, stat.st_mtime),
+            )
+
+    def sync_csv(self, model_file, kind=None):
+        """imports a model file if it is not in the store yet or if it changed since it was imported
+        returns the model kind"""
+        kind = kind or model_kind(model_file)
+        stat = os.stat(model_file)
+        source = self.connection.execute(
+            "SELECT path, size, mtime FROM model_sources WHERE kind = ?", (kind,)
+        ).fetchone()
+        if source != (os.path.abspath(model_file), stat.st_size, stat.st_mtime):
+            print("Importing model file " + model_file + " in the model store...")
+            self.import_csv(model_file, kind)
+        return kind
+
+    def kinds(self):
+        return [
+            kind
+            for (kind,) in self.connection.execute(
+                "SELECT DISTINCT kind FROM model_points ORDER BY kind"
+            )
+        ]
+
+    def load(self, kind):
+        """model points of a model as a DataFrame with the model file columns, sorted by design and temperature"""
+        df = pd.read_sql_query(
+            "SELECT temp, frequency, power, error, inv, header, header_type, stdcell_type "
+            "FROM model_points WHERE kind = ? ORDER BY header_type, stdcell_type, inv, header, temp",
+            self.connection,
+            params=(kind,),
+        )
+        df = df.rename(columns={v: k for k, v in MODEL_COLUMNS.items()})
+        # the optional columns are only kept for models that use them
+        return df.drop(columns=[c for c in OPTIONAL_COLUMNS if (df[c] == "").all()])
+
+    def export_csv(self, kind, model_file):
+        """writes a model to a model file, the file is replaced atomically and becomes the source of the model"""
+        temp_file = model_file + ".tmp"
+        self.load(kind).to_csv(temp_file, index=False)
+        os.replace(temp_file, model_file)
+        self._record_source(kind, model_file)
+
+    # --------------------------------------------------------------------------
+    # Search results
+    # --------------------------------------------------------------------------
+    def clear_searches(self, model):
+        """drops the search results of a model, e.g. when its points change"""
+        with self.connection:
+            self.connection.execute("DELETE FROM search_results WHERE model = ?", (model,))
+
+    def find_search(self, tempmin, tempmax, optimization, model, delta):
+        """stored result of a search, (temp, power, error, inv, header) or None"""
+        return self.connection.execute(
+            "SELECT temp, power, error, inv, header FROM search_results "
+            "WHERE tempmin = ? AND tempmax = ? AND optimization = ? AND model = ? AND delta = ?",
+            (float(tempmin), float(tempmax), optimization, model, float(delta)),
+        ).fetchone()
+
+    def add_search(self, tempmin, tempmax, optimization, model, delta, temp, power, error, inv, header):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO search_results "
+                "(tempmin, tempmax, optimization, model, delta, temp, power, error, inv, header, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    float(tempmin),
+                    float(tempmax),
+                    optimization,
+                    model,
+                    float(delta),
+                    float(temp),
+                    float(power),
+                    float(error),
+                    int(inv),
+                    int(header),
+                    time.time(),
+                ),
+            )
+
+    def export_searches(self, search_file):
+        """writes the search results in the search_result.csv layout"""
+        rows = self.connection.execute(
+            "SELECT temp, power, error, inv, header, tempmin, tempmax, optimization, model, delta "
+            "FROM search_results ORDER BY created"
+        ).fetchall()
+        pd.DataFrame(
+            [
+                list(row[:5]) + [search_param("%g" % row[5], "%g" % row[6], row[7], row[8], "%g" % row[9])]
+                for row in rows
+            ],
+            columns=SEARCH_COLUMNS,
+        ).to_csv(search_file, index=False)
+
+    def import_searches(self, search_file):
+        """imports the results of a search_result.csv file, the model of a search is the kind of its model file"""
+        df = pd.read_csv(search_file, delimiter=",")
+        count = 0
+        for row in df.itertuples(index=False):
+            match = search_param_re.match(row.search_param)
+            if match is None:
+                print("Skipping unknown search parameters: " + row.search_param)
+                continue
+            self.add_search(
+                match["tempmin"],
+                match["tempmax"],
+                match["optimization"],
+                model_kind(match["model"]),
+                match["delta"],
+                row.Temp,
+                row.Power,
+                row.Error,
+                row.Inv,
+                row.Header,
+            )
+            count += 1
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import and export the temperature sensor models and search results of the model store"
+    )
+    parser.add_argument("--store", default=DEFAULT_STORE, help="SQLite store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_model = commands.add_parser("import", help="import model files")
+    import_model.add_argument("files", nargs="+", help="model files (csv)")
+    import_model.add_argument("--kind", help="model name (default: model file name)")
+    export_model = commands.add_parser("export", help="export a model to a model file")
+    export_model.add_argument("kind", help="model name")
+    export_model.add_argument("file", help="model file (csv)")
+    import_search = commands.add_parser("import-search", help="import a search_result.csv file")
+    import_search.add_argument("file", help="search result file (csv)")
+    export_search = commands.add_parser("export-search", help="export the search results to a search_result.csv file")
+    export_search.add_argument("file", help="search result file (csv)")
+    commands.add_parser("list", help="list the models of the store")
+    args = parser.parse_args()
+
+    with ModelStore(args.store) as store:
+        if args.command == "import":
+            for model_file in args.files:
+                print(model_file + ": " + str(store.import_csv(model_file, args.kind)) + " points")
+        elif args.command == "export":
+            store.export_csv(args.kind, args.file)
+        elif args.command == "import-search":
+            print(str(store.import_searches(args.file)) + " search results")
+        elif args.command == "export-search":
+            store.export_searches(args.file)
+        elif args.command == "list":
+            for kind in store.kinds():
+                print(kind + ": " + str(len(store.load(kind))) + " points")
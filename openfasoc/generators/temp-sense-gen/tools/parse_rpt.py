@@ -1,4 +1,10 @@
-drc_filename = "flow/reports/sky130hd/tempsense/6_final_drc.rpt"
+import os
+import sys
+
+# generator directory of the run, a workspace can be given as the first argument
+runDir = sys.argv[1] if len(sys.argv) > 1 else "."
+
+drc_filename = os.path.join(runDir, "flow/reports/sky130hd/tempsense/6_final_drc.rpt")
 num_lines = sum(1 for line in open(drc_filename))
 
 if num_lines > 3:
@@ -7,7 +13,7 @@ else:
     print("DRC is clean!")
 
 
-lvs_filename = "flow/reports/sky130hd/tempsense/6_final_lvs.rpt"
+lvs_filename = os.path.join(runDir, "flow/reports/sky130hd/tempsense/6_final_lvs.rpt")
 
 with open(lvs_filename) as f:
     f1 = f.read()
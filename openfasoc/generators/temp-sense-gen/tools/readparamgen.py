@@ -1,581 +1,253 @@
 import argparse
-import csv
-import glob
 import json
 import os
-import re
 import sys
-import time
+from collections import namedtuple
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from numpy.polynomial import Polynomial
-from simulation import generate_runs
 
-# ------------------------------------------------------------------------------
-# Parse the command line arguments
-# ------------------------------------------------------------------------------
-print("#----------------------------------------------------------------------")
-print("# Parsing command line arguments...")
-print("#----------------------------------------------------------------------")
-print(sys.argv)
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.simulation_cache import SimulationCache
+import design_search
+from design_search import DesignModel
+from model_builder import DEFAULT_HEADERS, DEFAULT_INVS, DEFAULT_TEMPS, build_model
+from model_store import ModelStore, model_kind, search_param
+from surrogate import Surrogate
 
 genDir = os.path.join(os.path.dirname(os.path.relpath(__file__)), "../")
 
-parser = argparse.ArgumentParser(description="Temperature Sensor design generator")
-parser.add_argument(
-    "--specfile",
-    required=True,
-    help="File containing the specification for the generator",
-)
-parser.add_argument(
-    "--outputDir", required=True, help="Output directory for generator results"
-)
-parser.add_argument(
-    "--platform", required=True, help="PDK/process kit for cadre flow (.e.g tsmc16)"
-)
-parser.add_argument(
-    "--mode",
-    required=True,
-    help="Specify the outputs to be generated: verilog, macro, full (includes PEX extraction)",
+delta_1st_pass = 10
+delta_2nd_pass = 2
+
+# specification of a temperature sensor
+Spec = namedtuple("Spec", ["design_name", "temp_min", "temp_max", "optimization"])
+# result of a search, unpacks like the (temp, power, error, inv, header, search_param) tuples of check_search_done
+DesignPoint = namedtuple(
+    "DesignPoint", ["temp", "power", "error", "inv", "header", "search_param"]
 )
-parser.add_argument("--ninv", required=False, help="Number of target inverters")
-parser.add_argument("--nhead", required=False, help="Number of target headers")
-parser.add_argument("--pex", action="store_true", help="Simulate PEX")
-parser.add_argument("--prepex", action="store_true", help="Simulate pre PEX")
-parser.add_argument("--clean", action="store_true", help="Clean the workspace.")
-args = parser.parse_args()
-
-
-if not os.path.isfile(args.specfile):
-    print("Error: specfile does not exist")
-    print("File Path: " + args.specfile)
-    sys.exit(1)
-
-
-if args.platform != "sky130hd" and args.platform != "sky130hs":
-    print("Error: only sky130hd and sky130hs platforms are supported as of now")
-    sys.exit(1)
-
-# Load json spec file
-print("Loading specfile...")
-try:
-    with open(args.specfile) as file:
-        jsonSpec = json.load(file)
-except ValueError as e:
-    print("Error occurred opening or loading json file.")
-    print >> sys.stderr, "Exception: %s" % str(e)
-    sys.exit(1)
-
-if jsonSpec["generator"] != "temp-sense-gen":
-    print('Error: Generator specification must be "temp-sense-gen".')
-    sys.exit(1)
-
-
-try:
-    designName = jsonSpec["module_name"]
-except KeyError as e:
-    print("Error: Bad Input Specfile. 'module_name' variable is missing.")
-    sys.exit(1)
-
-try:
-    Tempmin = jsonSpec["specifications"]["temperature"]["min"]
-    Tempmax = jsonSpec["specifications"]["temperature"]["max"]
-except KeyError as e:
-    print(
-        "Error: Bad Input Specfile. 'range o' value is missing under "
-        + "'specifications'."
-    )
-    sys.exit(1)
-except ValueError as e:
-    print(
-        "Error: Bad Input Specfile. Please use a float value for 'range ' "
-        + "under 'specifications'."
-    )
-    sys.exit(1)
 
 
-mFile1 = genDir + "/models/modelfile.csv"
-mFilePublic1 = genDir + args.platform + ".model_tempsense"
+class Model:
+    """a temperature sensor model loaded once from the model store
+    points is the model file table, arrays the same points indexed by (design, temp) and surrogate their smooth fit"""
 
-if not os.path.isfile(mFile1):
-    if args.mode == "verilog":
-        print(
-            "Model file '"
-            + mFile1
-            + "' is not valid. "
-            + "Using the model file provided in the repo."
-        )
-        mFile1 = mFilePublic1
-    else:
-        print("generating a local model file")
-
-        try:
-            with open(genDir + "../../common/platform_config.json") as file:
-                jsonConfig = json.load(file)
-        except ValueError as e:
-            print("Error occurred opening or loading json file.")
-            print >> sys.stderr, "Exception: %s" % str(e)
-            sys.exit(1)
+    def __init__(self, name, points):
+        self.name = name
+        self.points = points
+        self.arrays = DesignModel.from_dataframe(points)
+        self.surrogate = Surrogate(self.arrays)
 
-        headerList = range(3, 11, 2)
-        invList = range(4, 12, 2)
-        tempList = range(-20, 120, 20)
-        all_result_start_line = 3
-
-        generate_runs(
-            genDir,
-            jsonSpec["module_name"],
-            headerList,
-            invList,
-            tempList,
-            jsonConfig,
-            args.platform,
-            modeling=True,
-        )
+    def search_points(self, inv, header):
+        """points with the same inv and header as a search result"""
+        df_points = self.points[
+            (self.points["inv"] == inv) & (self.points["header"] == header)
+        ]
+        return df_points["Temp"], df_points["Power"], df_points["Error"]
 
-        modelfile = open(genDir + "models/modelfile.csv", "w")
-        fieldnames = ["Temp", "Frequency", "Power", "Error", "inv", "header"]
-        writer = csv.DictWriter(modelfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        all_runs = glob.glob(genDir + "simulations/run/*")
-        for run in all_runs:
-            run_re = re.search("inv([0-9]+)_header([0-9]+)", run)
-            inv = run_re.group(1)
-            header = run_re.group(2)
-
-            with open(run + "/all_result", "r") as rf:
-                filedata = rf.readlines()
-                for valid_line in filedata[all_result_start_line - 1 :]:
-                    valid_data = valid_line.split()
-                    writer.writerow(
-                        {
-                            "Temp": valid_data[0],
-                            "Frequency": valid_data[1],
-                            "Power": valid_data[2],
-                            "Error": valid_data[3],
-                            "inv": inv,
-                            "header": header,
-                        }
-                    )
-
-        modelfile.close()
-
-# store content in objects
-# Temp = obj['temperature']
-Power = jsonSpec["specifications"]["power"]
-Error = jsonSpec["specifications"]["error"]
-Optimization = jsonSpec["specifications"]["optimization"]
-Model = mFile1
-
-
-# Get the design spec & parameters from spec file
-designName = jsonSpec["module_name"]
-
-Tmin = float(jsonSpec["specifications"]["temperature"]["min"])
-Tmax = float(jsonSpec["specifications"]["temperature"]["max"])
-if (Tmax > 100) or (Tmin < -20):
-    print(
-        "Error: Supported temperature sensing must be inside the following range [-20 to 100] Celcius"
-    )
-    sys.exit(1)
-if Tmax < Tmin:
-    print(
-        "Error: Supported temperature sensing must be inside the following range [-20 to 100] Celcius"
-    )
-    sys.exit(1)
 
+# ------------------------------------------------------------------------------
+# Specifications and models
+# ------------------------------------------------------------------------------
+def read_spec(jsonSpec) -> Spec:
+    """validates a specification (content of a spec file), raises ValueError if it is not valid"""
+    if jsonSpec.get("generator") != "temp-sense-gen":
+        raise ValueError('Generator specification must be "temp-sense-gen".')
+
+    try:
+        designName = jsonSpec["module_name"]
+    except KeyError:
+        raise ValueError("Bad Input Specfile. 'module_name' variable is missing.")
+
+    try:
+        Tmin = float(jsonSpec["specifications"]["temperature"]["min"])
+        Tmax = float(jsonSpec["specifications"]["temperature"]["max"])
+    except KeyError:
+        raise ValueError(
+            "Bad Input Specfile. 'range o' value is missing under 'specifications'."
+        )
+    except ValueError:
+        raise ValueError(
+            "Bad Input Specfile. Please use a float value for 'range ' under 'specifications'."
+        )
+    if (Tmax > 100) or (Tmin < -20) or (Tmax < Tmin):
+        raise ValueError(
+            "Supported temperature sensing must be inside the following range [-20 to 100] Celcius"
+        )
 
-optimization = str(jsonSpec["specifications"]["optimization"])
-if optimization != "error" and optimization != "power":
-    print("Error: Please enter a supported optmization strategy [error or power]")
-    sys.exit(1)
+    optimization = str(jsonSpec["specifications"].get("optimization"))
+    if optimization != "error" and optimization != "power":
+        raise ValueError(
+            "Please enter a supported optmization strategy [error or power]"
+        )
 
+    # keep the values of the spec file (e.g. 0 and not 0.0) in the search parameters
+    return Spec(
+        designName,
+        jsonSpec["specifications"]["temperature"]["min"],
+        jsonSpec["specifications"]["temperature"]["max"],
+        optimization,
+    )
 
-###SEARCH starts here
 
-number_rows = 7
-delta_1st_pass = 10
-delta_2nd_pass = 2
+def load_spec(specfile) -> Spec:
+    """reads and validates a spec file, raises ValueError if it is not valid"""
+    with open(specfile) as file:
+        return read_spec(json.load(file))
 
-# read the data table (csv file)
-df = pd.read_csv(Model, delimiter=",")
 
+def load_model(kind, store=None) -> Model:
+    """loads a model from the model store
+    kind is either a model name of the store (modelfile, modelfile_PEX...) or a model file, model files (including
+    models/<kind>.csv) are imported in the store when they change"""
+    if store is None:
+        with ModelStore() as store:
+            return load_model(kind, store)
 
-# get the closest new range of temp min
-def get_new_temp_min():
-    value = Tempmin
-    if value in [-20, 0, 20, 40, 60, 80, 100]:
-        return value
+    if os.path.isfile(kind):
+        name = store.sync_csv(kind)
     else:
-        result = df["Temp"].iloc[(df["Temp"] - value).abs().argsort()[:1]].tolist()
-        return result[0]
+        name = kind
+        if os.path.isfile(genDir + "models/" + kind + ".csv"):
+            store.sync_csv(genDir + "models/" + kind + ".csv")
+    points = store.load(name)
+    if points.empty:
+        raise ValueError("model " + kind + " is not in the model store")
+    return Model(name, points)
 
 
-# get the closest new range of temp max
-def get_new_temp_max():
-    value = Tempmax
-    if value in [-20, 0, 20, 40, 60, 80, 100]:
-        return value
-    else:
-        result = df["Temp"].iloc[(df["Temp"] - value).abs().argsort()[:1]].tolist()
-        return result[0]
-
-
-# store some columns in arrays to draw plots
-x = df["Temp"]
-y = df["Power"]
-z = df["Error"]
-
-
-# calculate min power and get index (for split function)
-def calculate_max_power(df, temp_min, temp_max):
-    # get the max power : one value
-    # max_power = df[(df['Temp'].between(temp_min, temp_max, inclusive=True))]['Power'].max()
-    df_max = df[(df["Temp"] >= temp_min) & (df["Temp"] <= temp_max)]
-    max_power = df_max["Power"].max()
-
-    # get index of the max power
-    # max_power_index = df[(df['Temp'].between(temp_min, temp_max, inclusive=True))]['Power'].idxmax()
-    max_power_index = df_max["Power"].idxmax()
-    print("----calculate_max_power------", max_power, max_power_index)
-    return max_power, max_power_index
-
-
-# calculate max power and get index (for split function)
-def calculate_max_error(df, temp_min, temp_max):
-    # get the min error : one value
-    df_max = df[(df["Temp"] >= temp_min) & (df["Temp"] <= temp_max)]
-    max_error = df_max["Error"].abs().max()
-    # get index of max error
-    max_error_index = df_max["Error"].abs().idxmax()
-    print("----calculate_max_error------", max_error, max_error_index)
-    return max_error, max_error_index
-
-
-print("Searching for the new Temperature Min....", get_new_temp_min())
-print("Searching for the new Temperature Max....", get_new_temp_max())
-
-# read x rows of the file and calculate the min of max power
-# df is the dataframe
-# x in the number of lines to read
-# def split_df_power(df,x):
-#     s=0
-#     max = []
-#     serach_param = str(get_new_temp_min(Temp))+str(get_new_temp_max(Temp))+Optimization+Model+str(Delta)
-#     # Give the filename you wish to save the file to
-#     print('serach_param----', serach_param)
-#     filename = 'golden_power_opt.csv'
-#     # Use this function to search for any files which match your filename
-#     file_present = glob.glob(filename)
-#     if not file_present:
-#         print('File not present : new search')
-#         while(s < len(df)):
-#             result = df.iloc[s:s+x]
-#             print(result)
-#             #store (maxpower, index of max power) in the list max (tuples)
-#             max.append(calculate_max_power(result, get_new_temp_min(Temp), get_new_temp_max(Temp)))
-#             s= s+x
-#             #return min(max)[0], df.Temp[min(max)[1]], df.Error[min(max)[1]], df.inv[min(max)[1]], df.header[min(max)[1]]
-#             raw_data = {'serach_param': [serach_param],'Temp': [df.Temp[min(max)[1]]], 'Frequency' : [df.Frequency[min(max)[1]]], 'Power' : [df.Power[min(max)[1]]], 'Error' : [df.Error[min(max)[1]]], 'inv' : [df.inv[min(max)[1]]], 'header' : [df.header[min(max)[1]]]}
-#             df_golden = pd.DataFrame(raw_data,  columns=['serach_param', 'Temp', 'Frequency', 'Power', 'Error', 'inv' , 'header' ])
-#             df_golden.to_csv(filename, index=False)
-#             return df.iloc[min(max)[1]]
-#     elif file_present:
-#         print('File present')
-#         df_golden = pd.read_csv(filename, delimiter=',')
-#         df_golden_new = df_golden[(df_golden['serach_param'] == serach_param)]
-#         #done1 = df_golden.loc[(df_golden['serach_param'] == serach_param)]
-#         #done1_index = df_golden.ix[(df_golden['serach_param'] == serach_param)]
-#         print('df_golden_new', df_golden_new)
-#         #done = df_golden.loc[operator.and_(df_golden['Range_Temp_min'] == get_new_temp_min(Temp), df_golden['Range_Temp_max'] == get_new_temp_max(Temp))]
-#         if not df_golden_new.empty:
-#             print('File present : SEARCH already done')
-#             print(df_golden_new['Error'].iloc[0], df_golden_new['inv'].iloc[0], df_golden_new['header'].iloc[0])
-#             return df_golden_new['Error'].iloc[0], df_golden_new['inv'].iloc[0], df_golden_new['header'].iloc[0]
-#         else:
-#             print('File present : NEW SEARCH')
-#             while(s < len(df)):
-#                 result = df.iloc[s:s+x]
-#                 print(result)
-#                 #store (maxpower, index of max power) in the list max (tuples)
-#                 max.append(calculate_max_power(result, get_new_temp_min(Temp), get_new_temp_max(Temp)))
-#                 s= s+x
-#                 #return min(max)[0], df.Temp[min(max)[1]], df.Error[min(max)[1]], df.inv[min(max)[1]], df.header[min(max)[1]]
-#                 raw_data = {'serach_param': [serach_param],'Temp': [df.Temp[min(max)[1]]], 'Frequency' : [df.Frequency[min(max)[1]]], 'Power' : [df.Power[min(max)[1]]], 'Error' : [df.Error[min(max)[1]]], 'inv' : [df.inv[min(max)[1]]], 'header' : [df.header[min(max)[1]]]}
-#                 df_golden_new = pd.DataFrame(raw_data,  columns=['serach_param','Temp', 'Frequency', 'Power', 'Error', 'inv' , 'header' ])
-#                 df_golden.append(df_golden_new)
-#                 df_golden.to_csv(filename, index=False, mode='a', header=False)
-#                 return df.iloc[min(max)[1]]
-
-
-def split_df_power(df, x):
-    s = 0
-    max = []
-    while s < len(df):
-        result = df.iloc[s : s + x]
-        print(result)
-        # store (maxpower, index of max power) in the list max (tuples)
-        max.append(calculate_max_power(result, get_new_temp_min(), get_new_temp_max()))
-        s = s + x
-    # return min(max)[0], df.Temp[min(max)[1]], df.Error[min(max)[1]], df.inv[min(max)[1]], df.header[min(max)[1]]
-    raw_data = {
-        "Temp": [df.Temp[min(max)[1]]],
-        "Frequency": [df.Frequency[min(max)[1]]],
-        "Power": [df.Power[min(max)[1]]],
-        "Error": [df.Error[min(max)[1]]],
-        "inv": [df.inv[min(max)[1]]],
-        "header": [df.header[min(max)[1]]],
-    }
-    print("Minimum powers is    ", df.Power[min(max)[1]])
-    df_golden = pd.DataFrame(raw_data)
-    df_golden.to_csv("golden_power_opt.csv", index=False)
-    return df.iloc[min(max)[1]]
-
-
-def split_df_error(df, x):
-    s = 0
-    max = []
-    while s < len(df):
-        result = df.iloc[s : s + x]
-        print(result)
-        # store (maxpower, index of max power) in the list max (tuples)
-        max.append(calculate_max_error(result, get_new_temp_min(), get_new_temp_max()))
-        s = s + x
-    # return min(max)[0], df.Temp[min(max)[1]], df.Error[min(max)[1]], df.inv[min(max)[1]], df.header[min(max)[1]]
-    raw_data = {
-        "Temp": [df.Temp[min(max)[1]]],
-        "Frequency": [df.Frequency[min(max)[1]]],
-        "Power": [df.Power[min(max)[1]]],
-        "Error": [df.Error[min(max)[1]]],
-        "inv": [df.inv[min(max)[1]]],
-        "header": [df.header[min(max)[1]]],
-    }
-    print("Minimum error is    ", df.Power[min(max)[1]])
-    df_golden = pd.DataFrame(raw_data)
-    df_golden.to_csv("golden_error_opt.csv", index=False)
-    return df.iloc[min(max)[1]]
-
-
-# print('-----------split----- :   min power' , split_df(df,7))
-
-# la premiere fonction developee
-# calculate min power and extract inv and header
-def calculate_min_error_new(df, x, number_rows):
-    search_param = (
-        "Tempmin:"
-        + str(Tempmin)
-        + ","
-        + "Tempmax:"
-        + str(Tempmax)
-        + ","
-        + "Optimization:"
-        + Optimization
-        + ","
-        + "Model:"
-        + Model
-        + ","
-        + "Delta_1st_pass:"
-        + str(delta_1st_pass)
-    )
-    # Give the filename you wish to save the file to
-    print("search_param----", search_param)
-    splited_data = split_df_power(df, number_rows)
-    temp = splited_data["Temp"]
-    print("-------calculate_min_error_new-------SPLIT DATA RESULT tempareature", temp)
-    # search csv table and get temp that matches the power golden value with x value
-    # look at error and compare to golden value, display smallest valueget the min power : one value
-    df_temp = df.loc[(df["Temp"] == temp)]
-    print(
-        "-------calculate_min_error_new-------matching temp to power golden value",
-        df_temp,
-    )
-    # get the values for power within x%
-    value_min = splited_data["Power"] - (x / 100 * splited_data["Power"])
-    value_max = splited_data["Power"] + (x / 100 * splited_data["Power"])
-    print("calculate_min_error_new-----range power----", value_min, value_max)
-    df_temp_new_all = df_temp[
-        (df_temp["Power"] >= value_min) & (df_temp["Power"] <= value_max)
-    ]
-    print(
-        "-------calculate_min_error_new-------all power values within the new range",
-        df_temp_new_all,
-    )
-    df_temp_new_all.to_csv("power_within_x.csv", index=False)
-    df_temp_new = df_temp[
-        (df_temp["Power"] >= value_min) & (df_temp["Power"] <= value_max)
-    ]["Error"]
-    df_temp_new_abs = df_temp_new.abs()
-    print(
-        "-------calculate_min_error_new-------all Error values within the new range of power",
-        df_temp_new,
-    )
-    df_temp_new_index = df_temp_new.idxmin()
+# ------------------------------------------------------------------------------
+# Search
+# ------------------------------------------------------------------------------
+def check_surrogate(spec, model, design):
+    """prints the surrogate worst case power and error of a design (row of model.arrays.designs) over the exact
+    temperature range and warns if the surrogate fit is not accurate enough to trust them"""
+    worst_case = model.surrogate.worst_case(spec.temp_min, spec.temp_max)
     print(
-        "-------calculate_min_error_new-------index value of the min error within the new range of power",
-        df_temp_new_index,
-    )
-    # abs(errror-gold) - 0.1*abs(errorgold) > smallest of all the other errors
-    compare = abs(splited_data["Error"]) - delta_2nd_pass / 100 * abs(
-        splited_data["Error"]
-    )
-    print("calculate_min_error_new-----delta error golden ------", compare)
-    if abs(df_temp_new.min()) <= compare:
-        min_error = df_temp_new.min()
-        power = df_temp_new_all.Power[df_temp_new_index]
-        temp = df_temp_new_all.Temp[df_temp_new_index]
-        Inv = df_temp_new_all.inv[df_temp_new_index]
-        Header = df_temp_new_all.header[df_temp_new_index]
-        print(
-            "calculate_min_error_new-----min_error, Inv, Header------",
-            min_error,
-            Inv,
-            Header,
+        "surrogate worst case over [{0}, {1}]: power {2:g}, error {3:g} (fit residuals: error {4:g} C, power {5:.2%})".format(
+            spec.temp_min,
+            spec.temp_max,
+            worst_case["Power"][design],
+            worst_case["Error"][design],
+            worst_case["ErrorResidual"][design],
+            worst_case["PowerResidual"][design],
         )
-    else:
-        min_error = splited_data["Error"]
-        Inv = splited_data["inv"]
-        Header = splited_data["header"]
-        power = splited_data["Power"]
-        temp = splited_data["Temp"]
+    )
+    if not model.surrogate.trusted(spec.temp_min, spec.temp_max)[design]:
         print(
-            "calculate_min_error_new-----min_error, Inv, Header------",
-            min_error,
-            Inv,
-            Header,
+            "[Warning] the surrogate fit of this design is not accurate over the requested range, simulate the design to confirm its performance"
         )
-    raw_data_search = {
-        "Temp": [temp],
-        "Power": [power],
-        "Error": [min_error],
-        "Inv": [Inv],
-        "Header": [Header],
-        "search_param": [search_param],
-    }
-    df_search_result = pd.DataFrame(
-        raw_data_search,
-        columns=["Temp", "Power", "Error", "Inv", "Header", "search_param"],
+
+
+def search(spec, model, store=None, delta=delta_1st_pass) -> DesignPoint:
+    """searches the design of a model that optimizes the power or error of a spec (see design_search.search)
+    with a model store, searches already done are returned from the store and new ones are stored in it"""
+    param = search_param(
+        spec.temp_min, spec.temp_max, spec.optimization, model.name, delta
     )
-    if not glob.glob("search_result.csv"):
-        df_search_result.to_csv("search_result.csv", index=False)
-    else:
-        # df_search_result_old = pd.read_csv('search_result.csv', delimiter=',')
-        # print('df_search_result_old', df_search_result_old)
-        # df_search_result_old.append(df_search_result)
-        print(" Search result stored")
-        df_search_result.to_csv(
-            "search_result.csv", index=False, mode="a", header=False
+    print("search_param----", param)
+    if store is not None:
+        search_done = store.find_search(
+            spec.temp_min, spec.temp_max, spec.optimization, model.name, delta
         )
-    return temp, power, min_error, Inv, Header, search_param
-
-
-# calculate min power and extract inv and header
-def calculate_min_power_new(df, x, number_rows):
-    search_param = (
-        "Tempmin:"
-        + str(Tempmin)
-        + ","
-        + "Tempmax:"
-        + str(Tempmax)
-        + ","
-        + "Optimization:"
-        + Optimization
-        + ","
-        + "Model:"
-        + Model
-        + ","
-        + "Delta_1st_pass:"
-        + str(delta_1st_pass)
-    )
-    splited_data = split_df_error(df, number_rows)
-    temp = splited_data["Temp"]
-    print("-------calculate_min_power_new-------SPLIT DATA RESULT tempareature", temp)
-    # search csv table and get temp that matches the power golden value with x value
-    # look at error and compare to golden value, display smallest valueget the min power : one value
-    df_temp = df.loc[(df["Temp"] == temp)]
-    print(
-        "-------calculate_min_power_new-------matching temp to power golden value",
-        df_temp,
-    )
-    # get the values for error within x%
-    value_min = abs(splited_data["Error"]) - (x / 100 * abs(splited_data["Error"]))
-    value_max = abs(splited_data["Error"]) + (x / 100 * abs(splited_data["Error"]))
-    print("calculate_min_power_new-----range Error----", value_min, value_max)
-    df_temp_new_all = df_temp[
-        (df_temp["Error"].abs() >= value_min) & (df_temp["Error"].abs() <= value_max)
-    ]
+        if search_done is not None:
+            print("SEARCH already done", search_done)
+            return DesignPoint(*search_done, param)
+
     print(
-        "-------calculate_min_power_new-------all Error values within the new range of error",
-        df_temp_new_all,
+        "*********Performing {0} Optimization*********".format(
+            spec.optimization.capitalize()
+        )
     )
-    df_temp_new_all.to_csv("error_within_x.csv", index=False)
-    df_temp_new = df_temp[
-        (df_temp["Error"].abs() >= value_min) & (df_temp["Error"].abs() <= value_max)
-    ]["Power"]
-    df_temp_new_index = df_temp[
-        (df_temp["Error"].abs() >= value_min) & (df_temp["Error"].abs() <= value_max)
-    ]["Power"].idxmin()
-    if df_temp_new.min() <= splited_data["Power"]:
-        min_power = df_temp_new.min()
-        Inv = df_temp_new_all.inv[df_temp_new_index]
-        Header = df_temp_new_all.header[df_temp_new_index]
-        min_error = df_temp_new_all.Error[df_temp_new_index]
-        temp = df_temp_new_all.Temp[df_temp_new_index]
+    temp_min, temp_max = float(spec.temp_min), float(spec.temp_max)
+    off_grid = not np.isin([temp_min, temp_max], model.arrays.temps).all()
+    trusted = model.surrogate.trusted(temp_min, temp_max)
+    if off_grid and trusted.any():
+        # the simulated temperatures do not include the range, search the surrogate fit of the designs it is accurate for
         print(
-            "calculate_min_power_new-----min_power, Inv, Header------",
-            min_power,
-            Inv,
-            Header,
+            "Searching the surrogate fit of {0} designs over [{1}, {2}]....".format(
+                np.count_nonzero(trusted), spec.temp_min, spec.temp_max
+            )
         )
+        arrays = model.surrogate.fitted_model(temp_min, temp_max)
     else:
-        min_power = splited_data["Power"]
-        min_error = splited_data["Error"]
-        Inv = splited_data["inv"]
-        Header = splited_data["header"]
-        temp = splited_data["Temp"]
         print(
-            "calculate_min_power_new-----min_power, Inv, Header------",
-            min_power,
-            Inv,
-            Header,
+            "Searching for the new Temperature Min....",
+            model.arrays.nearest_temp(spec.temp_min),
+        )
+        print(
+            "Searching for the new Temperature Max....",
+            model.arrays.nearest_temp(spec.temp_max),
         )
-    raw_data_search = {
-        "Temp": [temp],
-        "Power": [min_power],
-        "Error": [min_error],
-        "Inv": [Inv],
-        "Header": [Header],
-        "search_param": [search_param],
-    }
-    df_search_result = pd.DataFrame(
-        raw_data_search,
-        columns=["Temp", "Power", "Error", "Inv", "Header", "search_param"],
+        if off_grid:
+            print(
+                "[Warning] the surrogate fit of no design is accurate over the requested range, the search uses the closest simulated temperatures, add the range to the model grid (--model-temp) to simulate it"
+            )
+        arrays = model.arrays
+    selected, golden, pareto = design_search.search(
+        arrays,
+        spec.temp_min,
+        spec.temp_max,
+        spec.optimization,
+        delta,
+        delta_2nd_pass,
     )
-    if not glob.glob("search_result.csv"):
-        df_search_result.to_csv("search_result.csv", index=False)
-    else:
-        print(" I am adding new search result to CSV file")
-        df_search_result.to_csv(
-            "search_result.csv", index=False, mode="a", header=False
+    print("golden design (" + spec.optimization + " optimization)    ", golden)
+    print("Pareto front of the worst case power and error\n", pareto)
+    print("selected design    ", selected)
+    check_surrogate(spec, model, model.arrays.design_index(selected))
+
+    point = DesignPoint(
+        selected["Temp"],
+        selected["Power"],
+        selected["Error"],
+        selected["inv"],
+        selected["header"],
+        param,
+    )
+    if store is not None:
+        store.add_search(
+            spec.temp_min,
+            spec.temp_max,
+            spec.optimization,
+            model.name,
+            delta,
+            *point[:5]
         )
-    return temp, min_power, min_error, Inv, Header, search_param
-
-
-def read_plot_power_opt() -> None:
-    # read new data
-    power_within_data = pd.read_csv("power_within_x.csv", delimiter=",")
-    x_within = power_within_data["Temp"]
-    y_within = power_within_data["Power"]
-    z_within = power_within_data["Error"]
-    golden_data_power = pd.read_csv("golden_power_opt.csv", delimiter=",")
-    x_golden = golden_data_power["Temp"]
-    y_golden = golden_data_power["Power"]
-    z_golden = golden_data_power["Error"]
+    return point
+
+
+def search_batch(specs, kind, store=None):
+    """resolves a list of specs (Spec or spec file contents) against one load of a model, returns a list of DesignPoint"""
+    if store is None:
+        with ModelStore() as store:
+            return search_batch(specs, kind, store)
+
+    model = load_model(kind, store)
+    return [
+        search(spec if isinstance(spec, Spec) else read_spec(spec), model, store)
+        for spec in specs
+    ]
+
+
+# ------------------------------------------------------------------------------
+# Plots
+# ------------------------------------------------------------------------------
+def read_plot_power_opt(spec, model, point):
+    golden = design_search.search(
+        model.arrays, spec.temp_min, spec.temp_max, "power", delta_1st_pass, delta_2nd_pass
+    )[1]
+    x_golden = golden["Temp"]
+    y_golden = golden["Power"]
+    x = model.points["Temp"]
+    y = model.points["Power"]
     print("series", x_golden, y_golden)
     plt.figure(figsize=(12, 6))
-    label2 = "   Error:" + str(error)
-    label1 = "  INV : " + str(inv) + "   Header : " + str(header)
+    label2 = "   Error:" + str(point.error)
+    label1 = "  INV : " + str(point.inv) + "   Header : " + str(point.header)
     label = label2 + label1
     plt.annotate(
         label,
@@ -589,9 +261,10 @@ def read_plot_power_opt() -> None:
     plt.xlabel("Temperature")
     plt.ylabel("Power")
     plt.title("Temp Sensor Power Optimization")
+    same_design = model.search_points(point.inv, point.header)
     plt.plot(
-        search_points(inv, header)[0],
-        search_points(inv, header)[1],
+        same_design[0],
+        same_design[1],
         "ro",
         label="Other simulated points using the same design parameters",
     )
@@ -599,19 +272,17 @@ def read_plot_power_opt() -> None:
     return plt
 
 
-def read_plot_error_opt() -> None:
-    # read new data
-    error_within_data = pd.read_csv("error_within_x.csv", delimiter=",")
-    x_within_e = error_within_data["Temp"]
-    y_within_e = error_within_data["Power"]
-    z_within_e = error_within_data["Error"]
-    golden_data_error = pd.read_csv("golden_error_opt.csv", delimiter=",")
-    x_golden_e = golden_data_error["Temp"]
-    y_golden_e = golden_data_error["Power"]
-    z_golden_e = golden_data_error["Error"]
+def read_plot_error_opt(spec, model, point):
+    golden = design_search.search(
+        model.arrays, spec.temp_min, spec.temp_max, "error", delta_1st_pass, delta_2nd_pass
+    )[1]
+    x_golden_e = golden["Temp"]
+    z_golden_e = golden["Error"]
+    x = model.points["Temp"]
+    z = model.points["Error"]
     plt.figure(figsize=(12, 6))
-    label2 = "   Error:" + str(error)
-    label1 = "  INV : " + str(inv) + "   Header : " + str(header)
+    label2 = "   Error:" + str(point.error)
+    label1 = "  INV : " + str(point.inv) + "   Header : " + str(point.header)
     label = label2 + label1
     plt.annotate(
         label,
@@ -625,9 +296,10 @@ def read_plot_error_opt() -> None:
     plt.title("Temp Sensor Error Optimization")
     plt.xlabel("Temperature")
     plt.ylabel("Error")
+    same_design = model.search_points(point.inv, point.header)
     plt.plot(
-        search_points(inv, header)[0],
-        search_points(inv, header)[2],
+        same_design[0],
+        same_design[2],
         "ro",
         label="Other simulated points using the same design parameters",
     )
@@ -635,100 +307,203 @@ def read_plot_error_opt() -> None:
     return plt
 
 
-def main():
-    # check model
-    if Model == "":
-        print("Model file is missing")
-        exit()
-    else:
-        # Check if temparature range field is not empty
-        if Tempmin == "" or Tempmax == "":
-            print("Please provide a temperature range")
-            exit()
-        else:
-            if Optimization == "power":
-                # THIS IS THE MAIN FUNCTION for power optimization
-                print("*********Performing Power Optimization*********")
-                return calculate_min_error_new(df, delta_1st_pass, number_rows)
-            elif Optimization == "error":
-                print("*********Performing Error Optimization*********")
-                # THIS IS THE MAIN FUNCTION for error optimization
-                return calculate_min_power_new(df, delta_1st_pass, number_rows)
-
-
-def check_search_done():
-    file_present = glob.glob("search_result.csv")
-    if file_present:
-        print(
-            "---check_search_done---- FILE IS PRESENT LETS CHECK IF SEARCH WAS ALREADY DONE"
-        )
-        df_search_all = pd.read_csv("search_result.csv", delimiter=",")
-        search_param = (
-            "Tempmin:"
-            + str(Tempmin)
-            + ","
-            + "Tempmax:"
-            + str(Tempmax)
-            + ","
-            + "Optimization:"
-            + Optimization
-            + ","
-            + "Model:"
-            + Model
-            + ","
-            + "Delta_1st_pass:"
-            + str(delta_1st_pass)
-        )
-        print("---check_search_done---- search_param :   ", search_param)
-        df_search_done = df_search_all[(df_search_all["search_param"] == search_param)]
-        print("---check_search_done---- df_search_done :   ", df_search_done)
-        if not df_search_done.empty:
-            print("File present : SEARCH already done")
-            print(
-                "---check_search_done---- get old research results :   ",
-                df_search_done["Temp"].iloc[0],
-                df_search_done["Power"].iloc[0],
-                df_search_done["Error"].iloc[0],
-                df_search_done["Inv"].iloc[0],
-                df_search_done["Header"].iloc[0],
-                df_search_done["search_param"].iloc[0],
-            )
-            return (
-                df_search_done["Temp"].iloc[0],
-                df_search_done["Power"].iloc[0],
-                df_search_done["Error"].iloc[0],
-                df_search_done["Inv"].iloc[0],
-                df_search_done["Header"].iloc[0],
-                df_search_done["search_param"].iloc[0],
-            )
-        else:
-            print("File present : NEW SEARCH")
-            return main()
-    else:
-        return main()
-
-
 # plot the appropriate data source and results
-def plot() -> None:
-    if Optimization == "power":
-        myplt = read_plot_power_opt()
-    elif Optimization == "error":
-        myplt = read_plot_error_opt()
+def plot(spec, model, point) -> None:
+    if spec.optimization == "power":
+        myplt = read_plot_power_opt(spec, model, point)
+    elif spec.optimization == "error":
+        myplt = read_plot_error_opt(spec, model, point)
     myplt.savefig("run_stats.svg")
 
 
-# final result is put in these 3 variables that you can use in your
-temp, power, error, inv, header, hist = check_search_done()
-print("Error : ", error)
-print("Inv : ", inv)
-print("Header : ", header)
-print("History : ", hist)
+# ------------------------------------------------------------------------------
+# Command line
+# ------------------------------------------------------------------------------
+def parse_args(argv=None):
+    """parses and checks the generator command line arguments"""
+    print("#----------------------------------------------------------------------")
+    print("# Parsing command line arguments...")
+    print("#----------------------------------------------------------------------")
+    print(sys.argv if argv is None else argv)
+
+    parser = argparse.ArgumentParser(description="Temperature Sensor design generator")
+    parser.add_argument(
+        "--specfile",
+        required=True,
+        help="File containing the specification for the generator",
+    )
+    parser.add_argument(
+        "--outputDir", required=True, help="Output directory for generator results"
+    )
+    parser.add_argument(
+        "--platform", required=True, help="PDK/process kit for cadre flow (.e.g tsmc16)"
+    )
+    parser.add_argument(
+        "--mode",
+        required=True,
+        help="Specify the outputs to be generated: verilog, macro, full (includes PEX extraction)",
+    )
+    parser.add_argument("--ninv", required=False, help="Number of target inverters")
+    parser.add_argument("--nhead", required=False, help="Number of target headers")
+    parser.add_argument("--pex", action="store_true", help="Simulate PEX")
+    parser.add_argument("--prepex", action="store_true", help="Simulate pre PEX")
+    parser.add_argument("--clean", action="store_true", help="Clean the workspace.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent simulations (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--model-inv",
+        type=int,
+        nargs="+",
+        help="Inverter counts of the model grid, only the points missing from the model are simulated",
+    )
+    parser.add_argument(
+        "--model-header",
+        type=int,
+        nargs="+",
+        help="Header counts of the model grid, only the points missing from the model are simulated",
+    )
+    parser.add_argument(
+        "--model-temp",
+        type=int,
+        nargs="+",
+        help="Temperatures of the model grid, only the points missing from the model are simulated",
+    )
+    parser.add_argument(
+        "--no-sim-cache",
+        dest="sim_cache",
+        action="store_false",
+        help="Always simulate instead of restoring unchanged runs from the simulation cache",
+    )
+    parser.add_argument(
+        "--workspace",
+        help="Run in a private copy of the flow, blocks, src and simulations directories created in this directory, a relative outputDir is created inside it",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.specfile):
+        print("Error: specfile does not exist")
+        print("File Path: " + args.specfile)
+        sys.exit(1)
+
+    if args.platform != "sky130hd" and args.platform != "sky130hs":
+        print("Error: only sky130hd and sky130hs platforms are supported as of now")
+        sys.exit(1)
 
+    return args
 
-# look for points with same inv and Header as the search result and plot them
-def search_points(inv, header):
-    df_points = df[(df["inv"] == inv) & (df["header"] == header)]
-    return df_points["Temp"], df_points["Power"], df_points["Error"]
 
+def model_file(args, designName):
+    """returns the model file of the generator, the local model is (incrementally) built if it is missing or if the
+    model grid is given on the command line, the model file of the repo is used in verilog mode"""
+    mFile1 = genDir + "/models/modelfile.csv"
+    mFilePublic1 = genDir + args.platform + ".model_tempsense"
 
-# plot()
+    build_model_file = args.model_inv or args.model_header or args.model_temp
+    if not os.path.isfile(mFile1) and args.mode == "verilog":
+        print(
+            "Model file '"
+            + mFile1
+            + "' is not valid. "
+            + "Using the model file provided in the repo."
+        )
+        return mFilePublic1
+    elif not os.path.isfile(mFile1) or build_model_file:
+        print("generating a local model file")
+
+        try:
+            with open(genDir + "../../common/platform_config.json") as file:
+                jsonConfig = json.load(file)
+        except ValueError as e:
+            print("Error occurred opening or loading json file.")
+            print("Exception: %s" % str(e), file=sys.stderr)
+            sys.exit(1)
+
+        if os.getenv("PDK_ROOT") is not None:
+            pdk = os.path.join(os.environ["PDK_ROOT"], "sky130A")
+        else:
+            pdk = jsonConfig["open_pdks"]
+
+        # only the grid points missing from the model store are simulated
+        with ModelStore() as model_store:
+            if os.path.isfile(mFile1):
+                model_store.sync_csv(mFile1)
+            build_model(
+                model_store,
+                model_kind(mFile1),
+                mFile1,
+                genDir,
+                designName,
+                args.model_header or DEFAULT_HEADERS,
+                args.model_inv or DEFAULT_INVS,
+                args.model_temp or DEFAULT_TEMPS,
+                jsonConfig,
+                args.platform,
+                pdk,
+                sim_cache=SimulationCache(enabled=args.sim_cache),
+                jobs=args.jobs,
+            )
+    return mFile1
+
+
+def run(args):
+    """searches the design of the spec file of the command line arguments
+    returns (Spec, DesignPoint)"""
+    print("Loading specfile...")
+    try:
+        spec = load_spec(args.specfile)
+    except ValueError as e:
+        print("Error: " + str(e))
+        sys.exit(1)
+
+    with ModelStore() as store:
+        model = load_model(model_file(args, spec.design_name), store)
+        point = search(spec, model, store)
+        # keep search_result.csv as an export of the stored searches
+        store.export_searches("search_result.csv")
+
+    print("Error : ", point.error)
+    print("Inv : ", point.inv)
+    print("Header : ", point.header)
+    print("History : ", point.search_param)
+    return spec, point
+
+
+def batch_main(argv=None):
+    """searches the designs of a list of specs against a single load of a model and writes them as a table"""
+    parser = argparse.ArgumentParser(
+        description="Search the temperature sensor designs of a list of specifications"
+    )
+    parser.add_argument(
+        "specfile",
+        help="JSON file with a list of specifications (same format as the spec files)",
+    )
+    parser.add_argument(
+        "--model",
+        default="modelfile",
+        help="model name in the model store or model file (default: modelfile)",
+    )
+    parser.add_argument("--output", help="CSV file for the results")
+    batch_args = parser.parse_args(argv)
+
+    with open(batch_args.specfile) as file:
+        jsonSpecs = json.load(file)
+    specs = [read_spec(jsonSpec) for jsonSpec in jsonSpecs]
+    points = search_batch(specs, batch_args.model)
+
+    results = pd.DataFrame(
+        [spec._asdict() for spec in specs]
+    ).join(pd.DataFrame([point._asdict() for point in points]))
+    print(results.to_string(index=False))
+    if batch_args.output:
+        results.to_csv(batch_args.output, index=False)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+    else:
+        run(parse_args())
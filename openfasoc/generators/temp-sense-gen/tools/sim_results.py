@@ -0,0 +1,151 @@
+import argparse
+import csv
+import json
+import os
+import re
+
+import numpy as np
+
+# measurements printed by the simulators in the logs (ngspice, finesim) or .mt0 files (xyce)
+temp_re = re.compile(r"TEMP\s*=\s*([0-9\-\.]+)")
+period_re = re.compile(r"(?:PERIOD|period)\s*=\s*([0-9\.e-]+)")
+power_re = re.compile(r"(?:POWER|power)\s*=\s*([0-9\.e-]+)")
+
+
+def parse_measurement(pattern, text):
+    """returns the first value matched by pattern in text as a float, NaN if it is missing (failed measurement)"""
+    match = pattern.search(text)
+    if match is None:
+        return np.nan
+    try:
+        return float(match.group(1))
+    except ValueError:
+        return np.nan
+
+
+def parse_sim_output(file_name, temp=None):
+    """parses the TEMP, PERIOD and POWER measurements of one simulation output file
+    if the simulated temperature is not given, it is read from the file (TEMP) or from its name (<design>_sim_<temp>.log)
+    returns (temp, period, power), failed measurements are NaN"""
+    with open(file_name, "r") as rf:
+        text = rf.read()
+
+    temp_value = temp
+    if temp_value is None:
+        temp_value = parse_measurement(temp_re, text)
+    if np.isnan(temp_value):
+        temp_value = float(file_name.split("_")[-1].split(".")[0])
+
+    return temp_value, parse_measurement(period_re, text), parse_measurement(power_re, text)
+
+
+def error_table(temps, periods):
+    """computes the frequency and the temperature error of a design from the simulated periods
+    the sensor is calibrated with two points, the second and the second to last temperature
+    all arguments are arrays ordered by temperature, returns (frequency, error) arrays, NaN where a measurement failed"""
+    temps = np.asarray(temps, dtype=float)
+    periods = np.asarray(periods, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frequency = 1 / periods
+        # ln(f) * T(K) is linear with the temperature
+        linearized = np.log(frequency) * (temps + 273.15) * 0.01
+        if len(temps) < 3:
+            return frequency, np.full(len(temps), np.nan)
+        slope = (temps[-2] - temps[1]) / (linearized[-2] - linearized[1])
+        estimated = temps[1] + (linearized - linearized[1]) * slope
+    return frequency, temps - estimated
+
+
+def extract_results(result_files, temps):
+    """parses the simulation outputs of all the temperatures of a design and computes its frequency and error
+    result_files and temps are ordered by temperature
+    returns a dictionary of arrays {Temp, Period, Frequency, Power, Error}"""
+    parsed = np.array(
+        [parse_sim_output(f, temp) for f, temp in zip(result_files, temps)],
+        dtype=float,
+    ).reshape(-1, 3)
+    frequency, error = error_table(parsed[:, 0], parsed[:, 1])
+    return {
+        "Temp": parsed[:, 0],
+        "Period": parsed[:, 1],
+        "Frequency": frequency,
+        "Power": parsed[:, 2],
+        "Error": error,
+    }
+
+
+def format_value(value):
+    return "failed" if np.isnan(value) else repr(float(value))
+
+
+def format_temp(value):
+    return "failed" if np.isnan(value) else "%g" % value
+
+
+def result_columns(simMode):
+    """columns of the all_result table for a simulation mode, power is only measured in partial simulations"""
+    if simMode == "partial":
+        return ["Temp", "Frequency", "Power", "Error"]
+    elif simMode == "full":
+        return ["Temp", "Frequency", "Error"]
+    raise ValueError("simulation mode - " + simMode + " is not supported")
+
+
+def write_results(runDir, results, simMode):
+    """writes the results of a design to runDir as all_result (text table read by the generator), results.csv and results.json"""
+    columns = result_columns(simMode)
+    rows = [
+        [format_temp(results["Temp"][i])]
+        + [format_value(results[column][i]) for column in columns[1:]]
+        for i in range(len(results["Temp"]))
+    ]
+
+    with open(os.path.join(runDir, "all_result"), "w") as wf:
+        print(os.path.abspath(runDir), file=wf)
+        print(" ".join(columns), file=wf)
+        for row in rows:
+            print(" ".join(row), file=wf)
+
+    with open(os.path.join(runDir, "results.csv"), "w", newline="") as wf:
+        writer = csv.writer(wf)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+    with open(os.path.join(runDir, "results.json"), "w") as wf:
+        json.dump(
+            {
+                column: [
+                    None if np.isnan(value) else float(value)
+                    for value in results[column]
+                ]
+                for column in columns
+            },
+            wf,
+            indent=4,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="calculate the frequency and error of a temperature sensor run"
+    )
+    parser.add_argument(
+        "--mode",
+        "-m",
+        required=True,
+        help="simulation mode, full: skip power, partial: extract power",
+    )
+    parser.add_argument(
+        "--runDir", default=".", help="run directory where the results are written"
+    )
+    parser.add_argument(
+        "inputFiles",
+        nargs="+",
+        help="simulators' outputs for processing, ordered by temperature",
+    )
+    args = parser.parse_args()
+
+    results = extract_results(args.inputFiles, [None] * len(args.inputFiles))
+    for temp, frequency in zip(results["Temp"], results["Frequency"]):
+        print("temp: %s, \tfrequency: %s" % (format_temp(temp), format_value(frequency)))
+    write_results(args.runDir, results, args.mode)
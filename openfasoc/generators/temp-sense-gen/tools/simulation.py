@@ -2,12 +2,16 @@ import glob
 import os
 import re, math
 import shutil
-import subprocess as sp
 import sys
 from itertools import product
 
+import sim_results
 import TEMP_netlist
 
+# TODO: Find a better way to import modules from parent directory
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from common.simulation_scheduler import SimulationJob, run_jobs
+
 # note netlist type is either prePEX or postPEX
 # function returns the location of simulations
 def generate_runs(
@@ -23,8 +27,16 @@ def generate_runs(
     modeling=False,
     spiceDir=None,
     prePEX=True,
+    sim_cache=None,
+    jobs=None,
+    point_done=None,
 ):
-    """creates and executes simulations (through run_simulations call)"""
+    """creates and executes simulations (through run_simulations call)
+    every (header, inv, temp) point is simulated in its own run directory, all points share one worker pool of at most jobs simulations
+    tempList is either the temperatures of all designs or a dictionary {(header, inv): temperatures} of the points to simulate,
+    in which case headerList and invList are ignored
+    point_done is called with (header, inv, temp, result file) as soon as a point is simulated
+    returns a dictionary {(header, inv): run directory of the design}"""
     simDir = genDir + "simulations/"
     flowDir = genDir + "flow/"
     platformConfig = jsonConfig["platforms"][platform]
@@ -38,7 +50,11 @@ def generate_runs(
         genDir + "../../common/platforms/%s/cdl/*.spice" % (platform)
     )
 
-    designList = list(product(headerList, invList))
+    if isinstance(tempList, dict):
+        designTemps = tempList
+    else:
+        designTemps = {design: tempList for design in product(headerList, invList)}
+    designList = list(designTemps)
 
     if not os.path.isdir(simDir + "run/"):
         os.mkdir(simDir + "run/")
@@ -67,7 +83,8 @@ def generate_runs(
         simTestbench = re.sub("\*@modeling", "", simTestbench)
         simTestbench = re.sub("\*@partial", "", simTestbench)
 
-    # Iterate over runs
+    # Prepare the run directories of all the designs
+    runDirs = dict()
     for design in designList:
         header = design[0]
         inv = design[1]
@@ -80,13 +97,12 @@ def generate_runs(
             shutil.rmtree(runDir, ignore_errors=True)
         os.mkdir(runDir)
 
-        shutil.copyfile(genDir + "tools/result.py", runDir + "result.py")
-        shutil.copyfile(genDir + "tools/result_error.py", runDir + "result_error.py")
-
         if modeling:
-            srcNetlist = genDir + "tools/TEMP_sensor_template.sp"
+            srcNetlist = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), "TEMP_sensor_template.sp"
+            )
             dstNetlist = runDir + "TEMP_sensor_inv%d_header%d.spice" % (inv, header)
-            simTestbench = re.sub(
+            designTestbench = re.sub(
                 "@netlist",
                 os.path.abspath(
                     runDir + "TEMP_sensor_inv%d_header%d.spice" % (inv, header)
@@ -106,16 +122,19 @@ def generate_runs(
             else:
                 srcNetlist = spiceDir + "/" + designName + "_pex.spice"
             dstNetlist = runDir + designName + ".spice"
-            simTestbench = re.sub(
+            designTestbench = re.sub(
                 "@netlist",
                 os.path.abspath(runDir + designName + ".spice"),
                 simTestbench,
             )
             update_netlist(srcNetlist, dstNetlist, jsonConfig["simMode"])
 
-        for temp in tempList:
-            w_file = open(runDir + "/%s_sim_%d.sp" % (designName, temp), "w")
-            wfdata = re.sub("@temp", str(temp), simTestbench)
+        # each temperature is simulated in its own directory
+        for temp in designTemps[design]:
+            tempDir = runDir + temp_dir(temp)
+            os.mkdir(tempDir)
+            w_file = open(tempDir + "%s_sim_%d.sp" % (designName, temp), "w")
+            wfdata = re.sub("@temp", str(temp), designTestbench)
             wfdata = re.sub("@design_nickname", designName, wfdata)
             if jsonConfig["simTool"] == "xyce":
                 sim_end = round(math.pow(10, -3) * 800 / math.exp(0.04 * temp), 4)
@@ -123,31 +142,47 @@ def generate_runs(
             w_file.write(wfdata)
             w_file.close()
 
-        # runs simulation only if mode is set to "full"
-        if mode == "full":
-            print(
-                "#----------------------------------------------------------------------"
-            )
-            print("# Running {0} Simulations".format("prePEX" if prePEX else "PEX"))
-            print(
-                "#----------------------------------------------------------------------"
-            )
+        runDirs[design] = runDir
 
-            run_simulations(
-                runDir,
-                designName,
-                tempList,
-                jsonConfig["simTool"],
-                jsonConfig["simMode"],
+    # runs simulation only if mode is set to "full"
+    if mode == "full":
+        print(
+            "#----------------------------------------------------------------------"
+        )
+        print(
+            "# Running {0} Simulations of {1} designs".format(
+                "prePEX" if prePEX else "PEX", len(runDirs)
             )
+        )
+        print(
+            "#----------------------------------------------------------------------"
+        )
+
+        if point_done is None:
+            design_done = None
         else:
-            print(
-                "spice netlists created for different temperatures to run the {0} simulations".format(
-                    "prePEX" if prePEX else "PEX"
-                )
+            designs = {runDir: design for design, runDir in runDirs.items()}
+            design_done = lambda runDir, temp, result_file: point_done(
+                *designs[runDir], temp, result_file
             )
+        run_simulations(
+            list(runDirs.values()),
+            designName,
+            {runDirs[design]: designTemps[design] for design in designList},
+            jsonConfig["simTool"],
+            jsonConfig["simMode"],
+            sim_cache,
+            jobs,
+            design_done,
+        )
+    else:
+        print(
+            "spice netlists created for different temperatures to run the {0} simulations".format(
+                "prePEX" if prePEX else "PEX"
+            )
+        )
 
-        return runDir
+    return runDirs
 
 
 def matchNetlistCell(cell_instantiation):
@@ -234,172 +269,137 @@ def update_netlist(srcNetlist, dstNetlist, simMode):
         wf.write(netlist)
 
 
-def run_simulations(runDir, designName, temp_list, simTool, simMode) -> None:
-    if simTool == "finesim":
-        with open(runDir + "run_sim", "w") as wf:
-            for temp in temp_list:
-                wf.write(
-                    "finesim -spice %s_sim_%d.sp -o %s_sim_%d &\n"
-                    % (designName, temp, designName, temp)
-                )
-
-        with open(runDir + "cal_result", "w") as wf:
-            for temp in temp_list:
-                wf.write(
-                    "python result.py --tool finesim --inputFile %s_sim_%d.log\n"
-                    % (designName, temp)
-                )
-            wf.write("python result_error.py --mode %s\n" % (simMode))
-
-        processes = []
-        for temp in temp_list:
-            p = sp.Popen(
-                [
-                    "finesim",
-                    "-spice",
-                    "%s_sim_%d.sp" % (designName, temp),
-                    "-o",
-                    "%s_sim_%d" % (designName, temp),
-                ],
-                cwd=runDir,
-            )
-            processes.append(p)
-
-        for p in processes:
-            p.wait()
-
-        for temp in temp_list:
-            if not os.path.isfile(runDir + "%s_sim_%d.log" % (designName, temp)):
-                print(
-                    "simulation output: %s_sim_%d.log is not generated"
-                    % (designName, temp)
-                )
-                sys.exit(1)
-            p = sp.Popen(
-                [
-                    "python",
-                    "result.py",
-                    "--tool",
-                    "finesim",
-                    "--inputFile",
-                    "%s_sim_%d.log" % (designName, temp),
-                ],
-                cwd=runDir,
-            )
-            p.wait()
+def temp_dir(temp) -> str:
+    """run directory (relative to the design run directory) of one temperature"""
+    return "temp_%d/" % (temp)
 
-        p = sp.Popen(["python", "result_error.py", "--mode", simMode], cwd=runDir)
-        p.wait()
 
+def sim_command(simTool, designName, temp):
+    """returns (command, outputs, result file) of the simulation of one temperature, paths are relative to its run directory"""
+    netlist = "%s_sim_%d.sp" % (designName, temp)
+    log = "%s_sim_%d.log" % (designName, temp)
+    if simTool == "finesim":
+        command = ["finesim", "-spice", netlist, "-o", "%s_sim_%d" % (designName, temp)]
+        return command, [log], log
     elif simTool == "ngspice":
-        with open(runDir + "run_sim", "w") as wf:
-            for temp in temp_list:
-                wf.write(
-                    "ngspice -b -o %s_sim_%d.log %s_sim_%d.sp\n"
-                    % (designName, temp, designName, temp)
-                )
-
-        with open(runDir + "cal_result", "w") as wf:
-            for temp in temp_list:
-                wf.write(
-                    "python result.py --tool ngspice --inputFile %s_sim_%d.log\n"
-                    % (designName, temp)
-                )
-            wf.write("python result_error.py --mode %s\n" % (simMode))
-
-        processes = []
-        for temp in temp_list:
-            p = sp.Popen(
-                [
-                    "ngspice",
-                    "-b",
-                    "-o",
-                    "%s_sim_%d.log" % (designName, temp),
-                    "%s_sim_%d.sp" % (designName, temp),
-                ],
-                cwd=runDir,
-            )
-            processes.append(p)
-
-        for p in processes:
-            p.wait()
+        command = ["ngspice", "-b", "-o", log, netlist]
+        return command, [log], log
+    elif simTool == "xyce":
+        mt0 = "%s_sim_%d.mt0" % (designName, temp)
+        command = [
+            "/opt/xyce/xyce_serial/bin/Xyce",
+            "-l",
+            log,
+            "-o",
+            "%s_sim_%d" % (designName, temp),
+            netlist,
+        ]
+        return command, [log, mt0], mt0
+    print("simulation tool - " + simTool + " is not supported")
+    sys.exit(1)
+
+
+def collect_results(runDir, designName, temp_list, simTool, simMode) -> bool:
+    """extracts the frequency, power and error of every temperature (see sim_results) and writes the all_result, results.csv and results.json files of a design
+    returns False if a simulation output is missing"""
+    result_files = []
+    for temp in temp_list:
+        result_file = runDir + temp_dir(temp) + sim_command(simTool, designName, temp)[2]
+        if not os.path.isfile(result_file):
+            print("simulation output: %s is not generated" % (result_file))
+            return False
+        result_files.append(result_file)
+
+    results = sim_results.extract_results(result_files, temp_list)
+    for temp, frequency in zip(results["Temp"], results["Frequency"]):
+        print(
+            "temp: %s, \tfrequency: %s"
+            % (sim_results.format_temp(temp), sim_results.format_value(frequency))
+        )
+    sim_results.write_results(runDir, results, simMode)
+    return True
 
-        for temp in temp_list:
-            if not os.path.isfile(runDir + "%s_sim_%d.log" % (designName, temp)):
-                print(
-                    "simulation output: %s_sim_%d.log is not generated"
-                    % (designName, temp)
-                )
-                sys.exit(1)
-            p = sp.Popen(
-                [
-                    "python",
-                    "result.py",
-                    "--tool",
-                    "ngspice",
-                    "--inputFile",
-                    "%s_sim_%d.log" % (designName, temp),
-                ],
-                cwd=runDir,
-            )
-            p.wait()
 
-        p = sp.Popen(["python", "result_error.py", "--mode", simMode], cwd=runDir)
-        p.wait()
+def run_simulations(
+    runDirs,
+    designName,
+    temp_list,
+    simTool,
+    simMode,
+    sim_cache=None,
+    jobs=None,
+    point_done=None,
+) -> None:
+    """simulates every temperature of every design run directory in one worker pool of at most jobs simulations
+    temp_list is either the temperatures of all run directories or a dictionary {run directory: temperatures}
+    point_done is called with (run directory, temp, result file) as soon as a temperature is simulated
+    the results of a design are collected as soon as all its temperatures are simulated"""
+    if isinstance(runDirs, str):
+        runDirs = [runDirs]
+    if isinstance(temp_list, dict):
+        run_temps = temp_list
+    else:
+        run_temps = {runDir: temp_list for runDir in runDirs}
 
-    elif simTool == "xyce":
+    sim_jobs = []
+    job_temps = dict()
+    pending_temps = dict()
+    for runDir in runDirs:
+        temp_list = run_temps[runDir]
         with open(runDir + "run_sim", "w") as wf:
             for temp in temp_list:
                 wf.write(
-                    "xyce -l %s_sim_%d.log -o %s_sim_%d %s_sim_%d.sp\n"
-                    % (designName, temp, designName, temp, designName, temp)
+                    "(cd %s && %s)\n"
+                    % (temp_dir(temp), " ".join(sim_command(simTool, designName, temp)[0]))
                 )
 
         with open(runDir + "cal_result", "w") as wf:
-            for temp in temp_list:
-                wf.write(
-                    "python result.py --tool xyce --inputFile %s_sim_%d.mt0\n"
-                    % (designName, temp)
+            wf.write(
+                "python %s --mode %s %s\n"
+                % (
+                    os.path.abspath(sim_results.__file__),
+                    simMode,
+                    " ".join(
+                        temp_dir(temp) + sim_command(simTool, designName, temp)[2]
+                        for temp in temp_list
+                    ),
                 )
-            wf.write("python result_error.py --mode %s\n" % (simMode))
-
-        processes = []
-        for temp in temp_list:
-            p = sp.Popen(
-                [
-                    "/opt/xyce/xyce_serial/bin/Xyce",
-                    "-l",
-                    "%s_sim_%d.log" % (designName, temp),
-                    "-o",
-                    "%s_sim_%d" % (designName, temp),
-                    "%s_sim_%d.sp" % (designName, temp),
-                ],
-                cwd=runDir,
             )
-            processes.append(p)
-
-        for p in processes:
-            p.wait()
 
         for temp in temp_list:
-            if not os.path.isfile(runDir + "%s_sim_%d.mt0" % (designName, temp)):
-                print(
-                    "simulation output: %s_sim_%d.mt0 is not generated"
-                    % (designName, temp)
+            command, outputs, _ = sim_command(simTool, designName, temp)
+            sim_jobs.append(
+                SimulationJob(
+                    "%s_sim_%d" % (designName, temp),
+                    command,
+                    cwd=runDir + temp_dir(temp),
+                    group=runDir,
+                    netlist="%s_sim_%d.sp" % (designName, temp),
+                    outputs=outputs,
                 )
-                sys.exit(1)
-            p = sp.Popen(
-                [
-                    "python",
-                    "result.py",
-                    "--tool",
-                    "xyce",
-                    "--inputFile",
-                    "%s_sim_%d.mt0" % (designName, temp),
-                ],
-                cwd=runDir,
             )
-            p.wait()
-
-        p = sp.Popen(["python", "result_error.py", "--mode", simMode], cwd=runDir)
-        p.wait()
+            job_temps[(runDir, sim_jobs[-1].name)] = temp
+        pending_temps[runDir] = len(temp_list)
+
+    failed = []
+    for result in run_jobs(sim_jobs, jobs, sim_cache):
+        runDir = result.job.group
+        temp = job_temps[(runDir, result.job.name)]
+        if result.cached:
+            print(
+                "simulation %s%s restored from the simulation cache"
+                % (runDir, result.job.name)
+            )
+        result_file = runDir + temp_dir(temp) + sim_command(simTool, designName, temp)[2]
+        if point_done is not None and os.path.isfile(result_file):
+            point_done(runDir, temp, result_file)
+        pending_temps[runDir] -= 1
+        if pending_temps[runDir] == 0:
+            if not collect_results(
+                runDir, designName, run_temps[runDir], simTool, simMode
+            ):
+                failed.append(runDir)
+
+    if failed:
+        print("simulations failed for: " + ", ".join(failed))
+        sys.exit(1)
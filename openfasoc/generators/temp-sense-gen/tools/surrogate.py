@@ -0,0 +1,163 @@
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from design_search import DesignModel
+
+
+def _vander(temps, center, scale, degree):
+    return np.vander((np.asarray(temps, dtype=float) - center) / scale, degree + 1)
+
+
+def _fit(x, values, valid, degree):
+    """least squares polynomial fits of every design (rows of values) on its valid points
+    returns (coefficients (designs, degree + 1), rms residual (designs,)), NaN where a design has too few points"""
+    weights = valid.astype(float)
+    values = np.where(valid, values, 0.0)
+    a = np.einsum("dt,ti,tj->dij", weights, x, x)
+    b = np.einsum("dt,ti,dt->di", weights, x, values)
+    count = weights.sum(axis=1)
+    fitted = count > degree + 1
+    # designs without enough points get a dummy system and NaN results
+    a[~fitted] = np.eye(degree + 1)
+    coef = np.linalg.solve(a, b[..., None])[..., 0]
+    residual = np.where(valid, values - coef @ x.T, 0.0)
+    rms = np.sqrt((residual**2).sum(axis=1) / np.maximum(count - degree - 1, 1))
+    coef[~fitted] = np.nan
+    rms[~fitted] = np.nan
+    return coef, rms
+
+
+class Surrogate:
+    """smooth frequency, power and error models of every design of a DesignModel, to evaluate designs between the simulated temperatures
+
+    every design is fitted with polynomials of the temperature: ln(frequency) * T(K), which is almost linear with the
+    temperature, ln(power) and the error. The rms fit residuals of every design (frequency_residual and power_residual
+    relative, error_residual in C) tell how much the surrogate can be trusted"""
+
+    def __init__(self, model, degree=2, power_degree=2, error_degree=3):
+        self.model = model
+        self.degrees = {"frequency": degree, "power": power_degree, "error": error_degree}
+        temps = model.temps
+        self.center = temps.mean()
+        self.scale = max(np.ptp(temps) / 2, 1.0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = {
+                "frequency": np.log(model.frequency) * (temps + 273.15),
+                "power": np.log(model.power),
+                "error": model.error,
+            }
+        self.coef = dict()
+        residual = dict()
+        for key, value in values.items():
+            self.coef[key], residual[key] = _fit(
+                _vander(temps, self.center, self.scale, self.degrees[key]),
+                value,
+                np.isfinite(value),
+                self.degrees[key],
+            )
+        # ln(f) residual (relative frequency residual) at the mean temperature
+        self.frequency_residual = residual["frequency"] / (self.center + 273.15)
+        self.power_residual = residual["power"]
+        self.error_residual = residual["error"]
+
+        simulated = np.where(np.isfinite(model.frequency), temps, np.nan)
+        with np.errstate(invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.temp_min = np.nanmin(simulated, axis=1)
+            self.temp_max = np.nanmax(simulated, axis=1)
+
+    def _evaluate(self, key, temps):
+        return (
+            self.coef[key]
+            @ _vander(temps, self.center, self.scale, self.degrees[key]).T
+        )
+
+    def frequency(self, temps):
+        """fitted frequency of every design at temps, shape (designs, len(temps))"""
+        temps = np.asarray(temps, dtype=float)
+        return np.exp(self._evaluate("frequency", temps) / (temps + 273.15))
+
+    def power(self, temps):
+        """fitted power of every design at temps, shape (designs, len(temps))"""
+        return np.exp(self._evaluate("power", temps))
+
+    def error(self, temps):
+        """fitted temperature error of every design at temps, shape (designs, len(temps))"""
+        return self._evaluate("error", temps)
+
+    def extrapolated(self, temp_min, temp_max):
+        """True for the designs whose simulated temperatures do not cover [temp_min, temp_max]"""
+        with np.errstate(invalid="ignore"):
+            return ~((self.temp_min <= temp_min) & (self.temp_max >= temp_max))
+
+    def worst_case(self, temp_min, temp_max, points=25):
+        """worst case power and absolute error of every design over [temp_min, temp_max], which does not have to be on
+        the simulated temperatures, returns a dictionary of arrays (designs,):
+        Power, Error: maximum power and maximum absolute error over the range
+        PowerResidual, ErrorResidual: rms fit residuals (relative and C)
+        Extrapolated: True if the range is outside of the simulated temperatures of the design"""
+        temps = np.linspace(temp_min, temp_max, points)
+        return {
+            "Power": self.power(temps).max(axis=1),
+            "Error": np.abs(self.error(temps)).max(axis=1),
+            "PowerResidual": self.power_residual,
+            "ErrorResidual": self.error_residual,
+            "Extrapolated": self.extrapolated(temp_min, temp_max),
+        }
+
+    def fitted_model(self, temp_min, temp_max, points=25):
+        """DesignModel of the fitted values on points temperatures spanning exactly [temp_min, temp_max], so that
+        design_search.search can answer an off-grid range, the designs that are not trusted over the range are NaN
+        (never selected)"""
+        temps = np.linspace(temp_min, temp_max, points)
+        untrusted = ~self.trusted(temp_min, temp_max)[:, np.newaxis]
+        values = [self.frequency(temps), self.power(temps), self.error(temps)]
+        return DesignModel(
+            self.model.designs,
+            temps,
+            *[np.where(untrusted, np.nan, value) for value in values]
+        )
+
+    def trusted(self, temp_min, temp_max, max_error_residual=0.5, max_power_residual=0.05):
+        """designs whose surrogate results can be used over [temp_min, temp_max] instead of simulating them"""
+        with np.errstate(invalid="ignore"):
+            return (
+                (self.error_residual <= max_error_residual)
+                & (self.power_residual <= max_power_residual)
+                & ~self.extrapolated(temp_min, temp_max)
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fit the temperature sensor surrogate of a model file, compare it to the model and time it"
+    )
+    parser.add_argument("--model", required=True, help="model file (csv)")
+    parser.add_argument("--degree", type=int, default=2, help="degree of the frequency fit")
+    parser.add_argument("--power-degree", type=int, default=2, help="degree of the power fit")
+    parser.add_argument("--error-degree", type=int, default=3, help="degree of the error fit")
+    parser.add_argument("--repeat", type=int, default=1000, help="number of timed evaluations")
+    args = parser.parse_args()
+
+    model = DesignModel.from_csv(args.model)
+    surrogate = Surrogate(model, args.degree, args.power_degree, args.error_degree)
+    error = surrogate.error(model.temps)
+    power = surrogate.power(model.temps)
+    frequency = surrogate.frequency(model.temps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        print("median |frequency / model frequency - 1|: %.4f" % np.nanmedian(np.abs(frequency / model.frequency - 1)))
+        print("median |power / model power - 1|: %.4f" % np.nanmedian(np.abs(power / model.power - 1)))
+        print("median |error - model error|: %.4f C" % np.nanmedian(np.abs(error - model.error)))
+        print("median error residual: %.4f C" % np.nanmedian(surrogate.error_residual))
+
+    start = time.perf_counter()
+    for i in range(args.repeat):
+        surrogate.worst_case(-7.5 + i % 10, 93.5)
+    print(
+        "worst case of %d designs: %.1f us"
+        % (len(model.designs), 1e6 * (time.perf_counter() - start) / args.repeat)
+    )
@@ -7,20 +7,30 @@ import subprocess as sp
 import sys
 import re
 
-from readparamgen import args, check_search_done, designName
+from readparamgen import parse_args, run
 from simulation import generate_runs
 
 # TODO: Find a better way to import modules from parent directory
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from common.verilog_generation import generate_verilog, COMMON_PLATFORMS_PREFIX_MAP
+from common.flow_steps import VERIFICATION_TARGETS, run_make_targets
+from common.simulation_cache import SimulationCache
+from common.workspace import create_workspace
+
+WORKSPACE_DIRS = ["flow", "blocks", "src", "simulations"]
+
+args = parse_args()
 
 genDir = os.path.join(os.path.dirname(os.path.relpath(__file__)), "../")
+commonDir = genDir + "../../common/"
+platformDir = genDir + "../../common/platforms/" + args.platform + "/"
+if args.workspace:
+    genDir = create_workspace(genDir, args.workspace, WORKSPACE_DIRS) + "/"
+    print("Workspace: " + genDir)
 srcDir = genDir + "src/"
 flowDir = genDir + "flow/"
 designDir = genDir + "designs/src/tempsense/"
 simDir = genDir + "simulations/"
-commonDir = genDir + "../../common/"
-platformDir = genDir + "../../common/platforms/" + args.platform + "/"
 objDir = flowDir + "objects/" + args.platform + "/tempsense/"
 
 # ------------------------------------------------------------------------------
@@ -29,7 +39,7 @@ objDir = flowDir + "objects/" + args.platform + "/tempsense/"
 print("#----------------------------------------------------------------------")
 print("# Cleaning the workspace...")
 print("#----------------------------------------------------------------------")
-if args.clean:
+if args.clean and not args.workspace:
     p = sp.Popen(["make", "clean_all"], cwd=genDir)
     p.wait()
 
@@ -79,12 +89,9 @@ else:
     shutil.copy2(os.path.join(pdk, "libs.tech/netgen/sky130A_setup.tcl"), sky130A_path)
 
 
-temp, power, error, ninv, nhead, hist = check_search_done()
+spec, (temp, power, error, ninv, nhead, hist) = run(args)
+designName = spec.design_name
 
-print("Error : ", error)
-print("Inv : ", ninv)
-print("Header : ", nhead)
-print("History : ", hist)
 print("INV:{0}\nHEADER:{1}\n".format(ninv, nhead))
 
 if args.ninv:
@@ -101,7 +108,7 @@ print("# Verilog Generation")
 print("#----------------------------------------------------------------------")
 
 # The directory in which the output Verilog is generated
-verilog_gen_dir=os.path.join('flow', 'design', 'src', 'tempsense')
+verilog_gen_dir=os.path.join(flowDir, 'design', 'src', 'tempsense')
 generate_verilog(
     parameters={
         "design_name": designName,
@@ -162,24 +169,18 @@ print("#----------------------------------------------------------------------")
 print("# Place and Route finished")
 print("#----------------------------------------------------------------------")
 
-p = sp.Popen(["make", "magic_drc"], cwd=flowDir)
-p.wait()
-if p.returncode:
-    print("[Error] DRC failed. Refer to the report")
-    exit(1)
-
-print("#----------------------------------------------------------------------")
-print("# DRC finished")
-print("#----------------------------------------------------------------------")
-
-p = sp.Popen(["make", "netgen_lvs"], cwd=flowDir)
-p.wait()
-if p.returncode:
-    print("[Error] LVS failed. Refer to the report")
+verification = run_make_targets(
+    VERIFICATION_TARGETS,
+    flowDir,
+    log_dir=flowDir + "logs/" + args.platform + "/tempsense/base/",
+)
+print(verification.report())
+if not verification.ok:
+    print("[Error] DRC or LVS failed. Refer to the logs and reports")
     exit(1)
 
 print("#----------------------------------------------------------------------")
-print("# LVS finished")
+print("# DRC and LVS finished")
 print("#----------------------------------------------------------------------")
 
 if os.path.isdir(args.outputDir):
@@ -255,8 +256,9 @@ for i in range(0, temp_points + 1):
     temp_list.append(temp_start + i * temp_step)
 
 # run PEX and/or prePEX simulations based on the command line flags
+sim_cache = SimulationCache(enabled=args.sim_cache)
 if args.prepex:
-    prepexDir = generate_runs(
+    prepexDirs = generate_runs(
         genDir,
         designName,
         header_var,
@@ -266,20 +268,23 @@ if args.prepex:
         args.platform,
         args.mode,
         pdk,
-        spiceDir=args.outputDir,
+        spiceDir=outputDir,
         prePEX=True,
+        sim_cache=sim_cache,
+        jobs=args.jobs,
     )
+    prepexDir = prepexDirs[(header_var[0], stage_var[0])]
     if args.mode == "full":
         if os.path.isfile(prepexDir + "all_result"):
             shutil.copyfile(
-                prepexDir + "all_result", genDir + args.outputDir + "/prePEX_sim_result"
+                prepexDir + "all_result", outputDir + "/prePEX_sim_result"
             )
         else:
             print(prepexDir + "prePEX all_result file is not generated successfully")
             sys.exit(1)
 
 if args.pex:
-    pexDir = generate_runs(
+    pexDirs = generate_runs(
         genDir,
         designName,
         header_var,
@@ -289,14 +294,17 @@ if args.pex:
         args.platform,
         args.mode,
         pdk,
-        spiceDir=args.outputDir,
+        spiceDir=outputDir,
         prePEX=False,
+        sim_cache=sim_cache,
+        jobs=args.jobs,
     )
+    pexDir = pexDirs[(header_var[0], stage_var[0])]
 
     if args.mode == "full":
         if os.path.isfile(pexDir + "all_result"):
             shutil.copyfile(
-                pexDir + "all_result", genDir + args.outputDir + "/PEX_sim_result"
+                pexDir + "all_result", outputDir + "/PEX_sim_result"
             )
         else:
             print(pexDir + "PEX all_result file is not generated successfully")
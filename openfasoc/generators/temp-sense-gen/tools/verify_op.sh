@@ -1,6 +1,6 @@
 #!/bin/bash
 
-for file in error_within_x.csv golden_error_opt.csv search_result.csv
+for file in search_result.csv
 do
 	if ! [ -e $file ]
 	then
@@ -10,9 +10,12 @@ done
 
 module_name=$(grep "module_name" test.json | cut -d "\"" -f 4)
 
-if [ -e work ]
+# generator directory of the run, a workspace can be given as the first argument
+run_dir=${1:-.}
+
+if [ -e $run_dir/work ]
 then
-	cd work
+	cd $run_dir/work
 	for file in $module_name.def $module_name.gds $module_name\_pex.spice $module_name.spice $module_name.v $module_name.sdc
 	do
         	if ! [ -e $file ]
@@ -0,0 +1,343 @@
+#!/bin/python3 -f
+
+# gm/Id lookup tables built from the Xyce outputs of run_sim.py
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+# Quantities stored in the table for every (L, W, VGS, VDS) point
+QUANTITIES = ["Id", "gm", "gds", "Cgg", "noise"]
+AXES = ["L", "W", "VGS", "VDS"]
+
+# gm/Id axis (1/V) of the tables used by GmIdTable.query
+GMID_AXIS = np.linspace(2.0, 30.0, 141)
+
+# Column of each quantity in the .prn header ({inst} is the transistor instance),
+# the first pattern found is used. Missing quantities are stored as NaN.
+column_patterns = {
+    "Id": [r"ID\({inst}[:)]", r"N\({inst}:.*:IDS\)", r"N\({inst}:.*:ID\)"],
+    "gm": [r"N\({inst}:.*:GM\)"],
+    "gds": [r"N\({inst}:.*:GDS\)"],
+    "Cgg": [r"N\({inst}:.*:CGG\)"],
+    "noise": [r"N\({inst}:.*:SID\)", r"DNO\({inst}:.*,ID\)"],
+}
+
+
+def parse_prn(prn_path):
+    """Parses a Xyce .prn output (standard or GNUPLOT format) into {column name: np.ndarray}.
+    Column names are upper case."""
+    with open(prn_path) as prn:
+        header = None
+        rows = []
+        for line in prn:
+            tokens = line.split()
+            if not tokens or tokens[0].startswith("End"):
+                continue
+            if header is None:
+                header = [token.upper() for token in tokens]
+            elif tokens[0] != header[0]:
+                rows.append(tokens)
+    if header is None:
+        raise ValueError(prn_path + " is empty")
+    data = np.array(rows, dtype=float).reshape(-1, len(header))
+    return {name: data[:, i] for i, name in enumerate(header)}
+
+
+def parse_instance(netlist_path):
+    """Returns the enabled transistor of a rendered bin netlist as
+    (instance, drain, gate, source, model, L, W)"""
+    with open(netlist_path) as netlist:
+        for line in netlist:
+            tokens = line.split()
+            if not tokens or not tokens[0].upper().startswith("XM"):
+                continue
+            params = dict(
+                token.upper().split("=", 1) for token in tokens[6:] if "=" in token
+            )
+            return (
+                tokens[0].upper(),
+                tokens[1].upper(),
+                tokens[2].upper(),
+                tokens[3].upper(),
+                tokens[5],
+                float(params["L"]),
+                float(params["W"]),
+            )
+    raise ValueError("No transistor instance enabled in " + netlist_path)
+
+
+def find_column(columns, patterns, inst):
+    """Returns the first column matching one of patterns, None if there is none"""
+    for pattern in patterns:
+        regex = re.compile(pattern.format(inst=re.escape(inst)))
+        for name in columns:
+            if regex.match(name):
+                return columns[name]
+    return None
+
+
+def node_voltage(columns, node, prn_path):
+    if node == "0":
+        return np.zeros(len(next(iter(columns.values()))))
+    if "V(" + node + ")" not in columns:
+        raise ValueError(f"V({node}) is not printed in {prn_path}")
+    return columns["V(" + node + ")"]
+
+
+def load_bin(netlist_path, prn_path):
+    """Returns the bias points and quantities of a single bin simulation as
+    (L, W, {VGS, VDS, Id, gm, gds, Cgg, noise}). Voltages and currents are magnitudes,
+    so p-type and n-type devices share the same conventions."""
+    inst, drain, gate, source, model, L, W = parse_instance(netlist_path)
+    columns = parse_prn(prn_path)
+    vs = node_voltage(columns, source, prn_path)
+    points = {
+        "VGS": np.abs(node_voltage(columns, gate, prn_path) - vs),
+        "VDS": np.abs(node_voltage(columns, drain, prn_path) - vs),
+    }
+    for quantity in QUANTITIES:
+        column = find_column(columns, column_patterns[quantity], inst)
+        points[quantity] = (
+            np.full(len(vs), np.nan) if column is None else np.abs(column)
+        )
+    return L, W, points
+
+
+def grid_axis(values):
+    """Sorted unique values of an axis (rounded to avoid duplicated float sweep points)"""
+    return np.unique(np.round(np.concatenate(values), 9))
+
+
+def build_device_table(bins):
+    """Places the points of all bins [(L, W, points)] of a device on a regular
+    (L, W, VGS, VDS) grid. Grid points that were not simulated are NaN."""
+    table = {
+        "L": grid_axis([[L] for L, _, _ in bins]),
+        "W": grid_axis([[W] for _, W, _ in bins]),
+        "VGS": grid_axis([points["VGS"] for _, _, points in bins]),
+        "VDS": grid_axis([points["VDS"] for _, _, points in bins]),
+    }
+    shape = tuple(len(table[axis]) for axis in AXES)
+    for quantity in QUANTITIES:
+        table[quantity] = np.full(shape, np.nan)
+    for L, W, points in bins:
+        index = (
+            np.searchsorted(table["L"], round(L, 9)),
+            np.searchsorted(table["W"], round(W, 9)),
+            np.searchsorted(table["VGS"], np.round(points["VGS"], 9)),
+            np.searchsorted(table["VDS"], np.round(points["VDS"], 9)),
+        )
+        for quantity in QUANTITIES:
+            table[quantity][index] = points[quantity]
+    return table
+
+
+def gmid_curves(table):
+    """Re-grids the table on the gm/Id axis: for every (L, W, VDS) the strong inversion
+    side (VGS above the gm/Id peak) of the curves is interpolated at GMID_AXIS.
+    Returns {VGS, Id/W, fT, gain} arrays of shape (L, W, gm/Id, VDS)."""
+    W = table["W"][np.newaxis, :, np.newaxis, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gm_id = table["gm"] / table["Id"]
+        curves = {
+            "VGS": np.broadcast_to(
+                table["VGS"][np.newaxis, np.newaxis, :, np.newaxis], gm_id.shape
+            ),
+            "Id/W": table["Id"] / W,
+            "fT": table["gm"] / (2 * np.pi * table["Cgg"]),
+            "gain": table["gm"] / table["gds"],
+        }
+    shape = (len(table["L"]), len(table["W"]), len(GMID_AXIS), len(table["VDS"]))
+    result = {name: np.full(shape, np.nan) for name in curves}
+    for i, j, k in np.ndindex(shape[0], shape[1], shape[3]):
+        curve = gm_id[i, j, :, k]
+        valid = np.isfinite(curve) & (curve > 0)
+        if np.count_nonzero(valid) < 2:
+            continue
+        # gm/Id decreases monotonically with VGS above its peak
+        strong = np.flatnonzero(valid)
+        strong = strong[np.argmax(curve[strong]) :]
+        if len(strong) < 2:
+            continue
+        # ascending gm/Id
+        strong = strong[::-1]
+        in_range = (GMID_AXIS >= curve[strong[0]]) & (GMID_AXIS <= curve[strong[-1]])
+        for name, values in curves.items():
+            result[name][i, j, in_range, k] = np.interp(
+                GMID_AXIS[in_range], curve[strong], values[i, j, strong, k]
+            )
+    return result
+
+
+def make_interpolator(axes, values):
+    """Linear RegularGridInterpolator over the axes with more than one point.
+    values may have trailing dimensions (several quantities interpolated at once).
+    Returns (interpolator, indices of the axes it interpolates over)."""
+    kept = [i for i, axis in enumerate(axes) if len(axis) > 1]
+    values = values.reshape(
+        [len(axes[i]) for i in kept] + list(values.shape[len(axes) :])
+    )
+    interpolator = RegularGridInterpolator(
+        [axes[i] for i in kept], values, bounds_error=False, fill_value=np.nan
+    )
+    return interpolator, kept
+
+
+class GmIdTable:
+    """gm/Id lookup table of the characterized devices.
+    tables is {device: {L, W, VGS, VDS, Id, gm, gds, Cgg, noise}}, with the quantities
+    stored as arrays of shape (L, W, VGS, VDS). L and W are in um."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self._interpolators = dict()
+        self._gmid_interpolators = dict()
+
+    @classmethod
+    def from_runs(cls, outdir=".", devices=None):
+        """Builds the table from the run_sim.py outputs (<outdir>/<device>/<bin>/<bin>.prn).
+        Bins without output are skipped."""
+        if devices is None:
+            devices = sorted(
+                d for d in os.listdir(outdir) if os.path.isdir(os.path.join(outdir, d))
+            )
+        tables = dict()
+        for device in devices:
+            bins = []
+            device_dir = os.path.join(outdir, device)
+            for binname in sorted(os.listdir(device_dir)):
+                netlist = os.path.join(device_dir, binname, binname)
+                prn = netlist + ".prn"
+                if os.path.isfile(netlist) and os.path.isfile(prn):
+                    bins.append(load_bin(netlist, prn))
+            if bins:
+                tables[device] = build_device_table(bins)
+        return cls(tables)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a table saved with save"""
+        tables = dict()
+        with np.load(path) as data:
+            for name in data.files:
+                device, key = name.split(":", 1)
+                tables.setdefault(device, dict())[key] = data[name]
+        return cls(tables)
+
+    def save(self, path):
+        """Saves the table to a compressed .npz (keys are "<device>:<axis or quantity>")"""
+        np.savez_compressed(
+            path,
+            **{
+                device + ":" + key: values
+                for device, table in self.tables.items()
+                for key, values in table.items()
+            },
+        )
+
+    @property
+    def devices(self):
+        return list(self.tables)
+
+    def _axis_values(self, device, axis, values, size):
+        """Broadcasts the query values of an axis, defaulting to the only characterized value"""
+        if values is None:
+            if len(self.tables[device][axis]) != 1:
+                raise ValueError(f"{axis} is required, {device} has several {axis} values")
+            values = self.tables[device][axis][0]
+        return np.broadcast_to(np.asarray(values, dtype=float), size)
+
+    def lookup(self, device, quantity, L, VGS, W=None, VDS=None):
+        """Interpolates a quantity (Id, gm, gds, Cgg or noise) at the given bias points.
+        All the arguments are broadcast together, the result is a np.ndarray."""
+        key = (device, quantity)
+        if key not in self._interpolators:
+            table = self.tables[device]
+            self._interpolators[key] = make_interpolator(
+                [table[axis] for axis in AXES], table[quantity]
+            )
+        interpolator, kept = self._interpolators[key]
+        size = np.broadcast(L, VGS, W, VDS).shape
+        points = [
+            self._axis_values(device, axis, values, size)
+            for axis, values in zip(AXES, [L, W, VGS, VDS])
+        ]
+        return interpolator(np.stack([points[i] for i in kept], axis=-1))
+
+    def query(self, device, gm_id, L, W=None, VDS=None):
+        """Vectorized gm/Id design lookup: returns {VGS, Id/W, fT, gain} at the target
+        gm/Id (1/V) for each (L, W, VDS). Id/W is in A/um, fT in Hz, gain is gm/gds.
+        Targets outside the characterized range are NaN."""
+        if device not in self._gmid_interpolators:
+            table = self.tables[device]
+            axes = [table["L"], table["W"], GMID_AXIS, table["VDS"]]
+            curves = gmid_curves(table)
+            # a single interpolator for all the outputs
+            self._gmid_interpolators[device] = (
+                list(curves),
+                make_interpolator(axes, np.stack(list(curves.values()), axis=-1)),
+            )
+        size = np.broadcast(gm_id, L, W, VDS).shape
+        points = [
+            self._axis_values(device, "L", L, size),
+            self._axis_values(device, "W", W, size),
+            np.broadcast_to(np.asarray(gm_id, dtype=float), size),
+            self._axis_values(device, "VDS", VDS, size),
+        ]
+        names, (interpolator, kept) = self._gmid_interpolators[device]
+        values = interpolator(np.stack([points[i] for i in kept], axis=-1))
+        return {name: values[..., i] for i, name in enumerate(names)}
+
+
+def benchmark(table, num_queries):
+    """Times vectorized gm/Id queries on every device of the table"""
+    rng = np.random.default_rng(0)
+    for device in table.devices:
+        axes = table.tables[device]
+        L = rng.uniform(axes["L"][0], axes["L"][-1], num_queries)
+        W = rng.uniform(axes["W"][0], axes["W"][-1], num_queries)
+        VDS = rng.uniform(axes["VDS"][0], axes["VDS"][-1], num_queries)
+        gm_id = rng.uniform(5, 20, num_queries)
+        # the first query builds the interpolators
+        table.query(device, gm_id[:1], L[:1], W[:1], VDS[:1])
+        start = time.perf_counter()
+        table.query(device, gm_id, L, W, VDS)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{device}: {num_queries} queries in {1e3 * elapsed:.2f} ms"
+            f" ({num_queries / (1e3 * elapsed):.0f} queries/ms)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build a gm/Id lookup table from the run_sim.py outputs"
+    )
+    parser.add_argument(
+        "--outdir", help="Directory of the per bin simulation runs", default="."
+    )
+    parser.add_argument(
+        "--mostype", help="Mosfet Types (default: all)", nargs="+", default=None
+    )
+    parser.add_argument("--output", help="Output .npz table", default="gmid_table.npz")
+    parser.add_argument(
+        "--benchmark",
+        help="Number of random gm/Id queries to time on the table",
+        type=int,
+        default=0,
+    )
+    args = parser.parse_args()
+    table = GmIdTable.from_runs(args.outdir, args.mostype)
+    table.save(args.output)
+    for device, device_table in table.tables.items():
+        print(
+            f"{device}: "
+            + ", ".join(f"{len(device_table[axis])} {axis}" for axis in AXES)
+        )
+    print("Saved", args.output)
+    if args.benchmark:
+        benchmark(table, args.benchmark)
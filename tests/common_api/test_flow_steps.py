@@ -0,0 +1,73 @@
+import os
+import sys
+from threading import Semaphore
+
+# Add the common API to the path
+# TODO: Find a better way to import the modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'openfasoc', 'generators', 'common'))
+
+from flow_steps import run_make_targets
+
+# a flow Makefile with two independent sign-off steps
+MAKEFILE = """
+magic_drc:
+\t@echo drc $(PLATFORM_ARG)
+\t@sleep 0.5
+\t@touch drc.done
+
+netgen_lvs:
+\t@echo lvs
+\t@sleep 0.5
+\t@touch lvs.done
+
+failing_lvs:
+\t@echo lvs failed
+\t@exit 1
+
+slow_drc:
+\t@sleep 5
+\t@touch slow.done
+"""
+
+def _flow_dir(tmp_path):
+	(tmp_path / 'Makefile').write_text(MAKEFILE)
+	return str(tmp_path)
+
+def test_concurrent_targets(tmp_path):
+	flow_dir = _flow_dir(tmp_path)
+
+	result = run_make_targets(['magic_drc', 'netgen_lvs'], flow_dir, make_args=['PLATFORM_ARG=sky130hd'])
+
+	assert result.ok, "Successful targets are reported as failed."
+	assert result.elapsed < 0.9, "The targets did not run concurrently."
+	assert (tmp_path / 'drc.done').exists() and (tmp_path / 'lvs.done').exists(), "Not all the targets were run."
+	assert 'drc sky130hd' in open(result['magic_drc'].log_file).read(), "The make arguments or the log of a target are missing."
+	assert 'lvs' in open(result['netgen_lvs'].log_file).read(), "The log of a target is missing."
+
+def test_fail_fast(tmp_path):
+	flow_dir = _flow_dir(tmp_path)
+
+	result = run_make_targets(['slow_drc', 'failing_lvs'], flow_dir)
+
+	assert not result.ok, "A failed target is reported as successful."
+	assert result.elapsed < 4, "The running targets were not stopped when a target failed."
+	assert result['failing_lvs'].returncode != 0 and not result['failing_lvs'].cancelled
+	assert result['slow_drc'].cancelled, "The stopped target is not reported as cancelled."
+	assert not (tmp_path / 'slow.done').exists()
+	assert result.failed() == ['slow_drc', 'failing_lvs']
+
+def test_optional_failure(tmp_path):
+	flow_dir = _flow_dir(tmp_path)
+
+	result = run_make_targets(['failing_lvs', 'magic_drc'], flow_dir, optional=['failing_lvs'])
+
+	assert result['magic_drc'].ok, "A target was stopped by the failure of an optional target."
+	assert result.failed(optional=['failing_lvs']) == []
+
+def test_slots(tmp_path):
+	flow_dir = _flow_dir(tmp_path)
+
+	result = run_make_targets(['magic_drc', 'netgen_lvs'], flow_dir, slots=Semaphore(1))
+
+	assert result.ok
+	assert result.elapsed >= 1.0, "More targets than slots ran concurrently."
@@ -0,0 +1,89 @@
+import os
+import sys
+
+# Add the common API to the path
+# TODO: Find a better way to import the modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'openfasoc', 'generators', 'common'))
+
+from simulation_cache import SimulationCache
+from simulation_scheduler import SimulationJob, run_jobs
+
+# a fake simulator: appends to a counter file and writes the netlist contents to the output
+_SIMULATOR = 'import sys; open("runs", "a").write("x"); open("out.raw", "w").write(open(sys.argv[1]).read())'
+
+def _write(file_path, contents):
+	with open(file_path, 'w') as file:
+		file.write(contents)
+
+def _simulate(run_dir, cache):
+	job = SimulationJob(
+		'sim',
+		[sys.executable, '-c', _SIMULATOR, 'tb.sp'],
+		cwd=str(run_dir),
+		netlist='tb.sp',
+		outputs=['out.raw']
+	)
+	return next(run_jobs([job], cache=cache))
+
+def _setup_run(run_dir, model='.model nmos'):
+	run_dir.mkdir()
+	_write(run_dir / 'models.lib', model)
+	_write(run_dir / 'tb.sp', ".lib 'models.lib' tt\nV1 a 0 1\n")
+
+def test_cache_hit(tmp_path):
+	cache = SimulationCache(str(tmp_path / 'cache'))
+	_setup_run(tmp_path / 'run')
+
+	first = _simulate(tmp_path / 'run', cache)
+	os.remove(tmp_path / 'run' / 'out.raw')
+	second = _simulate(tmp_path / 'run', cache)
+
+	assert not first.cached, "The first run can not be a cache hit."
+	assert second.cached, "The unchanged simulation was not restored from the cache."
+	assert open(tmp_path / 'run' / 'runs').read() == 'x', "The simulator was run again on a cache hit."
+	assert open(tmp_path / 'run' / 'out.raw').read() == open(tmp_path / 'run' / 'tb.sp').read(), "The restored output is wrong."
+
+def test_cache_hit_other_directory(tmp_path):
+	cache = SimulationCache(str(tmp_path / 'cache'))
+	_setup_run(tmp_path / 'run1')
+	_setup_run(tmp_path / 'run2')
+
+	_simulate(tmp_path / 'run1', cache)
+
+	assert _simulate(tmp_path / 'run2', cache).cached, "Identical runs in different directories must share cache entries."
+
+def test_included_file_change(tmp_path):
+	cache = SimulationCache(str(tmp_path / 'cache'))
+	_setup_run(tmp_path / 'run')
+
+	_simulate(tmp_path / 'run', cache)
+	_write(tmp_path / 'run' / 'models.lib', '.model pmos')
+
+	assert not _simulate(tmp_path / 'run', cache).cached, "A change of an included file must invalidate the cache."
+
+def test_disabled(tmp_path):
+	cache = SimulationCache(str(tmp_path / 'cache'), enabled=False)
+	_setup_run(tmp_path / 'run')
+
+	_simulate(tmp_path / 'run', cache)
+
+	assert not _simulate(tmp_path / 'run', cache).cached, "A disabled cache must always miss."
+
+def test_lru_eviction(tmp_path):
+	cache = SimulationCache(str(tmp_path / 'cache'), max_size=2500)
+	run_dir = tmp_path / 'run'
+	run_dir.mkdir()
+
+	keys = []
+	for i in range(3):
+		_write(run_dir / 'out.raw', str(i) * 1000)
+		keys.append(cache.key('sim_{}'.format(i), 'out.raw', str(run_dir)))
+		cache.store(keys[-1], str(run_dir), ['out.raw'])
+		os.remove(run_dir / 'out.raw')
+		# age the second entry so it is the least recently used
+		if i == 1:
+			os.utime(os.path.join(cache._entry(keys[1]), 'manifest.json'), (0, 0))
+
+	assert cache.restore(keys[0], str(run_dir)), "A recently used entry was evicted."
+	assert not cache.restore(keys[1], str(run_dir)), "The least recently used entry was not evicted."
+	assert cache.restore(keys[2], str(run_dir)), "The newest entry was evicted."
@@ -0,0 +1,95 @@
+import os
+import sys
+from threading import Semaphore, Thread
+
+# Add the common API to the path
+# TODO: Find a better way to import the modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'openfasoc', 'generators', 'common'))
+
+from simulation_scheduler import SimulationJob, run_jobs
+
+def _python_job(name, code, **kwargs):
+	return SimulationJob(name, [sys.executable, '-c', code], **kwargs)
+
+def test_completion_order():
+	jobs = [
+		_python_job('slow', 'import time; time.sleep(1.0)'),
+		_python_job('fast', 'pass')
+	]
+
+	results = list(run_jobs(jobs, max_jobs=2))
+
+	assert [result.job.name for result in results] == ['fast', 'slow'], "Results are not yielded in completion order."
+	assert all(result.ok for result in results), "Successful jobs are reported as failed."
+
+def test_max_jobs(tmp_path):
+	# every job records its start and end time, used to count the concurrent jobs
+	code = 'import sys, time; start = time.time(); time.sleep(0.3); print(start, time.time(), file=open(sys.argv[1], "w"))'
+	jobs = [
+		SimulationJob(str(i), [sys.executable, '-c', code, str(tmp_path / str(i))])
+		for i in range(6)
+	]
+
+	results = list(run_jobs(jobs, max_jobs=2))
+
+	assert len(results) == 6, "Not all the jobs were run."
+	intervals = [tuple(map(float, open(tmp_path / str(i)).read().split())) for i in range(6)]
+	max_concurrent = max(
+		len([1 for start, end in intervals if start <= instant < end])
+		for instant, _ in intervals
+	)
+	assert max_concurrent <= 2, "More jobs than max_jobs ran concurrently."
+
+def test_shared_slots(tmp_path):
+	# two concurrent run_jobs calls (e.g. two designs of a batch) share 2 slots
+	code = 'import sys, time; start = time.time(); time.sleep(0.3); print(start, time.time(), file=open(sys.argv[1], "w"))'
+	slots = Semaphore(2)
+	batches = [
+		[SimulationJob(str(b * 3 + i), [sys.executable, '-c', code, str(tmp_path / str(b * 3 + i))]) for i in range(3)]
+		for b in range(2)
+	]
+	threads = [Thread(target=lambda jobs: list(run_jobs(jobs, max_jobs=3, slots=slots)), args=(jobs,)) for jobs in batches]
+
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	intervals = [tuple(map(float, open(tmp_path / str(i)).read().split())) for i in range(6)]
+	max_concurrent = max(
+		len([1 for start, end in intervals if start <= instant < end])
+		for instant, _ in intervals
+	)
+	assert max_concurrent <= 2, "More jobs than slots ran concurrently."
+
+def test_timeout():
+	job = _python_job('hang', 'import time; time.sleep(30)', timeout=0.5, retries=2)
+
+	result = next(run_jobs([job]))
+
+	assert result.timed_out, "The job was not killed after the timeout."
+	assert not result.ok, "A timed out job is reported as successful."
+	assert result.attempts == 1, "Timed out jobs must not be retried."
+
+def test_retry_on_crash(tmp_path):
+	# crashes on the first attempt and succeeds on the second one
+	code = '''
+import os, sys
+if not os.path.exists("attempted"):
+	open("attempted", "w").close()
+	sys.exit(3)
+'''
+	job = _python_job('flaky', code, cwd=str(tmp_path), retries=1)
+
+	result = next(run_jobs([job]))
+
+	assert result.ok, "The crashed job was not retried."
+	assert result.attempts == 2, "The job was not run exactly twice."
+
+def test_no_retries_left(tmp_path):
+	job = _python_job('broken', 'import sys; sys.exit(2)', retries=1)
+
+	result = next(run_jobs([job]))
+
+	assert result.returncode == 2, "The return code of the last attempt is not reported."
+	assert result.attempts == 2, "The job was not retried."
@@ -0,0 +1,46 @@
+import os
+import sys
+
+# Add the common API to the path
+# TODO: Find a better way to import the modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'openfasoc', 'generators', 'common'))
+
+from workspace import create_workspace
+
+def _generator(tmp_path):
+	# a minimal OpenFASOC tree: <root>/common and <root>/generators/gen with a flow that was already run once
+	(tmp_path / 'tree' / 'common' / 'platforms').mkdir(parents=True)
+	gen_dir = tmp_path / 'tree' / 'generators' / 'gen'
+	(gen_dir / 'flow' / 'design').mkdir(parents=True)
+	(gen_dir / 'flow' / 'design' / 'config.mk').write_text('export PLATFORM_DIR = ../../../common/platforms\n')
+	(gen_dir / 'flow' / 'results').mkdir()
+	(gen_dir / 'flow' / 'results' / '6_final.gds').write_text('gds')
+	(gen_dir / 'blocks').mkdir()
+	(gen_dir / 'blocks' / 'insts.txt').write_text('shared')
+	return gen_dir
+
+def test_workspace_layout(tmp_path):
+	gen_dir = _generator(tmp_path)
+
+	workspace_gen_dir = create_workspace(str(gen_dir), str(tmp_path / 'run1'), ['flow', 'blocks', 'missing'])
+
+	assert workspace_gen_dir == str(tmp_path / 'run1' / 'generators' / 'gen'), "The workspace does not mirror the generator location."
+	flow_dir = os.path.join(workspace_gen_dir, 'flow')
+	assert os.path.isdir(os.path.join(flow_dir, '..', '..', '..', 'common', 'platforms')), "Paths relative to the flow do not reach the common directory."
+	assert os.path.isfile(os.path.join(flow_dir, 'design', 'config.mk')), "The flow inputs were not copied."
+	assert not os.path.exists(os.path.join(flow_dir, 'results')), "The outputs of previous runs were copied."
+
+def test_workspaces_are_private(tmp_path):
+	gen_dir = _generator(tmp_path)
+
+	first = create_workspace(str(gen_dir), str(tmp_path / 'run1'), ['blocks'])
+	second = create_workspace(str(gen_dir), str(tmp_path / 'run2'), ['blocks'])
+	with open(os.path.join(first, 'blocks', 'insts.txt'), 'w') as file:
+		file.write('run1')
+
+	assert open(os.path.join(second, 'blocks', 'insts.txt')).read() == 'shared', "Workspaces share their files."
+	assert (gen_dir / 'blocks' / 'insts.txt').read_text() == 'shared', "A workspace modified the generator directory."
+
+	# an existing workspace is replaced by a fresh copy
+	create_workspace(str(gen_dir), str(tmp_path / 'run1'), ['blocks'])
+	assert open(os.path.join(first, 'blocks', 'insts.txt')).read() == 'shared', "The existing workspace was not replaced."
@@ -0,0 +1,71 @@
+import math
+import os
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+# Add the mos_char scripts to the path
+# TODO: Find a better way to import the modules
+_MOS_CHAR = os.path.join(os.path.dirname(__file__), '..', '..', 'openfasoc', 'mos_char')
+sys.path.append(_MOS_CHAR)
+
+from gmid_table import GmIdTable
+from run_sim import render_netlist, run_dict
+
+_DEVICE = 'nfet_lvt'
+_BIN = 'sky130_fd_pr__nfet_01v8_lvt__model.0'
+# the sample output holds gm/Id = 20, 16, 12, 10 and 8 at VGS = 0.4 to 0.8 V, for VDS = 0.9 and 1.8 V
+_SAMPLE_PRN = os.path.join(os.path.dirname(__file__), _BIN + '.prn')
+
+def _setup_runs(outdir):
+	"""Lays out the sample bin as a run_sim.py output directory"""
+	with open(os.path.join(_MOS_CHAR, 'gmId.netlist')) as file:
+		netlist = render_netlist(file.read(), _DEVICE, run_dict[_DEVICE][_BIN])
+	bin_dir = outdir / _DEVICE / _BIN
+	bin_dir.mkdir(parents=True)
+	(bin_dir / _BIN).write_text(netlist)
+	shutil.copy(_SAMPLE_PRN, bin_dir / (_BIN + '.prn'))
+	return netlist
+
+def test_rendered_netlist_prints_the_table_columns(tmp_path):
+	netlist = _setup_runs(tmp_path)
+	with open(_SAMPLE_PRN) as file:
+		columns = file.readline().split()[1:]
+	prints = [line for line in netlist.split('\n') if line.startswith('.print')]
+	assert len(prints) == 1
+	assert prints[0].upper().split()[3:] == columns
+	assert '.DC vsig 0 1.8 0.1 vdrain 0 1.8 0.1' in netlist
+
+def test_table_axes(tmp_path):
+	_setup_runs(tmp_path)
+	table = GmIdTable.from_runs(str(tmp_path)).tables[_DEVICE]
+	assert np.allclose(table['L'], [54.0])
+	assert np.allclose(table['W'], [0.42])
+	assert np.allclose(table['VGS'], [0.4, 0.5, 0.6, 0.7, 0.8])
+	assert np.allclose(table['VDS'], [0.9, 1.8])
+	assert np.isnan(table['noise']).all()
+
+def test_lookup_id_and_gm_id(tmp_path):
+	_setup_runs(tmp_path)
+	table = GmIdTable.from_runs(str(tmp_path))
+	Id = table.lookup(_DEVICE, 'Id', L=54.0, VGS=[0.6, 0.6], VDS=[0.9, 1.8])
+	gm = table.lookup(_DEVICE, 'gm', L=54.0, VGS=[0.6, 0.6], VDS=[0.9, 1.8])
+	assert np.allclose(Id, [2e-6, 4e-6])
+	assert np.allclose(gm / Id, [12, 12])
+
+def test_query_ft(tmp_path):
+	_setup_runs(tmp_path)
+	table = GmIdTable.from_runs(str(tmp_path))
+	design = table.query(_DEVICE, gm_id=[12, 10], L=54.0, VDS=1.8)
+	assert np.allclose(design['VGS'], [0.6, 0.7])
+	assert np.allclose(design['Id/W'], [4e-6 / 0.42, 9e-6 / 0.42])
+	assert np.allclose(design['fT'], [4.8e-5 / (2 * math.pi * 1e-15), 9e-5 / (2 * math.pi * 1e-15)])
+	assert np.allclose(design['gain'], [120, 100])
+	# outside of the characterized gm/Id range
+	assert np.isnan(table.query(_DEVICE, gm_id=25, L=54.0, VDS=1.8)['fT'])
+
+def test_render_netlist_without_instance():
+	with pytest.raises(ValueError, match='not found in netlist'):
+		render_netlist('* empty\n.end\n', _DEVICE, run_dict[_DEVICE][_BIN])